@@ -1,14 +1,77 @@
 #Author-Michael Logutov
 #Description-Creates "tails" part of the dovetail woodworking joint on the specified edge
 
-handlers = []
-
 ADDIN_NAME = "Dovetails"
 COMMAND_ID = ADDIN_NAME + "Addin"
+ATTRIBUTES_GROUP = ADDIN_NAME
+PREVIEW_EVENT_ID = COMMAND_ID + "Preview"
+OPTIMIZER_EVENT_ID = COMMAND_ID + "Optimizer"
 
-import adsk.core, adsk.fusion, adsk.cam, traceback, math
+import adsk.core, adsk.fusion, traceback, math
 from enum import Enum
+from .dovetail_layout import DovetailStartType, first_tail_offset, first_tail_offset_expression
+from .dovetail_frame import RESOLVER, model_frame, sketch_frame
+from .dovetail_brep import create_tails_body
+from .dovetail_preview import DovetailsPreview
+from .dovetail_parameters import ParameterRegistry, add_dovetails_parameters, dovetails_parameters_expressions, validate_dovetails_expressions
+from .profile_index import find_profiles
+from .dovetail_trace import Trace, NULL_TRACE
+from .dovetail_transaction import DesignTransaction
+from .dovetail_joint import DovetailsJoint, PARAMETER_INPUTS, TAILS, PINS, joint_record, update_joint_parameters
+from .dovetail_optimizer import LayoutOptimizer
+
+class DovetailGenerationMode(Enum):
+    Pattern = "Rectangular pattern"
+    SingleExtrude = "Single extrude"
+    FastSolid = "Fast solid (non-parametric)"
+    
+    
+class HandlerRegistry:
+    # Keeps event handlers referenced (Fusion doesn't keep python handler objects alive)
+    # while they're subscribed and unsubscribes all of them on release.
+    def __init__(self):
+        self.subscriptions = []
+        self.custom_event_ids = []
+        
+    def add(self, event, handler):
+        event.add(handler)
+        self.subscriptions.append((event, handler))
+        return handler
+        
+    def add_custom_event(self, app, event_id, handler):
+        self.custom_event_ids.append(event_id)
+        return self.add(app.registerCustomEvent(event_id), handler)
+        
+    def add_custom_event_once(self, app, event_id, create_handler):
+        # registers the custom event with the handler made by create_handler when it's needed for the first time
+        if event_id not in self.custom_event_ids:
+            self.add_custom_event(app, event_id, create_handler())
+        
+    def release(self):
+        for (event, handler) in reversed(self.subscriptions):
+            event.remove(handler)
+        self.subscriptions = []
+        
+        app = adsk.core.Application.get()
+        for event_id in self.custom_event_ids:
+            app.unregisterCustomEvent(event_id)
+        self.custom_event_ids = []
+        
+        
+# handlers living while the add-in is running
+handlers = HandlerRegistry()
+
+# handlers of the currently running command invocations - released when the command is destroyed
+command_handlers = set()
 
+# values of the dialog inputs used by the last execution and the help visibility - the dialog opens with them
+last_inputs = {}
+
+# inputs remembered by their expressions - the parameters prefix isn't remembered since it names the joint
+REMEMBERED_VALUE_INPUTS = ("edge_length", "angle", "height", "thickness", "ratio", "pin",
+                           "bit_diameter", "min_pin", "target_ratio", "pin_step")
+    
+    
 def run(context):
     ui = None
     try:
@@ -19,9 +82,7 @@ def run(context):
         if not command_definition:
             command_definition = ui.commandDefinitions.addButtonDefinition(COMMAND_ID, ADDIN_NAME, "Creates \"tails\" part of the dovetail woodworking joint on the specified edge", "Resources/Dovetails")
             
-        on_command_created = DovetailsCommandCreatedHandler()
-        command_definition.commandCreated.add(on_command_created)
-        handlers.append(on_command_created)
+        handlers.add(command_definition.commandCreated, DovetailsCommandCreatedHandler())
         
         addins_panel = ui.allToolbarPanels.itemById("SolidCreatePanel")
         addins_panel.controls.addCommand(command_definition)
@@ -31,10 +92,17 @@ def run(context):
             
             
 def stop(context):
+    ui = None
     try:
         app = adsk.core.Application.get()
         ui  = app.userInterface
         
+        for registry in list(command_handlers):
+            registry.release()
+        command_handlers.clear()
+        handlers.release()
+        RESOLVER.clear()
+        
         addins_panel = ui.allToolbarPanels.itemById("SolidCreatePanel")
         
         for ctrl in addins_panel.controls:
@@ -49,11 +117,6 @@ def stop(context):
             ui.messageBox("Failed:\n{}".format(traceback.format_exc()))	
         
         
-class DovetailStartType(Enum):
-    FullPin = "Full pin"
-    HalfPin = "Half pin"
-    HalfTail = "Half tail"
-
 class DovetailsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
     def __init__(self):
         super().__init__()
@@ -72,65 +135,237 @@ class DovetailsCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
                 return False
 
             command.setDialogMinimumSize(550, 600)
-
-            inputs.addImageCommandInput("help_image", "", "./Resources/Dialog help.png")
+            
+            # the help image is loaded only when it's shown
+            help_group = inputs.addGroupCommandInput("help", "Help")
+            show_help = help_group.children.addBoolValueInput("show_help", "Show dialog help", True, "", last_inputs.get("show_help", False))
+            show_help.tooltip = "Shows the picture explaining the dialog inputs."
+            if show_help.value:
+                show_help_image(inputs, True)
                 
-            face_input = inputs.addSelectionInput("face", "Face", "Select a face where dovetails will be placed")
-            face_input.setSelectionLimits(1, 1)
+            face_input = inputs.addSelectionInput("face", "Faces", "Select faces where dovetails will be placed")
+            face_input.setSelectionLimits(0, 0)
             face_input.addSelectionFilter("SolidFaces")
+            face_input.tooltip = "Faces where dovetails will be placed. Several faces can be selected to create dovetails on many boards at once - " \
+                "every face is paired with the edge selected at the same position. " \
+                "Leave it empty to update the existing dovetails joint with the specified parameters name prefix."
             
-            edge_input = inputs.addSelectionInput("edge", "Edge", "Select an edge on the face where dovetails will be placed")
-            edge_input.setSelectionLimits(1, 1)
+            edge_input = inputs.addSelectionInput("edge", "Edges", "Select an edge on each selected face where dovetails will be placed")
+            edge_input.setSelectionLimits(0, 0)
             edge_input.addSelectionFilter("LinearEdges")
+            edge_input.tooltip = "Edges where dovetails will be placed - one edge for every selected face in the same order."
+            
+            pins_face_input = inputs.addSelectionInput("pins_face", "Pins faces", "Select end faces of the pins boards")
+            pins_face_input.setSelectionLimits(0, 0)
+            pins_face_input.addSelectionFilter("SolidFaces")
+            pins_face_input.tooltip = "End faces of the boards which receive the tails. The pin sockets are cut into them " \
+                "with the same layout and parameters as the tails in the same command."
             
-            edge_length = inputs.addValueInput("edge_length", "Edge length", "mm", adsk.core.ValueInput.createByString("100 mm"))
+            pins_edge_input = inputs.addSelectionInput("pins_edge", "Pins edges", "Select an edge on each pins face on the inner side of the board")
+            pins_edge_input.setSelectionLimits(0, 0)
+            pins_edge_input.addSelectionFilter("LinearEdges")
+            pins_edge_input.tooltip = "Edges on the inner side of the pins boards where the narrow ends of the tails meet them - " \
+                "one edge for every selected pins face in the same order."
+            
+            edge_length = inputs.addValueInput("edge_length", "Edge length", "mm", remembered_value(design, "edge_length", "100 mm", "mm"))
             edge_length.tooltip = "Usually it's set to board width parameter like \"drawer_height\"."
             
-            angle = inputs.addValueInput("angle", "Angle", "deg", adsk.core.ValueInput.createByString("7 deg"))
+            angle = inputs.addValueInput("angle", "Angle", "deg", remembered_value(design, "angle", "7 deg", "deg"))
             angle.tooltip = "Angle of the dovetails side. For 1:8 - 7 deg. For 1:6 - 9.5 deg."
 
-            height = inputs.addValueInput("height", "Height", "mm", adsk.core.ValueInput.createByString("10 mm"))
+            height = inputs.addValueInput("height", "Height", "mm", remembered_value(design, "height", "10 mm", "mm"))
             height.tooltip = "Height of the dovetails from the board edge. " \
                 "Usually it's set to other board thickness parameter like \"drawer_side_thickness\"."
 
-            thickness = inputs.addValueInput("thickness", "Thickness", "mm", adsk.core.ValueInput.createByString("10 mm"))
+            thickness = inputs.addValueInput("thickness", "Thickness", "mm", remembered_value(design, "thickness", "10 mm", "mm"))
             thickness.tooltip = "Thickness of the dovetails. Usually it's set to board thickness parameter like \"drawer_front_thickness\"."
 
-            ratio = inputs.addValueInput("ratio", "Tails to pin ratio", "", adsk.core.ValueInput.createByString("2"))
+            ratio = inputs.addValueInput("ratio", "Tails to pin ratio", "", remembered_value(design, "ratio", "2", ""))
             ratio.tooltip = "Ratio of the maximum width of the tails to the maximum width of the pin."
 
-            pin = inputs.addValueInput("pin", "Maximum pin width", "mm", adsk.core.ValueInput.createByString("11 mm"))
+            pin = inputs.addValueInput("pin", "Maximum pin width", "mm", remembered_value(design, "pin", "11 mm", "mm"))
             pin.tooltip = "Maximum width of the full pin between dovetails. Increase this to produce more bigger dovetails, decrease otherwise."
 
             start_type_input = inputs.addDropDownCommandInput("start_type", "Start with", adsk.core.DropDownStyles.TextListDropDownStyle)
+            start_type = last_inputs.get("start_type", DovetailStartType.FullPin.value)
             for st in DovetailStartType:
-                start_type_input.listItems.add(st.value, False, '')
-            start_type_input.listItems[0].isSelected = True
+                start_type_input.listItems.add(st.value, st.value == start_type, '')
             start_type_input.tooltip = "Determine whenever to start with full pin or half pin."
+            
+            generation_mode_input = inputs.addDropDownCommandInput("generation_mode", "Generation mode", adsk.core.DropDownStyles.TextListDropDownStyle)
+            generation_mode = last_inputs.get("generation_mode", DovetailGenerationMode.Pattern.value)
+            for gm in DovetailGenerationMode:
+                generation_mode_input.listItems.add(gm.value, gm.value == generation_mode, '')
+            generation_mode_input.tooltip = "\"Rectangular pattern\" extrudes one tail and multiplies it with a pattern so tails count follows the parameters. " \
+                "\"Single extrude\" draws all the tails in the sketch and extrudes them with one feature which recomputes faster, " \
+                "but the number of tails is fixed when the dovetails are created. " \
+                "\"Fast solid\" builds the tails body directly without sketch and user parameters - fastest, but not parametric."
 
             params_prefix = inputs.addStringValueInput("params_prefix", "Parameters name prefix", "dovetails_")
             params_prefix.tooltip = "All generated dovetails has their parameters added as user parameters with the names prefixed with this text. " \
                 "Usually it's set to name of the part like \"drawer_front_dovetails_\""
             
-            on_select = DovetailsCommandSelectionEventHandler()
-            command.selectionEvent.add(on_select)
-            handlers.append(on_select)
+            trace = inputs.addBoolValueInput("trace", "Record timing trace", True, "", last_inputs.get("trace", False))
+            trace.tooltip = "Appends timings of every creation stage to the add-in logs/trace.jsonl. " \
+                "Run dovetail_trace.py to see the summary of the recorded runs."
+            trace_api_calls = inputs.addBoolValueInput("trace_api_calls", "Count API calls in trace", True, "", last_inputs.get("trace_api_calls", False))
+            trace_api_calls.tooltip = "Also counts the Fusion API calls of every stage. Counting them slows the whole run down several times, " \
+                "so the timings of these runs are marked as profiled and kept apart in the summary."
+            
+            optimizer_group = inputs.addGroupCommandInput("optimizer", "Layout optimizer")
+            optimizer_group.isExpanded = False
+            optimizer_inputs = optimizer_group.children
+            
+            bit_diameter = optimizer_inputs.addValueInput("bit_diameter", "Bit diameter", "mm", remembered_value(design, "bit_diameter", "6 mm", "mm"))
+            bit_diameter.tooltip = "Diameter of the router bit clearing the waste between the tails and the sockets of the tails in the pins board."
+            
+            min_pin = optimizer_inputs.addValueInput("min_pin", "Minimum pin width", "mm", remembered_value(design, "min_pin", "3 mm", "mm"))
+            min_pin.tooltip = "Minimum width of the narrowest part of the pins."
             
-            on_input_changed = DovetailsCommandInputChangedEventHandler()
-            command.inputChanged.add(on_input_changed)
-            handlers.append(on_input_changed)
+            target_ratio = optimizer_inputs.addValueInput("target_ratio", "Target tails to pin ratio", "", remembered_value(design, "target_ratio", "2", ""))
+            target_ratio.tooltip = "Layouts with the tails to pin ratio closest to this one are listed first."
             
-            on_execute = DovetailsCommandExecuteEventHandler()
-            command.execute.add(on_execute)
-            handlers.append(on_execute)
+            pin_step = optimizer_inputs.addValueInput("pin_step", "Pin width step", "mm", remembered_value(design, "pin_step", "0.5 mm", "mm"))
+            pin_step.tooltip = "Only the pin widths which are multiples of this step are tried."
+            
+            optimize = optimizer_inputs.addBoolValueInput("optimize", "Find layouts", False, "", False)
+            optimize.tooltip = "Searches the tails count and pin width combinations fitting the bit and the minimum pin width " \
+                "for the edge length, start type, angle and height above."
+            
+            optimizer_results = optimizer_inputs.addDropDownCommandInput("optimizer_results", "Layouts", adsk.core.DropDownStyles.TextListDropDownStyle)
+            optimizer_results.isEnabled = False
+            optimizer_results.tooltip = "Pick a layout to set its maximum pin width and tails to pin ratio."
+            
+            optimizer_inputs.addTextBoxCommandInput("optimizer_status", "", "", 1, True)
+            
+            # the command started on a sketch or feature of an existing joint reopens it
+            joint = DovetailsJoint.from_selections(design, ATTRIBUTES_GROUP, ui.activeSelections)
+            if joint:
+                set_joint_inputs(inputs, joint)
+            
+            preview = DovetailsPreview(PREVIEW_EVENT_ID)
+            optimizer = LayoutOptimizer(OPTIMIZER_EVENT_ID)
+            faces_edges = {edge_id: SelectedFacesEdges() for edge_id in EDGE_INPUTS}
+            
+            # the custom events of the preview debounce and the optimizer are registered on their first use
+            registry = HandlerRegistry()
+            registry.add(command.selectionEvent, DovetailsCommandSelectionEventHandler(faces_edges))
+            registry.add(command.inputChanged, DovetailsCommandInputChangedEventHandler(preview, optimizer, faces_edges, registry))
+            registry.add(command.executePreview, DovetailsCommandExecutePreviewHandler(preview, registry))
+            registry.add(command.execute, DovetailsCommandExecuteEventHandler(preview))
+            registry.add(command.destroy, DovetailsCommandDestroyHandler(preview, optimizer, registry))
+            command_handlers.add(registry)
         except:
             if ui:
                 ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
                
 
-class DovetailsCommandSelectionEventHandler(adsk.core.SelectionEventHandler):
+def remembered_value(design, input_id, default_expression, units):
+    # the remembered expression can use user parameters of another design
+    expression = last_inputs.get(input_id)
+    if expression is None or not design.unitsManager.isValidExpression(expression, units):
+        expression = default_expression
+    return adsk.core.ValueInput.createByString(expression)
+    
+    
+def remember_inputs(inputs):
+    for input_id in REMEMBERED_VALUE_INPUTS:
+        value_input = adsk.core.ValueCommandInput.cast(inputs.itemById(input_id))
+        if value_input.isValidExpression:
+            last_inputs[input_id] = value_input.expression
+    for input_id in ("start_type", "generation_mode"):
+        last_inputs[input_id] = adsk.core.DropDownCommandInput.cast(inputs.itemById(input_id)).selectedItem.name
+    for input_id in ("trace", "trace_api_calls"):
+        last_inputs[input_id] = adsk.core.BoolValueCommandInput.cast(inputs.itemById(input_id)).value
+    
+    
+def show_help_image(inputs, visible):
+    image = inputs.itemById("help_image")
+    if image:
+        image.isVisible = visible
+    elif visible:
+        help_group = adsk.core.GroupCommandInput.cast(inputs.itemById("help"))
+        help_group.children.addImageCommandInput("help_image", "", "./Resources/Dialog help.png")
+    
+    
+def select_list_item(dropdown_input, name):
+    for item in dropdown_input.listItems:
+        if item.name == name:
+            item.isSelected = True
+            return
+    
+    
+def set_joint_inputs(inputs, joint):
+    # fills the dialog with the inputs the joint was created with
+    for name in PARAMETER_INPUTS:
+        adsk.core.ValueCommandInput.cast(inputs.itemById(name)).expression = joint.expression(name)
+    select_list_item(adsk.core.DropDownCommandInput.cast(inputs.itemById("start_type")), joint.start_type)
+    select_list_item(adsk.core.DropDownCommandInput.cast(inputs.itemById("generation_mode")), joint.generation_mode)
+    adsk.core.StringValueCommandInput.cast(inputs.itemById("params_prefix")).value = joint.prefix
+    
+    
+# inputs the layouts found by the optimizer depend on
+OPTIMIZER_INPUTS = ("edge_length", "angle", "height", "start_type", "bit_diameter", "min_pin", "target_ratio", "pin_step")
+
+
+def start_layout_optimizer(app, inputs, optimizer):
+    value_inputs = [adsk.core.ValueCommandInput.cast(inputs.itemById(x))
+                    for x in ("edge_length", "angle", "height", "target_ratio", "bit_diameter", "min_pin", "pin_step")]
+    if not all(x.isValidExpression for x in value_inputs):
+        show_layout_candidates(inputs, [], "Fix the invalid inputs to search for layouts.")
+        return
+    (edge_length, angle, height, target_ratio, bit_diameter, min_pin, pin_step) = [x.value for x in value_inputs]
+    start_type = DovetailStartType(adsk.core.DropDownCommandInput.cast(inputs.itemById("start_type")).selectedItem.name)
+    
+    show_layout_candidates(inputs, [], "Searching...")
+    optimizer.start(app, start_type, edge_length, angle, height, target_ratio, bit_diameter, min_pin, pin_step)
+    
+    
+def show_layout_candidates(inputs, candidates, status):
+    # lengths are in the internal units (cm) and shown in mm as all the dialog inputs
+    results = adsk.core.DropDownCommandInput.cast(inputs.itemById("optimizer_results"))
+    results.listItems.clear()
+    for candidate in candidates:
+        results.listItems.add("{} tails {:.2f} mm, pin {:g} mm, ratio {:g}, narrowest pin {:.2f} mm".format(
+            candidate.count, candidate.tail * 10, round(candidate.pin * 10, 6), candidate.ratio, candidate.narrow_pin * 10), False, "")
+    results.isEnabled = len(candidates) > 0
+    adsk.core.TextBoxCommandInput.cast(inputs.itemById("optimizer_status")).formattedText = status
+    
+    
+def apply_layout_candidate(inputs, optimizer):
+    selected = adsk.core.DropDownCommandInput.cast(inputs.itemById("optimizer_results")).selectedItem
+    if not selected or selected.index >= len(optimizer.candidates):
+        return
+    candidate = optimizer.candidates[selected.index]
+    adsk.core.ValueCommandInput.cast(inputs.itemById("pin")).expression = "{:g} mm".format(round(candidate.pin * 10, 6))
+    adsk.core.ValueCommandInput.cast(inputs.itemById("ratio")).expression = "{:g}".format(candidate.ratio)
+    
+    
+# edge selection inputs with the face selection inputs they are paired with
+EDGE_INPUTS = {"edge": "face", "pins_edge": "pins_face"}
+
+
+class SelectedFacesEdges:
+    # Edges of every selected face (in the selection order) collected once when the faces selection changes,
+    # so the edge selection filter doesn't have to walk face edges on every mouse hover.
+    # Edges are identified by their body and temp id which is unique within the body.
     def __init__(self):
+        self.faces = []
+        
+    def update(self, face_input):
+        self.faces = []
+        for face in get_selected_entities(face_input, adsk.fusion.BRepFace.cast):
+            self.faces.append((face.body, frozenset(edge.tempId for edge in face.edges)))
+        
+    def contains(self, face_index, edge):
+        (body, edge_ids) = self.faces[face_index]
+        return edge.tempId in edge_ids and edge.body == body
+        
+        
+class DovetailsCommandSelectionEventHandler(adsk.core.SelectionEventHandler):
+    def __init__(self, faces_edges):
         super().__init__()
+        self.faces_edges = faces_edges
         
     def notify(self, args):
         ui = None
@@ -140,18 +375,31 @@ class DovetailsCommandSelectionEventHandler(adsk.core.SelectionEventHandler):
             event_args = adsk.core.SelectionEventArgs.cast(args)
             inputs = event_args.firingEvent.sender.commandInputs
             
-            if event_args.activeInput.id == "edge":
-                face = adsk.fusion.BRepFace.cast(inputs.itemById("face").selection(0).entity)
+            edge_id = event_args.activeInput.id
+            if edge_id in EDGE_INPUTS:
+                # every edge is paired with the face at the same position
+                face_input = inputs.itemById(EDGE_INPUTS[edge_id])
+                faces_edges = self.faces_edges[edge_id]
+                edge_index = event_args.activeInput.selectionCount
+                if edge_index >= face_input.selectionCount:
+                    event_args.isSelectable = False
+                    return
+                if len(faces_edges.faces) != face_input.selectionCount:
+                    faces_edges.update(face_input)
                 edge = adsk.fusion.BRepEdge.cast(event_args.selection.entity)
-                event_args.isSelectable = any([x for x in face.edges if x == edge])
+                event_args.isSelectable = faces_edges.contains(edge_index, edge)
         except:
             if ui:
                 ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
 
                 
 class DovetailsCommandInputChangedEventHandler(adsk.core.InputChangedEventHandler):
-    def __init__(self):
+    def __init__(self, preview, optimizer, faces_edges, registry):
         super().__init__()
+        self.preview = preview
+        self.optimizer = optimizer
+        self.faces_edges = faces_edges
+        self.registry = registry
         
     def notify(self, args):
         ui = None
@@ -161,10 +409,40 @@ class DovetailsCommandInputChangedEventHandler(adsk.core.InputChangedEventHandle
             event_args = adsk.core.InputChangedEventArgs.cast(args)
             inputs = event_args.firingEvent.sender.commandInputs
             current_input = event_args.input
+            self.preview.input_changed()
             
             if not current_input.isValid:
                 return
                 
+            for edge_id, face_id in EDGE_INPUTS.items():
+                if current_input.id == face_id:
+                    self.faces_edges[edge_id].update(current_input)
+            
+            if current_input.id == "show_help":
+                last_inputs["show_help"] = current_input.value
+                show_help_image(inputs, current_input.value)
+                return
+            if current_input.id == "optimize":
+                command = event_args.firingEvent.sender
+                optimizer = self.optimizer
+                self.registry.add_custom_event_once(app, OPTIMIZER_EVENT_ID, lambda: DovetailsOptimizerEventHandler(command, optimizer))
+                start_layout_optimizer(app, inputs, self.optimizer)
+                return
+            if current_input.id == "optimizer_results":
+                apply_layout_candidate(inputs, self.optimizer)
+                return
+            # layouts found for other inputs don't apply anymore
+            if current_input.id in OPTIMIZER_INPUTS and (self.optimizer.candidates or self.optimizer.is_running):
+                self.optimizer.cancel()
+                show_layout_candidates(inputs, [], "Inputs changed - search for layouts again.")
+            
+            # return to the faces selection after an edge is picked so the next face/edge pair can be selected
+            if current_input.id in EDGE_INPUTS:
+                face_input = inputs.itemById(EDGE_INPUTS[current_input.id])
+                if face_input.selectionCount == current_input.selectionCount:
+                    face_input.hasFocus = True
+                    return
+                
             prev = None
             for cur in inputs:
                 if prev and prev == current_input:
@@ -176,31 +454,126 @@ class DovetailsCommandInputChangedEventHandler(adsk.core.InputChangedEventHandle
                 ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
         
         
-def add_parameter_if_not_exists(design, prefix, name, value, units = "", comment = ""):
-    param_name = prefix + name
-    param = design.userParameters.itemByName(param_name)
-    if not param:
-        param = design.userParameters.add(param_name, adsk.core.ValueInput.createByString(value), units, comment)
-        if not param:
-            raise ValueError("Unable to create user parameter: {}".format(param_name))
-    return param
-    
-   
-def new_point(x, y, origin, xAxis, yAxis):
-    x_axis = xAxis.copy()
-    x_axis.normalize()
-    x_axis.scaleBy(x)
-    
-    y_axis = yAxis.copy()
-    y_axis.normalize()
-    y_axis.scaleBy(y)
-    
-    v = origin.asVector()
-    v.add(x_axis)
-    v.add(y_axis)
+class DovetailsCommandExecutePreviewHandler(adsk.core.CommandEventHandler):
+    def __init__(self, preview, registry):
+        super().__init__()
+        self.preview = preview
+        self.registry = registry
+        
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            design = adsk.fusion.Design.cast(app.activeProduct)
+            command = adsk.core.Command.cast(args.command)
+            inputs = command.commandInputs
+            
+            value_inputs = [adsk.core.ValueCommandInput.cast(inputs.itemById(x)) for x in ("edge_length", "pin", "ratio", "angle", "height", "thickness")]
+            if not all(x.isValidExpression for x in value_inputs):
+                return
+            (edge_length, pin, ratio, angle, height, thickness) = [x.value for x in value_inputs]
+            start_type = DovetailStartType(adsk.core.DropDownCommandInput.cast(inputs.itemById("start_type")).selectedItem.name)
+            
+            # (face, edge, inward) of the tails and the pin sockets
+            pairs = []
+            for (edge_id, face_id) in EDGE_INPUTS.items():
+                faces = get_selected_entities(inputs.itemById(face_id), adsk.fusion.BRepFace.cast)
+                edges = get_selected_entities(inputs.itemById(edge_id), adsk.fusion.BRepEdge.cast)
+                pairs.extend((f, e, edge_id == "pins_edge") for f, e in zip(faces, edges))
+            
+            layout_key = (start_type, edge_length, pin, ratio, angle, height)
+            if self.preview.is_up_to_date([(f.entityToken, e.entityToken, inward) for f, e, inward in pairs], layout_key, thickness):
+                return
+                
+            if self.preview.is_settling():
+                self.registry.add_custom_event_once(app, PREVIEW_EVENT_ID, lambda: DovetailsPreviewEventHandler(command))
+                self.preview.schedule(app)
+                return
+                
+            self.preview.solve(*layout_key)
+            self.preview.update(design, pairs, thickness)
+        except:
+            if ui:
+                ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
+        
+        
+class DovetailsPreviewEventHandler(adsk.core.CustomEventHandler):
+    # fired by the preview debounce timer once the inputs stop changing
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+        
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if self.command.isValid:
+                self.command.doExecutePreview()
+        except:
+            if ui:
+                ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
+        
+        
+class DovetailsOptimizerEventHandler(adsk.core.CustomEventHandler):
+    # fired by the optimizer worker thread when the search is finished
+    def __init__(self, command, optimizer):
+        super().__init__()
+        self.command = command
+        self.optimizer = optimizer
+        
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if not self.command.isValid:
+                return
+            result = self.optimizer.take(int(adsk.core.CustomEventArgs.cast(args).additionalInfo))
+            if result is None:
+                return
+            
+            (candidates, error) = result
+            if error:
+                status = "Search failed: {}".format(error)
+            elif not candidates:
+                status = "No layout fits - decrease the bit diameter, the minimum pin width or the pin width step."
+            else:
+                status = "Found {} layouts - pick one to apply it.".format(len(candidates))
+            show_layout_candidates(self.command.commandInputs, candidates, status)
+        except:
+            if ui:
+                ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
+        
+        
+class DovetailsCommandDestroyHandler(adsk.core.CommandEventHandler):
+    def __init__(self, preview, optimizer, registry):
+        super().__init__()
+        self.preview = preview
+        self.optimizer = optimizer
+        self.registry = registry
+        
+    def notify(self, args):
+        ui = None
+        try:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            self.preview.clear()
+            self.optimizer.cancel()
+            
+            # release all the handlers of this command invocation including this one
+            self.registry.release()
+            command_handlers.discard(self.registry)
+        except:
+            if ui:
+                ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
+        
+        
+def get_selected_entities(selection_input, cast):
+    selection_input = adsk.core.SelectionCommandInput.cast(selection_input)
+    return [cast(selection_input.selection(i).entity) for i in range(selection_input.selectionCount)]
     
-    return v.asPoint()
-
     
 def debug_draw_line(sketch, origin, vector, add = True):
 
@@ -223,25 +596,243 @@ def debug_draw_line(sketch, origin, vector, add = True):
     return line
 
     
-def new_rotation_matrix(angle, axis, origin = adsk.core.Point3D.create(0, 0, 0)):
-    m = adsk.core.Matrix3D.create()
-    m.setToRotation(angle, axis, origin)
-    return m
-    
-    
-def find_profile_for_line(curve):
-    curve = adsk.fusion.SketchCurve.cast(curve)
-    for profile in curve.parentSketch.profiles:
-        for profile_loop in profile.profileLoops:
-            for profile_loop_curve in profile_loop.profileCurves:
-                if profile_loop_curve.sketchEntity == curve:
-                    return profile
-    return None
- 
-   
+def create_fast_dovetails(design, face, edge, layout, thickness, transaction, trace=NULL_TRACE, pins=False):
+    # builds non-parametric dovetails directly from the layout numbers (in internal units)
+    # and joins them to the face body with a single feature, returns the created features.
+    # With pins the same tails are placed inward from the edge and cut from the body as the pin sockets.
+    trace.stage("frame")
+    component = face.body.parentComponent
+    target_body = face.body
+    frame = model_frame(face, edge, inward=pins)
+    
+    trace.stage("brep")
+    tails_body = create_tails_body(frame, layout, thickness)
+    
+    trace.stage("base_feature")
+    if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        base_feature = component.features.baseFeatures.add()
+        base_feature.startEdit()
+        component.bRepBodies.add(tails_body, base_feature)
+        base_feature.finishEdit()
+        body = base_feature.bodies.item(0)
+        features = [base_feature]
+    else:
+        # direct designs have no timeline - the body is removed on rollback, but the combine can't be undone
+        body = transaction.track(component.bRepBodies.add(tails_body))
+        features = []
+        
+    trace.stage("combine")
+    tools = adsk.core.ObjectCollection.create()
+    tools.add(body)
+    combine_input = component.features.combineFeatures.createInput(target_body, tools)
+    if pins:
+        combine_input.operation = adsk.fusion.FeatureOperations.CutFeatureOperation
+    else:
+        combine_input.operation = adsk.fusion.FeatureOperations.JoinFeatureOperation
+    features.append(component.features.combineFeatures.add(combine_input))
+    return features
+    
+    
+def draw_full_tail(sketch, projected_edge, frame, x, tail, spread, height, offset_expression, params):
+    # draws constrained full tail which base starts at offset_expression distance from the edge start
+    # and returns the top line of the tail which belongs only to the tail profile
+    lines = sketch.sketchCurves.sketchLines
+    
+    line1 = lines.addByTwoPoints(frame.point(x, 0), frame.point(x - spread, height))
+    sketch.geometricConstraints.addCoincident(line1.startSketchPoint, projected_edge)
+    d = sketch.sketchDimensions.addDistanceDimension(projected_edge.startSketchPoint, line1.startSketchPoint,
+                                                     adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
+                                                     frame.point(x / 2, -height))
+    d.parameter.expression = offset_expression
+    d = sketch.sketchDimensions.addAngularDimension(projected_edge, line1, frame.point(x - spread - tail / 4, height / 2))
+    d.parameter.expression = "90 deg - {}".format(params.angle.name)
+    
+    line2 = lines.addByTwoPoints(line1.endSketchPoint, frame.point(x + tail + spread, height))
+    d = sketch.sketchDimensions.addOffsetDimension(line2, projected_edge, frame.point(x + tail / 2, height / 2))
+    d.parameter.expression = params.height.name
+    
+    line3 = lines.addByTwoPoints(line2.endSketchPoint, frame.point(x + tail, 0))
+    sketch.geometricConstraints.addCoincident(line3.endSketchPoint, projected_edge)
+    d = sketch.sketchDimensions.addAngularDimension(line3, projected_edge, frame.point(x + tail + spread + tail / 4, height / 2))
+    d.parameter.expression = "90 deg - {}".format(params.angle.name)
+    
+    line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
+    d = sketch.sketchDimensions.addDistanceDimension(line4.startSketchPoint, line4.endSketchPoint,
+                                                     adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
+                                                     frame.point(x + tail / 2, -height / 2))
+    d.parameter.expression = params.tail.name
+    
+    return line2
+    
+    
+def draw_half_tail(sketch, projected_edge, frame, at_start, tail, spread, height, params):
+    # draws constrained half tail at the start or at the end of the edge
+    # and returns the top line of the tail which belongs only to the tail profile
+    lines = sketch.sketchCurves.sketchLines
+    
+    if at_start:
+        x0 = 0
+        direction = 1
+        edge_point = projected_edge.startSketchPoint
+    else:
+        x0 = frame.length
+        direction = -1
+        edge_point = projected_edge.endSketchPoint
+    x1 = x0 + direction * tail / 2
+    
+    line1 = lines.addByTwoPoints(frame.point(x0, 0), frame.point(x1, 0))
+    sketch.geometricConstraints.addCoincident(line1.startSketchPoint, edge_point)
+    sketch.geometricConstraints.addCoincident(line1.endSketchPoint, projected_edge)
+    d = sketch.sketchDimensions.addDistanceDimension(line1.startSketchPoint, line1.endSketchPoint,
+                                                     adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
+                                                     frame.point((x0 + x1) / 2, -height / 2))
+    d.parameter.expression = "{} / 2".format(params.tail.name)
+    
+    line2 = lines.addByTwoPoints(line1.endSketchPoint, frame.point(x1 + direction * spread, height))
+    d = sketch.sketchDimensions.addAngularDimension(projected_edge, line2, frame.point(x1 + direction * (spread + tail / 4), height / 2))
+    d.parameter.expression = "90 deg - {}".format(params.angle.name)
+    
+    line3 = lines.addByTwoPoints(line2.endSketchPoint, frame.point(x0, height))
+    d = sketch.sketchDimensions.addOffsetDimension(line3, projected_edge, frame.point((x0 + x1) / 2, height / 2))
+    d.parameter.expression = params.height.name
+    
+    line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
+    sketch.geometricConstraints.addPerpendicular(line4, projected_edge)
+    
+    return line3
+    
+    
+def create_dovetails(face, edge, start_type, generation_mode, params, sketch_name, trace=NULL_TRACE, pins=False):
+    # creates the sketch and features of the dovetails on one face/edge pair and returns them in the creation order.
+    # With pins the same tails are drawn inward from the edge and cut into the face as the pin sockets.
+    angle_param = params.angle
+    height_param = params.height
+    thickness_param = params.thickness
+    pin_param = params.pin
+    count_param = params.count
+    tail_param = params.tail
+    
+    trace.stage("sketch")
+    component = face.body.parentComponent
+    if pins:
+        # without the face edges every socket is a profile of its own bounded by its top line
+        # same as the tails outside the face
+        sketch = adsk.fusion.Sketch.cast(component.sketches.addWithoutEdges(face))
+        operation = adsk.fusion.FeatureOperations.CutFeatureOperation
+    else:
+        sketch = adsk.fusion.Sketch.cast(component.sketches.add(face))
+        operation = adsk.fusion.FeatureOperations.JoinFeatureOperation
+    sketch.name = sketch_name
+    
+    trace.stage("project")
+    projected_edge = adsk.fusion.SketchLine.cast(sketch.project(edge)[0])
+    
+    trace.stage("frame")
+    frame = sketch_frame(sketch, face, edge, projected_edge, inward=pins)
+    
+    trace.stage("constraints")
+    # initial positions of the sketch lines - the sketch solver moves them into place
+    # but starting close to the solution keeps the solve fast and predictable
+    tail = tail_param.value
+    pin = pin_param.value
+    height = height_param.value
+    spread = height * math.tan(angle_param.value)
+    offset = first_tail_offset(start_type, tail, pin)
+    offset_expression = first_tail_offset_expression(start_type, tail_param.name, pin_param.name)
+    
+    half_tail_profile_lines = []
+    if start_type == DovetailStartType.HalfTail:
+        half_tail_profile_lines.append(draw_half_tail(sketch, projected_edge, frame, True, tail, spread, height, params))
+        half_tail_profile_lines.append(draw_half_tail(sketch, projected_edge, frame, False, tail, spread, height, params))
+    
+    if generation_mode == DovetailGenerationMode.SingleExtrude:
+        # all the tails are drawn in the sketch so their number is fixed at creation time
+        tails_count = int(round(count_param.value))
+    else:
+        # one tail is drawn and multiplied by the pattern
+        tails_count = 1
+        
+    tail_profile_lines = []
+    for i in range(tails_count):
+        if i == 0:
+            tail_offset_expression = offset_expression
+        else:
+            tail_offset_expression = "{} + {} * ({} + {})".format(offset_expression, i, tail_param.name, pin_param.name)
+        tail_profile_lines.append(draw_full_tail(sketch, projected_edge, frame,
+                                                 offset + i * (tail + pin), tail, spread, height, tail_offset_expression, params))
+    
+    trace.stage("profiles")
+    # all the profiles are found in one walk over the sketch profiles - the single extrude needs the profiles
+    # of all the tails, the pattern only the first tail and the half tails
+    if generation_mode == DovetailGenerationMode.SingleExtrude:
+        profile_lines = half_tail_profile_lines + tail_profile_lines
+    else:
+        profile_lines = half_tail_profile_lines + tail_profile_lines[:1]
+    found_profiles = find_profiles(sketch, profile_lines)
+    if None in found_profiles:
+        raise ValueError("Unable to find the profile of the tail in the sketch \"{}\"".format(sketch_name))
+    half_tails_found = found_profiles[:len(half_tail_profile_lines)]
+    thickness_expression = "-1 * {}".format(thickness_param.name)
+    
+    if generation_mode == DovetailGenerationMode.SingleExtrude:
+        # extrude all the tails with one feature
+        profiles = adsk.core.ObjectCollection.create()
+        for profile in found_profiles:
+            profiles.add(profile)
+        
+        trace.stage("extrude")
+        extruded_dovetails = component.features.extrudeFeatures.addSimple(
+            profiles,
+            adsk.core.ValueInput.createByString(thickness_expression),
+            operation)
+        return [sketch, extruded_dovetails]
+        
+    # extrude dovetail
+    tail_profile = found_profiles[-1]
+    
+    trace.stage("extrude")
+    extruded_dovetail = component.features.extrudeFeatures.addSimple(
+        tail_profile,
+        adsk.core.ValueInput.createByString(thickness_expression),
+        operation)
+    
+    # multiply dovetails with rectangular pattern
+    trace.stage("pattern")
+    objects = adsk.core.ObjectCollection.create()
+    objects.add(extruded_dovetail)
+    
+    pattern_spacing_expression = "{} + {}".format(tail_param.name, pin_param.name)
+    
+    pattern_input = component.features.rectangularPatternFeatures.createInput(
+        objects,
+        edge,
+        adsk.core.ValueInput.createByString(count_param.name),
+        adsk.core.ValueInput.createByString(pattern_spacing_expression),
+        adsk.fusion.PatternDistanceType.SpacingPatternDistanceType)
+
+    pattern_input.setDirectionTwo(None, adsk.core.ValueInput.createByString("1"), adsk.core.ValueInput.createByString("0"))
+    pattern_feature = component.features.rectangularPatternFeatures.add(pattern_input)
+    entities = [sketch, extruded_dovetail, pattern_feature]
+    
+    # extrude half tails
+    if half_tail_profile_lines:
+        trace.stage("half_tails_extrude")
+        half_tails_profiles = adsk.core.ObjectCollection.create()
+        for profile in half_tails_found:
+            half_tails_profiles.add(profile)
+            
+        entities.append(component.features.extrudeFeatures.addSimple(
+            half_tails_profiles,
+            adsk.core.ValueInput.createByString(thickness_expression),
+            operation))
+        
+    return entities
+    
+    
 class DovetailsCommandExecuteEventHandler(adsk.core.CommandEventHandler):
-    def __init__(self):
+    def __init__(self, preview):
         super().__init__()
+        self.preview = preview
         
     def notify(self, args):
         ui = None
@@ -251,9 +842,17 @@ class DovetailsCommandExecuteEventHandler(adsk.core.CommandEventHandler):
             design = adsk.fusion.Design.cast(app.activeProduct)
             command = adsk.core.Command.cast(args.command)
             inputs = command.commandInputs
+            self.preview.clear()
+            remember_inputs(inputs)
     
-            face = adsk.fusion.BRepFace.cast(inputs.itemById("face").selection(0).entity)
-            edge = adsk.fusion.BRepEdge.cast(inputs.itemById("edge").selection(0).entity)
+            faces = get_selected_entities(inputs.itemById("face"), adsk.fusion.BRepFace.cast)
+            edges = get_selected_entities(inputs.itemById("edge"), adsk.fusion.BRepEdge.cast)
+            if len(faces) != len(edges):
+                raise ValueError("Select an edge for every selected face ({} faces and {} edges selected)".format(len(faces), len(edges)))
+            pins_faces = get_selected_entities(inputs.itemById("pins_face"), adsk.fusion.BRepFace.cast)
+            pins_edges = get_selected_entities(inputs.itemById("pins_edge"), adsk.fusion.BRepEdge.cast)
+            if len(pins_faces) != len(pins_edges):
+                raise ValueError("Select an edge for every selected pins face ({} faces and {} edges selected)".format(len(pins_faces), len(pins_edges)))
             edge_length_input = adsk.core.ValueCommandInput.cast(inputs.itemById("edge_length"))
             angle_input = adsk.core.ValueCommandInput.cast(inputs.itemById("angle"))
             height_input = adsk.core.ValueCommandInput.cast(inputs.itemById("height"))
@@ -261,264 +860,103 @@ class DovetailsCommandExecuteEventHandler(adsk.core.CommandEventHandler):
             ratio_input = adsk.core.ValueCommandInput.cast(inputs.itemById("ratio"))
             pin_input = adsk.core.ValueCommandInput.cast(inputs.itemById("pin"))
             start_type = DovetailStartType(adsk.core.DropDownCommandInput.cast(inputs.itemById("start_type")).selectedItem.name)
+            generation_mode = DovetailGenerationMode(adsk.core.DropDownCommandInput.cast(inputs.itemById("generation_mode")).selectedItem.name)
             params_prefix = adsk.core.StringValueCommandInput.cast(inputs.itemById("params_prefix")).value
             
-            angle_param = add_parameter_if_not_exists(design, params_prefix, "angle",
-                                                      angle_input.expression,
-                                                      angle_input.unitType,
-                                                      "Dovetails angle")
-            height_param = add_parameter_if_not_exists(design, params_prefix, "height",
-                                                       height_input.expression,
-                                                       height_input.unitType,
-                                                       "Dovetails height")
-            thickness_param = add_parameter_if_not_exists(design, params_prefix, "thickness",
-                                                          thickness_input.expression,
-                                                          thickness_input.unitType,
-                                                          "Dovetails thickness")
-            edge_length_param = add_parameter_if_not_exists(design, params_prefix, "edge_length",
-                                                            edge_length_input.expression,
-                                                            edge_length_input.unitType,
-                                                            "Dovetails edge length")
-            pin_param = add_parameter_if_not_exists(design, params_prefix, "pin",
-                                                    pin_input.expression,
-                                                    pin_input.unitType,
-                                                    "Dovetails maximum pin width")
-            ratio_param = add_parameter_if_not_exists(design, params_prefix, "ratio",
-                                                      ratio_input.expression,
-                                                      ratio_input.unitType,
-                                                      "Dovetails tails to pin approximate ratio")
-                                                    
-            if start_type == DovetailStartType.FullPin:
-                count_param_expression = "round (({} - {}) / ({} * (1 + {})))".format(edge_length_param.name, pin_param.name, pin_param.name, ratio_param.name)
-            elif start_type == DovetailStartType.HalfPin:
-                count_param_expression = "round ({} / ({} * (1 + {})))".format(edge_length_param.name, pin_param.name, ratio_param.name)
-            elif start_type == DovetailStartType.HalfTail:
-                count_param_expression = "round ({} / ({} * (1 + {})) - 1)".format(edge_length_param.name, pin_param.name, ratio_param.name)
-            else:
-                raise ValueError("Not supported start type: {}".format(start_type))
-                
-            count_param = add_parameter_if_not_exists(design, params_prefix, "count",
-                                                      count_param_expression,
-                                                      "",
-                                                      "Number of the dovetails")
-                                                      
-            if count_param.value <= 0:
-                raise ValueError("Not applicable parameters specified - dovetails count expression resulted in invalid number {}".format(count_param.value))
-                
-            # calculate resulted tails width after number of tails has been calculated
-            if start_type == DovetailStartType.FullPin:
-                tail_param_expression = "({} - {} * ({} + 1)) / {}".format(edge_length_param.name, pin_param.name, count_param.name, count_param.name)
-            elif start_type == DovetailStartType.HalfPin:
-                tail_param_expression = "({} - {} * {}) / {}".format(edge_length_param.name, pin_param.name, count_param.name, count_param.name)
-            elif start_type == DovetailStartType.HalfTail:
-                tail_param_expression = "{} / ({} + 1) - {}".format(edge_length_param.name, count_param.name, pin_param.name)
-            else:
-                raise ValueError("Not supported start type: {}".format(start_type))
-                
-            tail_param = add_parameter_if_not_exists(design, params_prefix, "tail",
-                                                     tail_param_expression,
-                                                     pin_input.unitType,
-                                                     "Dovetails tails minimal width")
-                                                  
-            component = face.body.parentComponent
-            sketch = adsk.fusion.Sketch.cast(component.sketches.add(face))
-            sketch.name = params_prefix + "sketch"
-            projected_edge = adsk.fusion.SketchLine.cast(sketch.project(edge)[0])
-            
-            v_start = projected_edge.startSketchPoint.geometry.asVector()
-            v_end = projected_edge.endSketchPoint.geometry.asVector()
-            
-            v_edge = v_end.copy()
-            v_edge.subtract(v_start)
-            
-            face_center_in_sketch = sketch.modelToSketchSpace(face.centroid)
-            
-            (res, face_normal) = face.evaluator.getNormalAtPoint(face.centroid)
-            if not res:
-                raise ValueError("Unable to get face normal")
-                
-            face_normal.add(face.centroid.asVector())
-            face_normal = sketch.modelToSketchSpace(face_normal.asPoint()).asVector()
-            face_normal.subtract(face_center_in_sketch.asVector())
-            
-            v_to_face_center = face_center_in_sketch.asVector()
-            v_to_face_center.subtract(v_start)
-            
-            origin = v_start.asPoint()
-                        
-            v_outside = v_edge.crossProduct(face_normal)
-            if v_outside.angleTo(v_to_face_center) < math.pi / 2:
-                v_outside.transformBy(new_rotation_matrix(math.pi, v_edge, origin))
-
-            #debug_draw_line(sketch, origin, face_center_in_sketch)
-            #debug_draw_line(sketch, origin, v_edge)
-            #debug_draw_line(sketch, origin, v_outside)
-            #debug_draw_line(sketch, origin, face_normal)
-
-            transform = adsk.core.Matrix3D.create()
-            transform.transformBy(new_rotation_matrix(adsk.core.Vector3D.create(0, 1, 0).angleTo(v_outside), adsk.core.Vector3D.create(0, 0, 1)))
-            transform.transformBy(new_rotation_matrix(adsk.core.Vector3D.create(1, 0, 0).angleTo(v_edge), adsk.core.Vector3D.create(0, 0, 1)))
-            
-            x_axis = v_edge
-            y_axis = v_outside
-            #sketch.sketchCurves.sketchLines.addByTwoPoints(new_point(0, 0, origin, x_axis, y_axis), new_point(1, 0, origin, x_axis, y_axis))
-            #sketch.sketchCurves.sketchLines.addByTwoPoints(new_point(0, 0, origin, x_axis, y_axis), new_point(0, 2, origin, x_axis, y_axis))
-            
-            # draw one dovetail sketch
-            lines = sketch.sketchCurves.sketchLines
-            half_tails_profiles = None
-            
-            if start_type == DovetailStartType.HalfTail:
-                # starting half tail
-                line1 = lines.addByTwoPoints(new_point(0, 0, origin, x_axis, y_axis), new_point(1, 0, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line1.startSketchPoint, projected_edge.startSketchPoint)
-                sketch.geometricConstraints.addCoincident(line1.endSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addDistanceDimension(line1.startSketchPoint, line1.endSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(0.5, -0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "{} / 2".format(tail_param.name)
-                
-                line2 = lines.addByTwoPoints(line1.endSketchPoint, new_point(1.5, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addAngularDimension(projected_edge, line2, new_point(1.5, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
-                
-                line3 = lines.addByTwoPoints(line2.endSketchPoint, new_point(0, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addOffsetDimension(line3, projected_edge, new_point(0.5, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = height_param.name
-                starting_half_tail_profile_line = line3
-                
-                line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
-                sketch.geometricConstraints.addPerpendicular(line4, projected_edge)
-                
-                # ending half tail
-                line1 = lines.addByTwoPoints(new_point(5, 0, origin, x_axis, y_axis), new_point(4, 0, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line1.startSketchPoint, projected_edge.endSketchPoint)
-                sketch.geometricConstraints.addCoincident(line1.endSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addDistanceDimension(line1.startSketchPoint, line1.endSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(4.5, -0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "{} / 2".format(tail_param.name)
-                
-                line2 = lines.addByTwoPoints(line1.endSketchPoint, new_point(3.5, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addAngularDimension(projected_edge, line2, new_point(3, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
-                
-                line3 = lines.addByTwoPoints(line2.endSketchPoint, new_point(5, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addOffsetDimension(line3, projected_edge, new_point(4.5, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = height_param.name
-                ending_half_tail_profile_line = line3
-                
-                line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
-                sketch.geometricConstraints.addPerpendicular(line4, projected_edge)
-                
-                # full tail
-                line1 = lines.addByTwoPoints(new_point(2.5, 0, origin, x_axis, y_axis), new_point(2, 1, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line1.startSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addDistanceDimension(projected_edge.startSketchPoint, line1.startSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(1.5, -1, origin, x_axis, y_axis))
-                d.parameter.expression = "{} / 2 + {}".format(tail_param.name, pin_param.name)
-                d = sketch.sketchDimensions.addAngularDimension(projected_edge, line1, new_point(1.5, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
-                
-                line2 = lines.addByTwoPoints(line1.endSketchPoint, new_point(3.5, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addOffsetDimension(line2, projected_edge, new_point(3, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = height_param.name
-                full_tail_profile_line = line2
-                
-                line3 = lines.addByTwoPoints(line2.endSketchPoint, new_point(3, 0, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line3.endSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addAngularDimension(line3, projected_edge, new_point(4, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
-                
-                line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
-                d = sketch.sketchDimensions.addDistanceDimension(line4.startSketchPoint, line4.endSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(3, -0.5, origin, x_axis, y_axis))
-                d.parameter.expression = tail_param.name
-                
-                half_tails_profiles = adsk.core.ObjectCollection.create()
-                half_tails_profiles.add(find_profile_for_line(starting_half_tail_profile_line))
-                half_tails_profiles.add(find_profile_for_line(ending_half_tail_profile_line))
-            else:
-                line1 = lines.addByTwoPoints(new_point(1, 0, origin, x_axis, y_axis), new_point(0.5, 1, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line1.startSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addDistanceDimension(projected_edge.startSketchPoint, line1.startSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(0.5, -0.5, origin, x_axis, y_axis))
-
-                if start_type == DovetailStartType.HalfPin:
-                    d.parameter.expression = "{} / 2".format(pin_param.name)
-                elif start_type == DovetailStartType.FullPin:
-                    d.parameter.expression = pin_param.name
-                else:
-                    raise ValueError("Not supported start type: {}".format(start_type))
-                
-                d = sketch.sketchDimensions.addAngularDimension(projected_edge, line1, new_point(0, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
-                
-                line2 = lines.addByTwoPoints(line1.endSketchPoint, new_point(2.5, 1, origin, x_axis, y_axis))
-                d = sketch.sketchDimensions.addOffsetDimension(line2, projected_edge, new_point(1.5, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = height_param.name
-                full_tail_profile_line = line2
+            # expressions in the order of the parameters functions arguments: angle, height, thickness, edge_length, pin, ratio
+            expressions = [x.expression for x in (angle_input, height_input, thickness_input, edge_length_input, pin_input, ratio_input)]
+            
+            # without selected faces the existing joint with the prefix is updated
+            existing = DovetailsJoint.load(design, ATTRIBUTES_GROUP, params_prefix)
+            is_update = not faces and not pins_faces
+            if is_update and not existing:
+                raise ValueError("Select faces and edges where dovetails will be placed or specify the parameters prefix of the existing dovetails to update them")
+            if is_update and design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+                raise ValueError("Dovetails can be updated only in parametric designs")
+            
+            trace = NULL_TRACE
+            if adsk.core.BoolValueCommandInput.cast(inputs.itemById("trace")).value:
+                pairs_count = len(existing.record[TAILS]) + len(existing.record[PINS]) if is_update else len(faces) + len(pins_faces)
+                trace = Trace("update" if is_update else "execute",
+                              count_api_calls=adsk.core.BoolValueCommandInput.cast(inputs.itemById("trace_api_calls")).value,
+                              generation_mode=generation_mode.value, start_type=start_type.value, pairs=pairs_count,
+                              design=design.parentDocument.name)
+            
+            with trace:
+                # everything is checked before anything is created in the design
+                trace.stage("validate")
+                layout = validate_dovetails_expressions(design, start_type, *expressions)
+                joint = DovetailsJoint(ATTRIBUTES_GROUP, joint_record(params_prefix, start_type, generation_mode, layout.count, *expressions))
+                pairs = list(zip(faces, edges))
+                pins_pairs = list(zip(pins_faces, pins_edges))
                 
-                line3 = lines.addByTwoPoints(line2.endSketchPoint, new_point(2, 0, origin, x_axis, y_axis))
-                sketch.geometricConstraints.addCoincident(line3.endSketchPoint, projected_edge)
-                d = sketch.sketchDimensions.addAngularDimension(line3, projected_edge, new_point(3, 0.5, origin, x_axis, y_axis))
-                d.parameter.expression = "90 deg - {}".format(angle_param.name)
+                # all the parameters, sketches and features are created in one transaction - the timeline is recomputed
+                # once for the whole batch, the result is grouped in the timeline and nothing is left behind on error
+                transaction = DesignTransaction(design, "{} ({})".format(ADDIN_NAME, params_prefix))
+                follows_parameters = generation_mode != DovetailGenerationMode.FastSolid
+                follows_count = generation_mode == DovetailGenerationMode.Pattern
+                if is_update:
+                    if not existing.changes(joint):
+                        return
+                    if existing.needs_rebuild(joint, follows_parameters, follows_count):
+                        # geometry is replaced before the compute is deferred so the original faces and edges are restored,
+                        # the old one is deleted only when the new one has been created
+                        trace.stage("remove")
+                        (pairs, pins_pairs) = existing.replace_geometry(design, transaction)
+                    else:
+                        # the parameters update is enough
+                        joint.keep_pairs(existing)
+                elif existing:
+                    # new faces are added to the existing joint with the same prefix only with the same inputs -
+                    # its record and user parameters describe all the pairs, the inputs are changed by the update
+                    if existing.changes(joint):
+                        raise ValueError(
+                            "Dovetails with the parameters prefix \"{}\" already exist with other inputs ({}).\n"
+                            "Add the faces with the same inputs, update the existing dovetails first or use another prefix.".format(
+                                params_prefix, ", ".join(existing.changes(joint))))
+                    joint.keep_pairs(existing)
                 
-                line4 = lines.addByTwoPoints(line3.endSketchPoint, line1.startSketchPoint)
-                d = sketch.sketchDimensions.addDistanceDimension(line4.startSketchPoint, line4.endSketchPoint,
-                                                                 adsk.fusion.DimensionOrientations.AlignedDimensionOrientation,
-                                                                 new_point(1.5, -0.5, origin, x_axis, y_axis))
-                d.parameter.expression = tail_param.name
-
-            # extrude dovetail
-            extruded_dovetail = component.features.extrudeFeatures.addSimple(
-                find_profile_for_line(full_tail_profile_line),
-                adsk.core.ValueInput.createByString("-1 * {}".format(thickness_param.name)),
-                adsk.fusion.FeatureOperations.JoinFeatureOperation)
-            
-            # multiply dovetails with rectangular pattern
-            objects = adsk.core.ObjectCollection.create()
-            objects.add(extruded_dovetail)
-            
-            pattern_spacing_expression = "{} + {}".format(tail_param.name, pin_param.name)
-            
-            pattern_input = component.features.rectangularPatternFeatures.createInput(
-                objects,
-                edge,
-                adsk.core.ValueInput.createByString(count_param.name),
-                adsk.core.ValueInput.createByString(pattern_spacing_expression),
-                adsk.fusion.PatternDistanceType.SpacingPatternDistanceType)
-
-            pattern_input.setDirectionTwo(None, adsk.core.ValueInput.createByString("1"), adsk.core.ValueInput.createByString("0"))
-            pattern_feature = component.features.rectangularPatternFeatures.add(pattern_input)
-            
-            # extrude half tails
-            if half_tails_profiles:
-                component.features.extrudeFeatures.addSimple(
-                    half_tails_profiles,
-                    adsk.core.ValueInput.createByString("-1 * {}".format(thickness_param.name)),
-                    adsk.fusion.FeatureOperations.JoinFeatureOperation)
-            
-#            if pattern_feature.patternElements.count > 1:
-#                face1 = adsk.fusion.BRepFace.cast(pattern_feature.patternElements[0].faces[0])
-#                face2 = adsk.fusion.BRepFace.cast(pattern_feature.patternElements[1].faces[0])
-#                
-#                v = edge.endVertex.geometry.asVector()
-#                v.subtract(edge.startVertex.geometry.asVector())
-#                
-#                v2 = face2.centroid.asVector()
-#                v2.subtract(face1.centroid.asVector())
-#                
-#                #ui.messageBox(str(math.degrees(v.angleTo(v2))))
-#                
-#                ui.selectEntity(face2)
+                with transaction:
+                    trace.stage("parameters")
+                    creates_parameters = (pairs or pins_pairs) and generation_mode != DovetailGenerationMode.FastSolid
+                    if is_update or creates_parameters:
+                        # the joint parameters are looked up once and shared by the update and the creation
+                        registry = ParameterRegistry(design, params_prefix, transaction.created)
+                    if is_update:
+                        update_joint_parameters(registry, dovetails_parameters_expressions(params_prefix, start_type, *expressions), transaction)
+                    if creates_parameters:
+                        params = add_dovetails_parameters(design, params_prefix, start_type, *expressions, registry=registry)
+                    
+                    # the pin sockets are the same tails cut inward from the pins edges - they share the layout
+                    # and the parameters with the tails, so the pins boards don't need any boolean with the tails bodies
+                    # Tokens of all the faces and edges are taken before any dovetails are created. The dovetails of one pair
+                    # change its body, which may also hold the next pairs (like both ends of a drawer front), so every pair
+                    # is refetched by its tokens right before its dovetails are created instead of using the selected objects.
+                    tokens = [(kind, sketch_prefix, face.entityToken, edge.entityToken)
+                              for (kind, kind_pairs, sketch_prefix) in ((TAILS, pairs, "sketch"), (PINS, pins_pairs, "pins_sketch"))
+                              for (face, edge) in kind_pairs]
+                    for (kind, sketch_prefix, face_token, edge_token) in tokens:
+                        faces_found = design.findEntityByToken(face_token)
+                        edges_found = design.findEntityByToken(edge_token)
+                        if not faces_found or not edges_found:
+                            raise ValueError("Selected face or edge doesn't exist anymore after creating the dovetails of the previous faces")
+                        face = adsk.fusion.BRepFace.cast(faces_found[0])
+                        edge = adsk.fusion.BRepEdge.cast(edges_found[0])
+                        if generation_mode == DovetailGenerationMode.FastSolid:
+                            entities = create_fast_dovetails(design, face, edge, layout, thickness_input.value, transaction, trace,
+                                                             pins=kind == PINS)
+                        else:
+                            index = len(joint.record[kind])
+                            sketch_name = params_prefix + sketch_prefix if index == 0 else "{}{}_{}".format(params_prefix, sketch_prefix, index + 1)
+                            entities = create_dovetails(face, edge, start_type, generation_mode, params, sketch_name, trace,
+                                                        pins=kind == PINS)
+                        joint.add_pair(face_token, edge_token, entities, kind)
+                    joint.save(design, transaction)
+                    
+                    # deferred recompute of the whole timeline happens when the transaction ends
+                    trace.stage("compute")
             
         except:
             if ui:
                 ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
-        
-        
-        
\ No newline at end of file
+
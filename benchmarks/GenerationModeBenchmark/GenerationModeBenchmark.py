@@ -0,0 +1,91 @@
+#Author-Michael Logutov
+#Description-Compares creation and recompute time of the dovetails generation modes
+
+# Select a face and an edge on it before running the script. For every generation mode and start type
+# the script creates dovetails, measures creation time and full design recompute time and then rolls
+# the timeline back and removes the created user parameters.
+
+import adsk.core, adsk.fusion, traceback, time, math, os, sys, importlib.util
+
+ADDIN_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ADDIN_PACKAGE = "DovetailsAddin"
+
+
+def load_addin():
+    # loads the add-in as a package the same way Fusion does so its relative imports work
+    spec = importlib.util.spec_from_file_location(ADDIN_PACKAGE, os.path.join(ADDIN_DIR, "Dovetails.py"),
+                                                  submodule_search_locations=[ADDIN_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(design, dovetails, face_token, edge_token, start_type, generation_mode):
+    # the add-in modules are loaded by load_addin() as the submodules of its package
+    from DovetailsAddin.dovetail_layout import solve_layout
+    from DovetailsAddin.dovetail_transaction import DesignTransaction
+    
+    # B-Rep entities are refetched by their tokens since rolling the timeline back recomputes the bodies
+    face = adsk.fusion.BRepFace.cast(design.findEntityByToken(face_token)[0])
+    edge = adsk.fusion.BRepEdge.cast(design.findEntityByToken(edge_token)[0])
+    timeline = design.timeline
+    marker = timeline.markerPosition
+    prefix = "benchmark_{}_{}_".format(generation_mode.name.lower(), start_type.name.lower())
+    
+    try:
+        # the creation runs in a transaction with the deferred compute as in the command
+        start = time.perf_counter()
+        with DesignTransaction(design, prefix) as transaction:
+            if generation_mode == dovetails.DovetailGenerationMode.FastSolid:
+                layout = solve_layout(start_type, edge.length, 1.1, 2, math.radians(7), 1)
+                dovetails.create_fast_dovetails(design, face, edge, layout, 1, transaction)
+            else:
+                params = dovetails.add_dovetails_parameters(design, prefix, start_type, "7 deg", "10 mm", "10 mm",
+                                                            "{} cm".format(edge.length), "11 mm", "2", created=transaction.created)
+                dovetails.create_dovetails(face, edge, start_type, generation_mode, params, prefix + "sketch")
+        created = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        design.computeAll()
+        recomputed = time.perf_counter() - start
+        
+        features = timeline.count - marker
+    finally:
+        timeline.markerPosition = marker
+        timeline.deleteAllAfterMarker()
+        for param in [p for p in design.userParameters if p.name.startswith(prefix)]:
+            param.deleteMe()
+        
+    return created, recomputed, features
+
+
+def run(context):
+    ui = None
+    try:
+        app = adsk.core.Application.get()
+        ui = app.userInterface
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        if not design or design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+            ui.messageBox("A parametric Fusion design must be active when running this script.")
+            return
+        
+        selections = [ui.activeSelections.item(i).entity for i in range(ui.activeSelections.count)]
+        faces = [adsk.fusion.BRepFace.cast(x) for x in selections if adsk.fusion.BRepFace.cast(x)]
+        edges = [adsk.fusion.BRepEdge.cast(x) for x in selections if adsk.fusion.BRepEdge.cast(x)]
+        if not faces or not edges:
+            ui.messageBox("Select a face and an edge on it before running the script.")
+            return
+        
+        dovetails = load_addin()
+        lines = ["{:<22} {:<10} {:>10} {:>12} {:>9}".format("Mode", "Start", "Create, s", "Recompute, s", "Timeline")]
+        for generation_mode in dovetails.DovetailGenerationMode:
+            for start_type in dovetails.DovetailStartType:
+                created, recomputed, features = measure(design, dovetails, faces[0].entityToken, edges[0].entityToken,
+                                                      start_type, generation_mode)
+                lines.append("{:<22} {:<10} {:>10.3f} {:>12.3f} {:>9}".format(generation_mode.value, start_type.name, created, recomputed, features))
+        
+        ui.messageBox("\n".join(lines))
+    except:
+        if ui:
+            ui.messageBox("Failed:\n{}".format(traceback.format_exc()))
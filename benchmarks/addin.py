@@ -0,0 +1,34 @@
+#Description-Loads the add-in against the adsk stand-in from this directory.
+
+import importlib.util, os, sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDIN_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# the stand-in adsk package must win over a real one
+if sys.path[0] != BENCHMARKS_DIR:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+import adsk.core, adsk.fusion
+
+
+def load_addin(name="Dovetails"):
+    # loads the add-in as a package the same way Fusion does so its relative imports work
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ADDIN_DIR, "Dovetails.py"),
+                                                  submodule_search_locations=[ADDIN_DIR])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def start_addin(design=None):
+    # starts a fresh stand-in application with the add-in running and returns (addin, app)
+    adsk.core.Application.reset()
+    app = adsk.core.Application.get()
+    app.activeProduct = design if design is not None else adsk.fusion.Design()
+    addin = load_addin()
+    addin.run(None)
+    return addin, app
@@ -0,0 +1,2 @@
+# Stand-in for the Fusion 360 python API (adsk package) so the add-in can be loaded and driven
+# outside of Fusion. Only the parts used by the add-in are implemented.
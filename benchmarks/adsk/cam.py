@@ -0,0 +1 @@
+# Stand-in for adsk.cam - the add-in imports it but doesn't use it
@@ -0,0 +1,889 @@
+# Stand-in for adsk.core
+
+import collections, math, queue, sys, threading, time
+
+
+class ApiRecorder:
+    # Counts the calls into the stand-in made from outside of the adsk package - every property read or write
+    # and every method lookup on an API object is one round-trip to Fusion core in the real API.
+    # Optionally burns the specified latency per call to simulate the cost of the round-trip.
+    # Recording is off by default so building the fixtures costs nothing.
+
+    def __init__(self):
+        self.enabled = False
+        self.latency = 0
+        self.calls = 0
+        self.by_name = collections.Counter()
+
+    def start(self, latency=0):
+        self.latency = latency
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def reset(self):
+        self.calls = 0
+        self.by_name = collections.Counter()
+
+    def record(self, owner, name):
+        self.calls += 1
+        self.by_name[owner + "." + name] += 1
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+
+recorder = ApiRecorder()
+
+
+def _is_external_call():
+    # frame 0 is this function, 1 is the recording hook, 2 is the code accessing the API object
+    return not sys._getframe(2).f_globals.get("__name__", "").startswith("adsk")
+
+
+class _ApiType(type):
+    # records the static API calls like Point3D.create() and ValueInput.createByString()
+    def __getattribute__(cls, name):
+        if recorder.enabled and name[0] != "_" and _is_external_call():
+            recorder.record(type.__getattribute__(cls, "__name__"), name)
+        return type.__getattribute__(cls, name)
+
+
+class Base(metaclass=_ApiType):
+    def __getattribute__(self, name):
+        if recorder.enabled and name[0] != "_" and _is_external_call():
+            recorder.record(type(self).__name__, name)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if recorder.enabled and name[0] != "_" and _is_external_call():
+            recorder.record(type(self).__name__, name)
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @property
+    def isValid(self):
+        return True
+
+
+# geometry
+
+
+class Point3D(Base):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def asVector(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+    def distanceTo(self, other):
+        return math.sqrt((self.x - other.x) ** 2 + (self.y - other.y) ** 2 + (self.z - other.z) ** 2)
+
+    def isEqualTo(self, other):
+        return self.distanceTo(other) < 1e-10
+
+    def translateBy(self, vector):
+        self.x += vector.x
+        self.y += vector.y
+        self.z += vector.z
+        return True
+
+    def transformBy(self, matrix):
+        (self.x, self.y, self.z) = matrix._apply(self.x, self.y, self.z, 1)
+        return True
+
+    def vectorTo(self, other):
+        return Vector3D(other.x - self.x, other.y - self.y, other.z - self.z)
+
+
+class Vector3D(Base):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+    def copy(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    def asPoint(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+    @property
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalize(self):
+        length = self.length
+        if length == 0:
+            return False
+        self.x /= length
+        self.y /= length
+        self.z /= length
+        return True
+
+    def scaleBy(self, scale):
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return True
+
+    def add(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return True
+
+    def subtract(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return True
+
+    def dotProduct(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def crossProduct(self, other):
+        return Vector3D(self.y * other.z - self.z * other.y,
+                        self.z * other.x - self.x * other.z,
+                        self.x * other.y - self.y * other.x)
+
+    def angleTo(self, other):
+        lengths = self.length * other.length
+        if lengths == 0:
+            return 0.0
+        return math.acos(max(-1.0, min(1.0, self.dotProduct(other) / lengths)))
+
+    def isParallelTo(self, other):
+        return self.crossProduct(other).length < 1e-10
+
+    def isEqualTo(self, other):
+        return abs(self.x - other.x) < 1e-10 and abs(self.y - other.y) < 1e-10 and abs(self.z - other.z) < 1e-10
+
+    def transformBy(self, matrix):
+        (self.x, self.y, self.z) = matrix._apply(self.x, self.y, self.z, 0)
+        return True
+
+
+class Matrix3D(Base):
+    def __init__(self):
+        self._m = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+    @staticmethod
+    def create():
+        return Matrix3D()
+
+    def copy(self):
+        m = Matrix3D()
+        m._m = [row[:] for row in self._m]
+        return m
+
+    def getCell(self, row, column):
+        return self._m[row][column]
+
+    def setCell(self, row, column, value):
+        self._m[row][column] = value
+        return True
+
+    def _apply(self, x, y, z, w):
+        m = self._m
+        return (m[0][0] * x + m[0][1] * y + m[0][2] * z + m[0][3] * w,
+                m[1][0] * x + m[1][1] * y + m[1][2] * z + m[1][3] * w,
+                m[2][0] * x + m[2][1] * y + m[2][2] * z + m[2][3] * w)
+
+    def transformBy(self, matrix):
+        # this = matrix * this
+        a = matrix._m
+        b = self._m
+        self._m = [[sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+        return True
+
+    def invert(self):
+        # rigid transforms only - rotation is transposed, translation is rotated back
+        r = [[self._m[j][i] for j in range(3)] for i in range(3)]
+        t = [self._m[i][3] for i in range(3)]
+        m = [[r[i][0], r[i][1], r[i][2], -(r[i][0] * t[0] + r[i][1] * t[1] + r[i][2] * t[2])] for i in range(3)]
+        self._m = m + [[0.0, 0.0, 0.0, 1.0]]
+        return True
+
+    def setToIdentity(self):
+        self._m = Matrix3D()._m
+        return True
+
+    def setToRotation(self, angle, axis, origin):
+        u = axis.copy()
+        u.normalize()
+        c = math.cos(angle)
+        s = math.sin(angle)
+        t = 1 - c
+        x, y, z = u.x, u.y, u.z
+        r = [[t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+             [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+             [t * x * z - s * y, t * y * z + s * x, t * z * z + c]]
+        o = (origin.x, origin.y, origin.z)
+        self._m = [[r[i][0], r[i][1], r[i][2], o[i] - (r[i][0] * o[0] + r[i][1] * o[1] + r[i][2] * o[2])] for i in range(3)]
+        self._m.append([0.0, 0.0, 0.0, 1.0])
+        return True
+
+    def setWithCoordinateSystem(self, origin, x_axis, y_axis, z_axis):
+        self._m = [[x_axis.x, y_axis.x, z_axis.x, origin.x],
+                   [x_axis.y, y_axis.y, z_axis.y, origin.y],
+                   [x_axis.z, y_axis.z, z_axis.z, origin.z],
+                   [0.0, 0.0, 0.0, 1.0]]
+        return True
+
+    def asArray(self):
+        # row-major as in Fusion
+        return [value for row in self._m for value in row]
+
+
+class SurfaceTypes:
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+    ConeSurfaceType = 2
+    SphereSurfaceType = 3
+    TorusSurfaceType = 4
+    EllipticalCylinderSurfaceType = 5
+    EllipticalConeSurfaceType = 6
+    NurbsSurfaceType = 7
+
+
+class Surface(Base):
+    def __init__(self, surface_type):
+        self.surfaceType = surface_type
+
+
+class Plane(Surface):
+    def __init__(self, origin, normal):
+        super().__init__(SurfaceTypes.PlaneSurfaceType)
+        self.origin = origin
+        self.normal = normal
+
+    @staticmethod
+    def create(origin, normal):
+        return Plane(origin, normal)
+
+
+class OrientedBoundingBox3D(Base):
+    def __init__(self, center_point, length_direction, width_direction, length, width, height):
+        self.centerPoint = center_point
+        self.lengthDirection = length_direction
+        self.widthDirection = width_direction
+        self.length = length
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def create(center_point, length_direction, width_direction, length, width, height):
+        return OrientedBoundingBox3D(center_point, length_direction, width_direction, length, width, height)
+
+    @property
+    def heightDirection(self):
+        return self.lengthDirection.crossProduct(self.widthDirection)
+
+
+# events
+
+
+class Event(Base):
+    def __init__(self):
+        self.handlers = []
+
+    def add(self, handler):
+        self.handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            return True
+        return False
+
+    def fire(self, args):
+        for handler in list(self.handlers):
+            handler.notify(args)
+
+
+class EventHandler:
+    def notify(self, args):
+        pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class SelectionEventHandler(EventHandler):
+    pass
+
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+
+class CustomEventHandler(EventHandler):
+    pass
+
+
+class EventArgs(Base):
+    def __init__(self, firing_event=None):
+        self.firingEvent = firing_event
+
+
+class CommandCreatedEventArgs(EventArgs):
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+
+
+class CommandEventArgs(EventArgs):
+    def __init__(self, command):
+        super().__init__()
+        self.command = command
+        self.isValidResult = False
+        self.executeFailed = False
+
+
+class CustomEventArgs(EventArgs):
+    def __init__(self, additional_info=""):
+        super().__init__()
+        self.additionalInfo = additional_info
+
+
+class SelectionEventArgs(EventArgs):
+    def __init__(self, firing_event, active_input, selection):
+        super().__init__(firing_event)
+        self.activeInput = active_input
+        self.selection = selection
+        self.isSelectable = True
+
+
+class InputChangedEventArgs(EventArgs):
+    def __init__(self, firing_event, input):
+        super().__init__(firing_event)
+        self.input = input
+        self.inputs = firing_event.sender.commandInputs
+
+
+class FiringEvent:
+    def __init__(self, sender):
+        self.sender = sender
+
+
+# value inputs
+
+
+class ValueInput(Base):
+    def __init__(self, real_value=None, string_value=None):
+        self.realValue = real_value
+        self.stringValue = string_value
+
+    @staticmethod
+    def createByString(value):
+        return ValueInput(string_value=value)
+
+    @staticmethod
+    def createByReal(value):
+        return ValueInput(real_value=value)
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class ObjectCollection(Base):
+    def __init__(self):
+        self._items = []
+
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def item(self, index):
+        return self._items[index]
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+# command inputs
+
+
+class CommandInput(Base):
+    def __init__(self, inputs, id, name):
+        self.parentCommandInputs = inputs
+        self.id = id
+        self.name = name
+        self.tooltip = ""
+        self.isVisible = True
+        self.isEnabled = True
+        self.hasFocus = False
+
+
+class ImageCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, image_file):
+        super().__init__(inputs, id, name)
+        self.imageFile = image_file
+
+
+class Selection(Base):
+    def __init__(self, entity):
+        self.entity = entity
+
+
+class SelectionCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, prompt):
+        super().__init__(inputs, id, name)
+        self.prompt = prompt
+        self.filters = []
+        self.limits = (1, 1)
+        self._selections = []
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        self.limits = (minimum, maximum)
+        return True
+
+    def addSelectionFilter(self, filter):
+        self.filters.append(filter)
+        return True
+
+    def addSelection(self, entity):
+        self._selections.append(Selection(entity))
+        return True
+
+    def clearSelection(self):
+        self._selections = []
+        return True
+
+    def selection(self, index):
+        return self._selections[index]
+
+    @property
+    def selectionCount(self):
+        return len(self._selections)
+
+
+class ValueCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, unit_type, value):
+        super().__init__(inputs, id, name)
+        self.unitType = unit_type
+        self.expression = value.stringValue if value.stringValue is not None else str(value.realValue)
+
+    @property
+    def value(self):
+        return self.parentCommandInputs.command.parentUnitsManager().evaluateExpression(self.expression, self.unitType)
+
+    @property
+    def isValidExpression(self):
+        return self.parentCommandInputs.command.parentUnitsManager().isValidExpression(self.expression, self.unitType)
+
+
+class StringValueCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, value):
+        super().__init__(inputs, id, name)
+        self.value = value
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, is_check_box, resource_folder, value):
+        super().__init__(inputs, id, name)
+        self.isCheckBox = is_check_box
+        self.value = value
+
+
+class ListItem(Base):
+    def __init__(self, items, name, is_selected, icon):
+        self._items = items
+        self.name = name
+        self.icon = icon
+        self._is_selected = is_selected
+
+    @property
+    def index(self):
+        return self._items._items.index(self)
+
+    @property
+    def isSelected(self):
+        return self._is_selected
+
+    @isSelected.setter
+    def isSelected(self, value):
+        if value and self._items.single_selection:
+            for item in self._items:
+                item._is_selected = False
+        self._is_selected = value
+
+
+class ListItems(Base):
+    def __init__(self, single_selection):
+        self.single_selection = single_selection
+        self._items = []
+
+    def add(self, name, is_selected, icon="", before_index=-1):
+        item = ListItem(self, name, False, icon)
+        self._items.append(item)
+        item.isSelected = is_selected
+        return item
+
+    def item(self, index):
+        return self._items[index]
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items = []
+        return True
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, style):
+        super().__init__(inputs, id, name)
+        self.dropDownStyle = style
+        self.listItems = ListItems(style != DropDownStyles.CheckBoxDropDownStyle)
+
+    @property
+    def selectedItem(self):
+        for item in self.listItems:
+            if item.isSelected:
+                return item
+        return None
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, inputs, id, name, text, num_rows, is_read_only):
+        super().__init__(inputs, id, name)
+        self.formattedText = text
+        self.numRows = num_rows
+        self.isReadOnly = is_read_only
+
+
+class GroupCommandInput(CommandInput):
+    def __init__(self, inputs, id, name):
+        super().__init__(inputs, id, name)
+        self.isExpanded = True
+        self.children = CommandInputs(inputs.command)
+
+
+class CommandInputs(Base):
+    def __init__(self, command):
+        self.command = command
+        self._inputs = []
+
+    def _add(self, input):
+        self._inputs.append(input)
+        return input
+
+    def addImageCommandInput(self, id, name, image_file):
+        return self._add(ImageCommandInput(self, id, name, image_file))
+
+    def addSelectionInput(self, id, name, prompt):
+        return self._add(SelectionCommandInput(self, id, name, prompt))
+
+    def addValueInput(self, id, name, unit_type, value):
+        return self._add(ValueCommandInput(self, id, name, unit_type, value))
+
+    def addStringValueInput(self, id, name, value=""):
+        return self._add(StringValueCommandInput(self, id, name, value))
+
+    def addBoolValueInput(self, id, name, is_check_box, resource_folder="", value=False):
+        return self._add(BoolValueCommandInput(self, id, name, is_check_box, resource_folder, value))
+
+    def addDropDownCommandInput(self, id, name, style):
+        return self._add(DropDownCommandInput(self, id, name, style))
+
+    def addTextBoxCommandInput(self, id, name, text, num_rows, is_read_only):
+        return self._add(TextBoxCommandInput(self, id, name, text, num_rows, is_read_only))
+
+    def addGroupCommandInput(self, id, name):
+        return self._add(GroupCommandInput(self, id, name))
+
+    def itemById(self, id):
+        # Fusion finds the inputs of the groups too
+        for input in self._inputs:
+            if input.id == id:
+                return input
+            if isinstance(input, GroupCommandInput):
+                child = input.children.itemById(id)
+                if child is not None:
+                    return child
+        return None
+
+    def item(self, index):
+        return self._inputs[index]
+
+    @property
+    def count(self):
+        return len(self._inputs)
+
+    def __iter__(self):
+        return iter(list(self._inputs))
+
+
+# commands
+
+
+class Command(Base):
+    def __init__(self, parent_definition=None):
+        self.parentCommandDefinition = parent_definition
+        self.commandInputs = CommandInputs(self)
+        self.commandCreated = Event()
+        self.selectionEvent = Event()
+        self.inputChanged = Event()
+        self.executePreview = Event()
+        self.execute = Event()
+        self.destroy = Event()
+        self.validateInputs = Event()
+        self.dialogMinimumSize = None
+        self.isOKButtonVisible = True
+        self._is_valid = True
+
+    @property
+    def isValid(self):
+        return self._is_valid
+
+    def setDialogMinimumSize(self, width, height):
+        self.dialogMinimumSize = (width, height)
+        return True
+
+    def parentUnitsManager(self):
+        from . import fusion
+        design = fusion.Design.cast(Application.get().activeProduct)
+        return design.unitsManager if design else fusion.FusionUnitsManager()
+
+    def doExecutePreview(self):
+        self.executePreview.fire(CommandEventArgs(self))
+        return True
+
+    def doExecute(self, terminate=True):
+        self.execute.fire(CommandEventArgs(self))
+        if terminate:
+            self.terminate()
+        return True
+
+    def terminate(self):
+        self.destroy.fire(CommandEventArgs(self))
+        self._is_valid = False
+
+
+class CommandDefinition(Base):
+    def __init__(self, definitions, id, name, tooltip, resource_folder):
+        self._definitions = definitions
+        self.id = id
+        self.name = name
+        self.tooltip = tooltip
+        self.resourceFolder = resource_folder
+        self.commandCreated = Event()
+
+    def execute(self):
+        # creates the command the same way Fusion does when the button is clicked
+        command = Command(self)
+        self.commandCreated.fire(CommandCreatedEventArgs(command))
+        return command
+
+    def deleteMe(self):
+        self._definitions._items.remove(self)
+        return True
+
+
+class CommandDefinitions(Base):
+    def __init__(self):
+        self._items = []
+
+    def itemById(self, id):
+        for item in self._items:
+            if item.id == id:
+                return item
+        return None
+
+    def addButtonDefinition(self, id, name, tooltip, resource_folder=""):
+        definition = CommandDefinition(self, id, name, tooltip, resource_folder)
+        self._items.append(definition)
+        return definition
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class CommandControl(Base):
+    def __init__(self, controls, command_definition):
+        self._controls = controls
+        self.commandDefinition = command_definition
+        self.id = command_definition.id
+
+    def deleteMe(self):
+        self._controls._items.remove(self)
+        return True
+
+
+class ToolbarControls(Base):
+    def __init__(self):
+        self._items = []
+
+    def addCommand(self, command_definition, position_id="", is_before=False):
+        control = CommandControl(self, command_definition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id):
+        for item in self._items:
+            if item.id == id:
+                return item
+        return None
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+
+class ToolbarPanel(Base):
+    def __init__(self, id):
+        self.id = id
+        self.controls = ToolbarControls()
+
+
+class ToolbarPanels(Base):
+    def __init__(self):
+        self._items = {}
+
+    def itemById(self, id):
+        if id not in self._items:
+            self._items[id] = ToolbarPanel(id)
+        return self._items[id]
+
+
+class Selections(Base):
+    def __init__(self):
+        self._items = []
+
+    def add(self, entity):
+        self._items.append(Selection(entity))
+        return True
+
+    def clear(self):
+        self._items = []
+
+    def item(self, index):
+        return self._items[index]
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class UserInterface(Base):
+    def __init__(self):
+        self.commandDefinitions = CommandDefinitions()
+        self.allToolbarPanels = ToolbarPanels()
+        self.activeSelections = Selections()
+        self.messages = []
+
+    def messageBox(self, text, title="", buttons=0, icon=0):
+        self.messages.append(text)
+        return 0
+
+
+class Application(Base):
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.activeProduct = None
+        self._custom_events = {}
+        self._queued_events = queue.Queue()
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @staticmethod
+    def reset():
+        Application._instance = None
+
+    def registerCustomEvent(self, event_id):
+        if event_id not in self._custom_events:
+            self._custom_events[event_id] = Event()
+        return self._custom_events[event_id]
+
+    def unregisterCustomEvent(self, event_id):
+        return self._custom_events.pop(event_id, None) is not None
+
+    def fireCustomEvent(self, event_id, additional_info=""):
+        # Fusion queues the event to the main thread - the stand-in fires the events fired on the main thread
+        # immediately and queues the ones fired by other threads until processCustomEvents is called
+        if event_id not in self._custom_events:
+            return False
+        if threading.current_thread() is threading.main_thread():
+            self._fire_custom_event(event_id, additional_info)
+        else:
+            self._queued_events.put((event_id, additional_info))
+        return True
+
+    def processCustomEvents(self, timeout=0):
+        # stand-in only: fires the queued events on the calling thread, waits up to timeout seconds for the first one
+        fired = 0
+        try:
+            while True:
+                (event_id, additional_info) = self._queued_events.get(timeout=timeout) if timeout and not fired \
+                    else self._queued_events.get_nowait()
+                self._fire_custom_event(event_id, additional_info)
+                fired += 1
+        except queue.Empty:
+            return fired
+
+    def _fire_custom_event(self, event_id, additional_info):
+        event = self._custom_events.get(event_id)
+        if event is not None:
+            event.fire(CustomEventArgs(additional_info))
@@ -0,0 +1,1259 @@
+# Stand-in for adsk.fusion
+#
+# Models just enough of a design for the add-in to run end to end: user and model parameters with
+# expressions evaluation, B-Rep of boxes and polygonal prisms with loops and coedges, sketches with lines,
+# constraints, dimensions and profiles found from the closed loops of lines, extrude/pattern/base/combine
+# features, the timeline and attributes.
+# Sketches are not solved and features don't change the bodies geometry - only the calls are modelled.
+
+import itertools, math, re, time
+from . import core
+
+_tokens = itertools.count(1)
+
+
+def _new_token(kind):
+    return "{}:{}".format(kind, next(_tokens))
+
+
+def _burn(seconds):
+    if seconds:
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class PatternDistanceType:
+    ExtentPatternDistanceType = 0
+    SpacingPatternDistanceType = 1
+
+
+class DimensionOrientations:
+    AlignedDimensionOrientation = 0
+    HorizontalDimensionOrientation = 1
+    VerticalDimensionOrientation = 2
+
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectionBooleanType = 1
+    UnionBooleanType = 2
+
+
+# collections
+
+
+class _Collection(core.Base):
+    def __init__(self, items=None):
+        self._items = items if items is not None else []
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+# expressions
+
+
+# conversion factors to the internal units (cm and radians)
+_UNITS = {
+    "mm": 0.1, "cm": 1.0, "m": 100.0, "in": 2.54, "ft": 30.48,
+    "deg": math.pi / 180, "rad": 1.0,
+}
+
+_FUNCTIONS = {
+    # Fusion's round() rounds halves up
+    "round": lambda x: math.floor(x + 0.5),
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "PI": math.pi,
+}
+
+_EXPRESSION_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+)|([A-Za-z_]\w*)|([-+*/^(),]))")
+
+
+class FusionUnitsManager(core.Base):
+    def __init__(self, design=None):
+        self.design = design
+        self.defaultLengthUnits = "mm"
+
+    def _translate(self, expression):
+        # translates the Fusion expression into python one with all the values in the internal units
+        result = []
+        has_units = False
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = _EXPRESSION_TOKEN.match(expression, position)
+            if not match:
+                raise ValueError("Invalid expression: {}".format(expression))
+            position = match.end()
+            (number, name, operator) = match.groups()
+            if number is not None:
+                result.append(number)
+            elif name is not None:
+                previous = result[-1] if result else ""
+                param = self.design.userParameters.itemByName(name) if self.design else None
+                if name in _UNITS and (previous[-1:].isdigit() or previous == ")"):
+                    result.append("*{!r}".format(_UNITS[name]))
+                    has_units = True
+                elif param is not None:
+                    result.append("({!r})".format(param.value))
+                    has_units = True
+                elif name in _FUNCTIONS:
+                    result.append(name)
+                else:
+                    raise ValueError("Unknown name \"{}\" in expression: {}".format(name, expression))
+            else:
+                result.append("**" if operator == "^" else operator)
+        return "".join(result), has_units
+
+    def evaluateExpression(self, expression, units="cm"):
+        (python_expression, has_units) = self._translate(expression)
+        try:
+            value = float(eval(python_expression, {"__builtins__": {}}, _FUNCTIONS))
+        except Exception:
+            raise ValueError("Invalid expression: {}".format(expression))
+        # numbers without units are in the units of the value
+        if not has_units:
+            value *= _UNITS.get(units, 1.0)
+        return value
+
+    def isValidExpression(self, expression, units):
+        try:
+            self.evaluateExpression(expression, units)
+            return True
+        except Exception:
+            return False
+
+    def formatInternalValue(self, value, units="cm", show_units=True):
+        value = value / _UNITS.get(units, 1.0)
+        return "{:g} {}".format(value, units) if show_units and units else "{:g}".format(value)
+
+
+# entities
+
+
+class _Entity(core.Base):
+    # common part of the design entities: token, attributes, timeline object and deletion
+    def __init__(self, design, kind, owner=None):
+        self._design = design
+        self._owner = owner
+        self._valid = True
+        self._timeline_object = None
+        self.entityToken = _new_token(kind)
+        self.attributes = Attributes(self)
+        if design is not None:
+            design._entities[self.entityToken] = self
+
+    @property
+    def isValid(self):
+        return self._valid
+
+    @property
+    def timelineObject(self):
+        return self._timeline_object
+
+    def deleteMe(self):
+        if not self._valid:
+            return False
+        self._valid = False
+        if self._owner is not None and self in self._owner._items:
+            self._owner._items.remove(self)
+        if self._timeline_object is not None:
+            self._design.timeline._remove(self._timeline_object)
+        for attribute in list(self.attributes):
+            attribute.deleteMe()
+        return True
+
+
+class Attribute(core.Base):
+    def __init__(self, attributes, group_name, name, value):
+        self._attributes = attributes
+        self.groupName = group_name
+        self.name = name
+        self.value = value
+        self.parent = attributes._parent
+
+    def deleteMe(self):
+        self._attributes._items.remove(self)
+        return True
+
+
+class Attributes(_Collection):
+    def __init__(self, parent):
+        super().__init__()
+        self._parent = parent
+
+    def add(self, group_name, name, value):
+        existing = self.itemByName(group_name, name)
+        if existing:
+            existing.value = value
+            return existing
+        attribute = Attribute(self, group_name, name, value)
+        self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, group_name, name):
+        for attribute in self._items:
+            if attribute.groupName == group_name and attribute.name == name:
+                return attribute
+        return None
+
+    def itemsByGroup(self, group_name):
+        return [attribute for attribute in self._items if attribute.groupName == group_name]
+
+
+# parameters
+
+
+class Parameter(_Entity):
+    def __init__(self, design, owner, name, expression, units, comment=""):
+        super().__init__(design, "parameter", owner)
+        self.name = name
+        self.unit = units
+        self.comment = comment
+        self._expression = None
+        self.expression = expression
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, expression):
+        if not self._design.unitsManager.isValidExpression(expression, self.unit):
+            raise RuntimeError("3 : Invalid expression \"{}\" for the parameter {}".format(expression, self.name))
+        self._expression = expression
+
+    @property
+    def value(self):
+        return self._design.unitsManager.evaluateExpression(self._expression, self.unit)
+
+    @value.setter
+    def value(self, value):
+        self.expression = self._design.unitsManager.formatInternalValue(value, self.unit)
+
+
+class UserParameter(Parameter):
+    pass
+
+
+class ModelParameter(Parameter):
+    pass
+
+
+class UserParameters(_Collection):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+
+    def add(self, name, value, units, comment):
+        if self.itemByName(name):
+            raise RuntimeError("3 : Parameter {} already exists".format(name))
+        expression = value.stringValue if value.stringValue is not None else \
+            self._design.unitsManager.formatInternalValue(value.realValue, units)
+        param = UserParameter(self._design, self, name, expression, units, comment)
+        self._items.append(param)
+        return param
+
+    def itemByName(self, name):
+        for param in self._items:
+            if param.name == name:
+                return param
+        return None
+
+
+# timeline
+
+
+class TimelineObject(core.Base):
+    def __init__(self, timeline, entity):
+        self._timeline = timeline
+        self.entity = entity
+        self.name = getattr(entity, "name", "")
+        self.isSuppressed = False
+
+    @property
+    def index(self):
+        return self._timeline._items.index(self)
+
+    @property
+    def isRolledBack(self):
+        return self.index >= self._timeline.markerPosition
+
+
+class TimelineGroup(core.Base):
+    def __init__(self, timeline, start_index, end_index):
+        self._timeline = timeline
+        self.name = "Group"
+        self.isCollapsed = True
+        self._items = timeline._items[start_index:end_index + 1]
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index]
+
+    def deleteMe(self, delete_group_and_contents=False):
+        self._timeline.timelineGroups._items.remove(self)
+        if delete_group_and_contents:
+            for timeline_object in list(self._items):
+                timeline_object.entity.deleteMe()
+        return True
+
+
+class TimelineGroups(_Collection):
+    def __init__(self, timeline):
+        super().__init__()
+        self._timeline = timeline
+
+    def add(self, start_index, end_index):
+        if not 0 <= start_index <= end_index < self._timeline.count:
+            raise RuntimeError("3 : Invalid timeline group range {} - {}".format(start_index, end_index))
+        group = TimelineGroup(self._timeline, start_index, end_index)
+        self._items.append(group)
+        return group
+
+
+class Timeline(_Collection):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+        self._marker = 0
+        self.timelineGroups = TimelineGroups(self)
+
+    def _append(self, entity):
+        timeline_object = TimelineObject(self, entity)
+        # new objects are inserted at the marker like in Fusion
+        self._items.insert(self._marker, timeline_object)
+        self._marker += 1
+        entity._timeline_object = timeline_object
+        self._design._feature_added()
+        return timeline_object
+
+    def _remove(self, timeline_object):
+        index = self._items.index(timeline_object)
+        self._items.remove(timeline_object)
+        if index < self._marker:
+            self._marker -= 1
+        # groups go away with their last object
+        for group in list(self.timelineGroups._items):
+            if timeline_object in group._items:
+                group._items.remove(timeline_object)
+                if not group._items:
+                    self.timelineGroups._items.remove(group)
+
+    @property
+    def markerPosition(self):
+        return self._marker
+
+    @markerPosition.setter
+    def markerPosition(self, position):
+        self._marker = max(0, min(position, len(self._items)))
+
+    def moveToEnd(self):
+        self._marker = len(self._items)
+        return True
+
+    def deleteAllAfterMarker(self):
+        for timeline_object in self._items[self._marker:]:
+            timeline_object.entity.deleteMe()
+        return True
+
+
+# B-Rep
+
+
+class BRepVertex(core.Base):
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+
+class SurfaceEvaluator(core.Base):
+    def __init__(self, face):
+        self._face = face
+
+    def getNormalAtPoint(self, point):
+        return (True, self._face._normal.copy())
+
+
+class BRepEdge(_Entity):
+    def __init__(self, body, start, end, temp_id):
+        super().__init__(body._design, "edge")
+        self.body = body
+        self.tempId = temp_id
+        self.startVertex = BRepVertex(start)
+        self.endVertex = BRepVertex(end)
+        self._faces = []
+        self._coedges = []
+
+    @property
+    def length(self):
+        return self.startVertex.geometry.distanceTo(self.endVertex.geometry)
+
+    @property
+    def faces(self):
+        return _Collection(list(self._faces))
+
+    @property
+    def coEdges(self):
+        return _Collection(list(self._coedges))
+
+
+class BRepCoEdge(core.Base):
+    # use of the edge by a face loop - coedges of the loop run counterclockwise around the face normal
+    # (inner loops clockwise), so the face is always on the left of them
+    def __init__(self, loop, edge, is_opposed):
+        self.loop = loop
+        self.edge = edge
+        self.isOpposedToEdge = is_opposed
+
+
+class BRepLoop(core.Base):
+    def __init__(self, face, is_outer):
+        self.face = face
+        self.isOuter = is_outer
+        self._coedges = []
+
+    @property
+    def coEdges(self):
+        return _Collection(list(self._coedges))
+
+    @property
+    def edges(self):
+        return _Collection([coedge.edge for coedge in self._coedges])
+
+
+def _newell_normal(points):
+    # normal of the planar polygon which is correct for the concave polygons too
+    (x, y, z) = (0.0, 0.0, 0.0)
+    for (a, b) in zip(points, points[1:] + points[:1]):
+        x += (a.y - b.y) * (a.z + b.z)
+        y += (a.z - b.z) * (a.x + b.x)
+        z += (a.x - b.x) * (a.y + b.y)
+    normal = core.Vector3D.create(x, y, z)
+    normal.normalize()
+    return normal
+
+
+class BRepFace(_Entity):
+    # planar polygonal face: points of the outer loop counterclockwise around the normal and the inner loops clockwise
+    def __init__(self, body, points, temp_id, holes=(), surface_type=core.SurfaceTypes.PlaneSurfaceType):
+        super().__init__(body._design, "face")
+        self.body = body
+        self.tempId = temp_id
+        self._points = points
+        self._holes = list(holes)
+        self._normal = _newell_normal(points)
+        self._surface_type = surface_type
+        self._edges = []
+        self._loops = []
+        self.evaluator = SurfaceEvaluator(self)
+
+    def _triangles(self):
+        # (signed area, centroid) of the fan triangles of all the loops - holes have negative areas
+        for points in [self._points] + self._holes:
+            p0 = points[0]
+            for (a, b) in zip(points[1:], points[2:]):
+                area = p0.vectorTo(a).crossProduct(p0.vectorTo(b)).dotProduct(self._normal) / 2
+                yield area, ((p0.x + a.x + b.x) / 3, (p0.y + a.y + b.y) / 3, (p0.z + a.z + b.z) / 3)
+
+    @property
+    def centroid(self):
+        # area centroid as in Fusion - it's outside of the face for some concave faces
+        total = 0.0
+        (x, y, z) = (0.0, 0.0, 0.0)
+        for (area, center) in self._triangles():
+            total += area
+            x += area * center[0]
+            y += area * center[1]
+            z += area * center[2]
+        return core.Point3D.create(x / total, y / total, z / total)
+
+    @property
+    def edges(self):
+        return _Collection(list(self._edges))
+
+    @property
+    def loops(self):
+        return _Collection(list(self._loops))
+
+    @property
+    def geometry(self):
+        if self._surface_type != core.SurfaceTypes.PlaneSurfaceType:
+            # the stand-in doesn't model the curved surfaces geometry
+            return core.Surface(self._surface_type)
+        return core.Plane.create(self._points[0].copy(), self._normal.copy())
+
+    @property
+    def pointOnFace(self):
+        # centroid of the biggest fan triangle lies inside the face unless it's cut by a hole
+        center = max(self._triangles())[1]
+        return core.Point3D.create(*center)
+
+    @property
+    def area(self):
+        return sum(area for (area, center) in self._triangles())
+
+
+class BRepBody(_Entity):
+    def __init__(self, design, owner=None, name="Body"):
+        super().__init__(design, "body", owner)
+        self.name = name
+        self.parentComponent = owner._component if owner is not None else None
+        self.isTemporary = owner is None
+        self._faces = []
+        self._edges = []
+
+    @property
+    def faces(self):
+        return _Collection(list(self._faces))
+
+    @property
+    def edges(self):
+        return _Collection(list(self._edges))
+
+
+class BRepBodies(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, body, target_base_feature=None):
+        if target_base_feature is not None and not target_base_feature._is_editing:
+            raise RuntimeError("3 : Base feature is not in edit mode")
+        copy = BRepBody(self._component._design, self, body.name)
+        self._items.append(copy)
+        if target_base_feature is not None:
+            target_base_feature._bodies.append(copy)
+        return copy
+
+    def itemByName(self, name):
+        for body in self._items:
+            if body.name == name:
+                return body
+        return None
+
+
+def _new_body(component, name, corners, faces, curved=()):
+    # Adds a polyhedral body: faces are lists of loops (the outer one first) of the corner indexes,
+    # edges are shared by the faces using the same pair of corners and start at the lower index.
+    body = BRepBody(component._design, component.bRepBodies, name)
+    component.bRepBodies._items.append(body)
+    edges = {}
+    for (face_index, loops) in enumerate(faces):
+        points = [[corners[i] for i in loop] for loop in loops]
+        surface_type = core.SurfaceTypes.CylinderSurfaceType if face_index in curved else core.SurfaceTypes.PlaneSurfaceType
+        face = BRepFace(body, points[0], len(body._faces), points[1:], surface_type)
+        body._faces.append(face)
+        for (loop_index, indexes) in enumerate(loops):
+            loop = BRepLoop(face, loop_index == 0)
+            face._loops.append(loop)
+            for i in range(len(indexes)):
+                (a, b) = (indexes[i], indexes[(i + 1) % len(indexes)])
+                key = (min(a, b), max(a, b))
+                if key not in edges:
+                    edges[key] = BRepEdge(body, corners[key[0]].copy(), corners[key[1]].copy(), len(edges))
+                    body._edges.append(edges[key])
+                edge = edges[key]
+                coedge = BRepCoEdge(loop, edge, a > b)
+                loop._coedges.append(coedge)
+                edge._coedges.append(coedge)
+                face._edges.append(edge)
+                edge._faces.append(face)
+    return body
+
+
+# box faces as corner indexes (counterclockwise looking from outside) - corners are numbered
+# by the x, y and z bits: 0 = (0, 0, 0), 1 = (length, 0, 0), 2 = (0, width, 0), 4 = (0, 0, thickness)
+_BOX_FACES = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+
+
+def new_board(component, length, width, thickness, name="Board"):
+    # Stand-in helper (not in the Fusion API): adds a box body of the specified size (in cm).
+    # Its faces are ordered bottom, top, front (y = 0), back, left (x = 0), right and
+    # the edges of every face start at its first corner.
+    corners = [core.Point3D.create(length if i & 1 else 0, width if i & 2 else 0, thickness if i & 4 else 0) for i in range(8)]
+    return _new_body(component, name, corners, [[list(indexes)] for indexes in _BOX_FACES])
+
+
+def _signed_area(polygon):
+    return sum(a[0] * b[1] - b[0] * a[1] for (a, b) in zip(polygon, polygon[1:] + polygon[:1])) / 2
+
+
+def new_part(component, outline, thickness, holes=(), name="Part", transform=None, curved=()):
+    # Stand-in helper (not in the Fusion API): adds a prism of the polygon outline (list of (x, y) in cm)
+    # with polygonal holes extruded by the thickness along Z and optionally moved by the transform (Matrix3D).
+    # Its faces are ordered bottom, top, the sides of the outline edges starting at every outline point
+    # and the sides of the holes edges. Side faces listed in curved report a cylindrical surface.
+    loops = [list(outline) if _signed_area(outline) > 0 else list(reversed(outline))]
+    loops += [list(hole) if _signed_area(hole) < 0 else list(reversed(hole)) for hole in holes]
+    corners = []
+    bottom = []
+    for loop in loops:
+        bottom.append(list(range(len(corners), len(corners) + len(loop))))
+        corners.extend(core.Point3D.create(x, y, 0) for (x, y) in loop)
+    top_offset = len(corners)
+    corners += [core.Point3D.create(p.x, p.y, thickness) for p in corners]
+    if transform is not None:
+        for p in corners:
+            p.transformBy(transform)
+
+    faces = [[list(reversed(indexes)) for indexes in bottom], [[i + top_offset for i in indexes] for indexes in bottom]]
+    for indexes in bottom:
+        for (a, b) in zip(indexes, indexes[1:] + indexes[:1]):
+            faces.append([[a, b, b + top_offset, a + top_offset]])
+    return _new_body(component, name, corners, faces, [2 + i for i in curved])
+
+
+class TemporaryBRepManager(core.Base):
+    _instance = None
+
+    @staticmethod
+    def get():
+        if TemporaryBRepManager._instance is None:
+            TemporaryBRepManager._instance = TemporaryBRepManager()
+        return TemporaryBRepManager._instance
+
+    def createBox(self, box):
+        body = BRepBody(None, None, "Box")
+        body._box = box
+        return body
+
+    def booleanOperation(self, target_body, tool_body, boolean_type):
+        return True
+
+    def copy(self, body):
+        return BRepBody(None, None, body.name)
+
+
+# sketches
+
+
+class SketchPoint(_Entity):
+    def __init__(self, sketch, geometry):
+        super().__init__(sketch._design, "sketch_point")
+        self.parentSketch = sketch
+        self.geometry = geometry
+        self.isFixed = False
+
+    @property
+    def worldGeometry(self):
+        point = self.geometry.copy()
+        point.transformBy(self.parentSketch.transform)
+        return point
+
+
+class SketchCurve(_Entity):
+    def __init__(self, sketch, owner):
+        super().__init__(sketch._design, "sketch_curve", owner)
+        self.parentSketch = sketch
+        self.isConstruction = False
+        self.isReference = False
+        self.isFixed = False
+
+
+class SketchLine(SketchCurve):
+    def __init__(self, sketch, owner, start_point, end_point):
+        super().__init__(sketch, owner)
+        self.startSketchPoint = start_point
+        self.endSketchPoint = end_point
+
+    @property
+    def length(self):
+        return self.startSketchPoint.geometry.distanceTo(self.endSketchPoint.geometry)
+
+    def deleteMe(self):
+        self.parentSketch._profiles = None
+        return super().deleteMe()
+
+
+class SketchLines(_Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def _point(self, point):
+        if isinstance(point, SketchPoint):
+            if point.parentSketch is not self._sketch:
+                raise RuntimeError("3 : Sketch point belongs to another sketch")
+            return point
+        return self._sketch.sketchPoints._add(point.copy())
+
+    def addByTwoPoints(self, start_point, end_point):
+        line = SketchLine(self._sketch, self, self._point(start_point), self._point(end_point))
+        self._items.append(line)
+        self._sketch._profiles = None
+        return line
+
+
+class SketchCurves(core.Base):
+    def __init__(self, sketch):
+        self.sketchLines = SketchLines(sketch)
+
+    @property
+    def count(self):
+        return self.sketchLines.count
+
+    def __iter__(self):
+        return iter(self.sketchLines)
+
+
+class SketchPoints(_Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def _add(self, geometry):
+        point = SketchPoint(self._sketch, geometry)
+        self._items.append(point)
+        return point
+
+    def add(self, point):
+        return self._add(point.copy())
+
+
+class GeometricConstraint(_Entity):
+    def __init__(self, sketch, owner, kind, entities):
+        super().__init__(sketch._design, "constraint", owner)
+        self.parentSketch = sketch
+        self.kind = kind
+        self.entities = entities
+
+
+class GeometricConstraints(_Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def _add(self, kind, *entities):
+        constraint = GeometricConstraint(self._sketch, self, kind, entities)
+        self._items.append(constraint)
+        return constraint
+
+    def addCoincident(self, point, entity):
+        return self._add("coincident", point, entity)
+
+    def addPerpendicular(self, line1, line2):
+        return self._add("perpendicular", line1, line2)
+
+    def addParallel(self, line1, line2):
+        return self._add("parallel", line1, line2)
+
+    def addCollinear(self, line1, line2):
+        return self._add("collinear", line1, line2)
+
+    def addHorizontal(self, line):
+        return self._add("horizontal", line)
+
+    def addVertical(self, line):
+        return self._add("vertical", line)
+
+    def addEqual(self, curve1, curve2):
+        return self._add("equal", curve1, curve2)
+
+
+def _line_direction(line):
+    return line.startSketchPoint.geometry.vectorTo(line.endSketchPoint.geometry)
+
+
+def _point_to_line_distance(point, line):
+    direction = _line_direction(line)
+    to_point = line.startSketchPoint.geometry.vectorTo(point)
+    length = direction.length
+    return direction.crossProduct(to_point).length / length if length else to_point.length
+
+
+class SketchDimension(_Entity):
+    def __init__(self, sketch, owner, kind, entities, value, units, text_point):
+        super().__init__(sketch._design, "dimension", owner)
+        self.parentSketch = sketch
+        self.kind = kind
+        self.entities = entities
+        self.textPosition = text_point
+        self.isDriving = True
+        design = sketch._design
+        name = "d{}".format(len(design._model_parameters._items) + 1)
+        self.parameter = ModelParameter(design, design._model_parameters, name,
+                                        design.unitsManager.formatInternalValue(value, units), units)
+        design._model_parameters._items.append(self.parameter)
+
+
+class SketchDimensions(_Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def _add(self, kind, entities, value, units, text_point):
+        dimension = SketchDimension(self._sketch, self, kind, entities, value, units, text_point)
+        self._items.append(dimension)
+        return dimension
+
+    def addDistanceDimension(self, point1, point2, orientation, text_point, is_driving=True):
+        value = point1.geometry.distanceTo(point2.geometry)
+        return self._add("distance", (point1, point2), value, "mm", text_point)
+
+    def addAngularDimension(self, line1, line2, text_point, is_driving=True):
+        value = _line_direction(line1).angleTo(_line_direction(line2))
+        return self._add("angular", (line1, line2), value, "deg", text_point)
+
+    def addOffsetDimension(self, line1, line2, text_point, is_driving=True):
+        value = _point_to_line_distance(line1.startSketchPoint.geometry, line2)
+        return self._add("offset", (line1, line2), value, "mm", text_point)
+
+
+class ProfileCurve(core.Base):
+    def __init__(self, curve):
+        self.sketchEntity = curve
+        self.geometryType = 0
+
+
+class ProfileLoop(core.Base):
+    def __init__(self, curves):
+        self.isOuter = True
+        self.profileCurves = _Collection([ProfileCurve(curve) for curve in curves])
+
+
+class Profile(core.Base):
+    def __init__(self, sketch, curves):
+        self.parentSketch = sketch
+        self.profileLoops = _Collection([ProfileLoop(curves)])
+        self.entityToken = _new_token("profile")
+
+    @property
+    def isValid(self):
+        return self in self.parentSketch._find_profiles()
+
+
+class Sketch(_Entity):
+    def __init__(self, component, owner, planar_entity):
+        super().__init__(component._design, "sketch", owner)
+        self.parentComponent = component
+        self.name = "Sketch{}".format(len(owner._items) + 1)
+        self.referencePlane = planar_entity
+        self.isComputeDeferred = False
+
+        # sketch coordinate system of the face: origin in its first corner, X along its first side
+        points = planar_entity._points
+        x_axis = points[0].vectorTo(points[1])
+        x_axis.normalize()
+        z_axis = planar_entity._normal.copy()
+        y_axis = z_axis.crossProduct(x_axis)
+        self.transform = core.Matrix3D.create()
+        self.transform.setWithCoordinateSystem(points[0], x_axis, y_axis, z_axis)
+        self._inverse = self.transform.copy()
+        self._inverse.invert()
+
+        self.sketchPoints = SketchPoints(self)
+        self.sketchCurves = SketchCurves(self)
+        self.geometricConstraints = GeometricConstraints(self)
+        self.sketchDimensions = SketchDimensions(self)
+        self._profiles = None
+
+    def modelToSketchSpace(self, point):
+        point = point.copy()
+        point.transformBy(self._inverse)
+        return point
+
+    def sketchToModelSpace(self, point):
+        point = point.copy()
+        point.transformBy(self.transform)
+        return point
+
+    def project(self, entity):
+        if not isinstance(entity, BRepEdge):
+            raise RuntimeError("3 : Only edges projection is supported by the stand-in")
+        lines = self.sketchCurves.sketchLines
+        line = lines.addByTwoPoints(self.modelToSketchSpace(entity.startVertex.geometry),
+                                    self.modelToSketchSpace(entity.endVertex.geometry))
+        line.isReference = True
+        line.isFixed = True
+        result = core.ObjectCollection.create()
+        result.add(line)
+        return result
+
+    def _find_profiles(self):
+        # profiles are the closed loops of the not construction lines connected through shared sketch points
+        if self._profiles is not None:
+            return self._profiles
+
+        lines = [line for line in self.sketchCurves.sketchLines._items if not line.isConstruction and not line.isReference]
+        by_point = {}
+        for line in lines:
+            for point in (line.startSketchPoint, line.endSketchPoint):
+                by_point.setdefault(id(point), []).append(line)
+
+        profiles = []
+        visited = set()
+        for line in lines:
+            if id(line) in visited:
+                continue
+            # walk the connected lines
+            loop = []
+            stack = [line]
+            is_closed = True
+            while stack:
+                current = stack.pop()
+                if id(current) in visited:
+                    continue
+                visited.add(id(current))
+                loop.append(current)
+                for point in (current.startSketchPoint, current.endSketchPoint):
+                    connected = by_point[id(point)]
+                    if len(connected) != 2:
+                        is_closed = False
+                    stack.extend(connected)
+            if is_closed and len(loop) > 2:
+                loop.sort(key=lambda l: lines.index(l))
+                profiles.append(Profile(self, loop))
+
+        self._profiles = profiles
+        return profiles
+
+    @property
+    def profiles(self):
+        return _Collection(self._find_profiles())
+
+
+class Sketches(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, planar_entity, occurrence_for_creation=None):
+        sketch = Sketch(self._component, self, planar_entity)
+        self._items.append(sketch)
+        self._component._design.timeline._append(sketch)
+        return sketch
+
+    def addWithoutEdges(self, planar_entity, occurrence_for_creation=None):
+        # the stand-in sketches never project the face edges
+        return self.add(planar_entity, occurrence_for_creation)
+
+    def itemByName(self, name):
+        for sketch in self._items:
+            if sketch.name == name:
+                return sketch
+        return None
+
+
+# features
+
+
+class Feature(_Entity):
+    def __init__(self, component, owner, name):
+        super().__init__(component._design, "feature", owner)
+        self.parentComponent = component
+        self.name = "{}{}".format(name, len(owner._items) + 1)
+        self._bodies = []
+
+    @property
+    def bodies(self):
+        return _Collection(list(self._bodies))
+
+
+def _profiles_body(profiles):
+    profile = profiles.item(0) if isinstance(profiles, core.ObjectCollection) else profiles
+    return profile.parentSketch.referencePlane.body
+
+
+class ExtrudeFeature(Feature):
+    def __init__(self, component, owner, profiles, distance, operation):
+        super().__init__(component, owner, "Extrude")
+        self.profile = profiles
+        self.operation = operation
+        design = component._design
+        self.extentOne = ModelParameter(design, design._model_parameters, "d{}".format(len(design._model_parameters._items) + 1),
+                                        distance.stringValue if distance.stringValue is not None else
+                                        design.unitsManager.formatInternalValue(distance.realValue, "mm"), "mm")
+        design._model_parameters._items.append(self.extentOne)
+        if operation == FeatureOperations.JoinFeatureOperation or operation == FeatureOperations.CutFeatureOperation:
+            self._bodies.append(_profiles_body(profiles))
+        else:
+            self._bodies.append(component.bRepBodies.add(BRepBody(None, None, "Body")))
+
+
+class ExtrudeFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def addSimple(self, profiles, distance, operation):
+        if profiles is None or (isinstance(profiles, core.ObjectCollection) and (profiles.count == 0 or None in list(profiles))):
+            raise RuntimeError("3 : No profiles to extrude")
+        feature = ExtrudeFeature(self._component, self, profiles, distance, operation)
+        self._items.append(feature)
+        self._component._design.timeline._append(feature)
+        return feature
+
+
+class RectangularPatternFeatureInput(core.Base):
+    def __init__(self, entities, direction_one, quantity_one, distance_one, distance_type):
+        self.inputEntities = entities
+        self.directionOneEntity = direction_one
+        self.quantityOne = quantity_one
+        self.distanceOne = distance_one
+        self.patternDistanceType = distance_type
+        self.directionTwoEntity = None
+        self.quantityTwo = core.ValueInput.createByString("1")
+        self.distanceTwo = core.ValueInput.createByString("0")
+
+    def setDirectionTwo(self, direction_two, quantity_two, distance_two):
+        self.directionTwoEntity = direction_two
+        self.quantityTwo = quantity_two
+        self.distanceTwo = distance_two
+        return True
+
+
+class PatternElement(core.Base):
+    def __init__(self, feature, index):
+        self.parentFeature = feature
+        self.id = index
+        self.faces = _Collection()
+
+
+class RectangularPatternFeature(Feature):
+    def __init__(self, component, owner, pattern_input):
+        super().__init__(component, owner, "RectangularPattern")
+        design = component._design
+        self.inputEntities = pattern_input.inputEntities
+        self.quantityOne = ModelParameter(design, design._model_parameters, "d{}".format(len(design._model_parameters._items) + 1),
+                                          pattern_input.quantityOne.stringValue, "")
+        design._model_parameters._items.append(self.quantityOne)
+        self.distanceOne = ModelParameter(design, design._model_parameters, "d{}".format(len(design._model_parameters._items) + 1),
+                                          pattern_input.distanceOne.stringValue, "mm")
+        design._model_parameters._items.append(self.distanceOne)
+
+    @property
+    def patternElements(self):
+        return _Collection([PatternElement(self, i) for i in range(max(0, int(round(self.quantityOne.value))))])
+
+
+class RectangularPatternFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, input_entities, direction_one_entity, quantity_one, distance_one, distance_type):
+        return RectangularPatternFeatureInput(input_entities, direction_one_entity, quantity_one, distance_one, distance_type)
+
+    def add(self, pattern_input):
+        feature = RectangularPatternFeature(self._component, self, pattern_input)
+        self._items.append(feature)
+        self._component._design.timeline._append(feature)
+        return feature
+
+
+class BaseFeature(Feature):
+    def __init__(self, component, owner):
+        super().__init__(component, owner, "BaseFeature")
+        self._is_editing = False
+
+    def startEdit(self):
+        self._is_editing = True
+        return True
+
+    def finishEdit(self):
+        self._is_editing = False
+        return True
+
+    def deleteMe(self):
+        # the bodies of the base feature go with it
+        if self._valid:
+            for body in self._bodies:
+                body.deleteMe()
+        return super().deleteMe()
+
+
+class BaseFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self):
+        feature = BaseFeature(self._component, self)
+        self._items.append(feature)
+        self._component._design.timeline._append(feature)
+        return feature
+
+
+class CombineFeatureInput(core.Base):
+    def __init__(self, target_body, tool_bodies):
+        self.targetBody = target_body
+        self.toolBodies = tool_bodies
+        self.operation = FeatureOperations.JoinFeatureOperation
+        self.isKeepToolBodies = False
+        self.isNewComponent = False
+
+
+class CombineFeature(Feature):
+    def __init__(self, component, owner, combine_input):
+        super().__init__(component, owner, "Combine")
+        self.operation = combine_input.operation
+        self._bodies.append(combine_input.targetBody)
+
+
+class CombineFeatures(_Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, target_body, tool_bodies):
+        return CombineFeatureInput(target_body, tool_bodies)
+
+    def add(self, combine_input):
+        feature = CombineFeature(self._component, self, combine_input)
+        self._items.append(feature)
+        self._component._design.timeline._append(feature)
+        return feature
+
+
+class Features(core.Base):
+    def __init__(self, component):
+        self.extrudeFeatures = ExtrudeFeatures(component)
+        self.rectangularPatternFeatures = RectangularPatternFeatures(component)
+        self.baseFeatures = BaseFeatures(component)
+        self.combineFeatures = CombineFeatures(component)
+
+
+# custom graphics
+
+
+class CustomGraphicsBRepBody(core.Base):
+    def __init__(self, group, body):
+        self.parentGroup = group
+        self.body = body
+
+
+class CustomGraphicsGroup(core.Base):
+    def __init__(self, groups):
+        self._groups = groups
+        self._valid = True
+        self._entities = []
+
+    @property
+    def isValid(self):
+        return self._valid
+
+    def addBRepBody(self, body):
+        graphics = CustomGraphicsBRepBody(self, body)
+        self._entities.append(graphics)
+        return graphics
+
+    def deleteMe(self):
+        self._valid = False
+        self._groups._items.remove(self)
+        return True
+
+
+class CustomGraphicsGroups(_Collection):
+    def add(self):
+        group = CustomGraphicsGroup(self)
+        self._items.append(group)
+        return group
+
+
+# design
+
+
+class Component(core.Base):
+    def __init__(self, design, name):
+        self._design = design
+        self.name = name
+        self.parentDesign = design
+        self.sketches = Sketches(self)
+        self.features = Features(self)
+        self.bRepBodies = BRepBodies(self)
+        self.customGraphicsGroups = CustomGraphicsGroups()
+        self.attributes = Attributes(self)
+
+
+class Document(core.Base):
+    def __init__(self, name):
+        self.name = name
+
+
+class Design(core.Base):
+    def __init__(self, name="Untitled"):
+        self._entities = {}
+        self.designType = DesignTypes.ParametricDesignType
+        self.unitsManager = FusionUnitsManager(self)
+        self.userParameters = UserParameters(self)
+        self._model_parameters = _Collection()
+        self.attributes = Attributes(self)
+        self.timeline = Timeline(self)
+        self.rootComponent = Component(self, name)
+        self.activeComponent = self.rootComponent
+        self.parentDocument = Document(name)
+        # stand-in only: simulated recompute time of one timeline feature in seconds
+        self.computeLatency = 0
+        self._is_compute_deferred = False
+        self._pending_compute = 0
+
+    @property
+    def allParameters(self):
+        return _Collection(self.userParameters._items + self._model_parameters._items)
+
+    @property
+    def isComputeDeferred(self):
+        return self._is_compute_deferred
+
+    @isComputeDeferred.setter
+    def isComputeDeferred(self, value):
+        self._is_compute_deferred = value
+        if not value and self._pending_compute:
+            # features added while the compute was deferred are computed at once
+            _burn(self.computeLatency * self._pending_compute)
+            self._pending_compute = 0
+
+    def _feature_added(self):
+        if self._is_compute_deferred:
+            self._pending_compute += 1
+        else:
+            _burn(self.computeLatency)
+
+    def findEntityByToken(self, token):
+        entity = self._entities.get(token)
+        return [entity] if entity is not None and entity.isValid else []
+
+    def computeAll(self):
+        _burn(self.computeLatency * self.timeline.count)
+        return True
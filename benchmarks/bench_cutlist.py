@@ -0,0 +1,108 @@
+#Description-Benchmarks the cut list CLI on a generated cut list.
+
+# Usage: python benchmarks/bench_cutlist.py [--boards 100000] [--jobs 1,4] [--format csv] [--keep cutlist.csv]
+#
+# Generates a cut list of random drawer boards (about 2% of them infeasible, a few of them with infinite
+# or overflowing sizes which must only be reported as infeasible) and runs dovetail_cutlist.py
+# on it in a separate process for every number of worker processes. Reports the wall time, boards per second,
+# peak memory of the CLI process and checks every board got one strict JSON line in the cut list order.
+
+import argparse, csv, json, os, random, resource, subprocess, sys, tempfile, time
+
+from addin import ADDIN_DIR
+
+START_TYPES = ("Full pin", "Half pin", "Half tail")
+
+
+def write_cutlist(path, boards, format, seed=1):
+    generator = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f) if format == "csv" else None
+        if writer:
+            writer.writerow(("id", "start_type", "edge_length", "pin", "ratio", "angle", "height"))
+        for i in range(boards):
+            row = ("board{}".format(i), generator.choice(START_TYPES), round(generator.uniform(60, 900), 1),
+                   round(generator.uniform(8, 16), 1), round(generator.uniform(1, 3), 2), generator.choice((7, 9.5)),
+                   round(generator.uniform(6, 25) if generator.random() > 0.02 else 200, 1))
+            if i % 1000 == 500:
+                row = row[:2] + (float("inf"),) + row[3:]
+            elif i % 1000 == 501:
+                row = row[:2] + (1e308, 1e-300) + row[4:]
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(("id", "start_type", "edge_length", "pin", "ratio", "angle", "height"), row))) + "\n")
+
+
+def run_cli(cutlist, output, jobs):
+    # returns (seconds, peak RSS of the CLI in MB)
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ADDIN_DIR, "dovetail_cutlist.py"), cutlist, "--output", output, "--jobs", str(jobs)],
+                   check=True, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss of the children is the maximum over all of them, so it's only exact for the largest run so far
+    return elapsed, max(before, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+
+
+def _reject_constant(name):
+    raise ValueError("{} is not valid JSON".format(name))
+
+
+def check_output(path, boards):
+    rows = 0
+    infeasible = 0
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line, parse_constant=_reject_constant)
+            except ValueError as e:
+                return "line {}: {}".format(rows + 1, e), infeasible
+            rows += 1
+            if record["row"] != rows:
+                return "row {} written at line {}".format(record["row"], rows), infeasible
+            if record["errors"]:
+                infeasible += 1
+            elif rows % 1000 in (501, 502):
+                return "row {} with infinite or overflowing sizes has no errors".format(rows), infeasible
+            elif len(record["tails"]) != record["count"]:
+                return "row {} has {} tails for count {}".format(rows, len(record["tails"]), record["count"]), infeasible
+    if rows != boards:
+        return "{} boards written for {} in the cut list".format(rows, boards), infeasible
+    return None, infeasible
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the cut list CLI on a generated cut list")
+    parser.add_argument("--boards", type=int, default=100000)
+    parser.add_argument("--jobs", default="1,{}".format(os.cpu_count() or 1), help="comma separated numbers of worker processes")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--keep", help="keep the generated cut list in this file")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    cutlist = args.keep or os.path.join(directory, "cutlist." + args.format)
+    output = os.path.join(directory, "layouts.jsonl")
+    write_cutlist(cutlist, args.boards, args.format)
+
+    failures = []
+    print("{:>6} {:>10} {:>14} {:>12} {:>12}".format("Jobs", "Time, s", "Boards/s", "Peak, MB", "Infeasible"))
+    for jobs in [int(x) for x in args.jobs.split(",")]:
+        (elapsed, peak) = run_cli(cutlist, output, jobs)
+        (error, infeasible) = check_output(output, args.boards)
+        if error:
+            failures.append("{} jobs: {}".format(jobs, error))
+        print("{:>6} {:>10.2f} {:>14.0f} {:>12.1f} {:>12}".format(jobs, elapsed, args.boards / elapsed, peak, infeasible))
+
+    os.remove(output)
+    if not args.keep:
+        os.remove(cutlist)
+    os.rmdir(directory)
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
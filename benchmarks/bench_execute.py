@@ -0,0 +1,149 @@
+#Description-Benchmarks the command execution against the recording adsk stand-in.
+
+# Usage: python benchmarks/bench_execute.py [--edge-lengths 100,200,400,800] [--modes pattern,single,fast]
+#                                           [--repeat 3] [--latency-us 20] [--compute-ms 0] [--pins] [--output results.jsonl]
+#
+# Every run creates a fresh design with a board of the given width, selects its top face and end edge,
+# fills the dialog and fires the execute event through DovetailsCommandExecuteEventHandler.notify.
+# With --pins a pins board is added too and its end face and inner edge are selected for the pin sockets.
+# For every start type, generation mode and edge length it reports:
+# - median wall time of the repeated runs
+# - number of API calls (property reads/writes and method calls on the stand-in objects made by the add-in)
+# - number of memory blocks left allocated and the peak traced memory of one run under tracemalloc
+#
+# --latency-us burns the specified time on every API call to simulate the round-trip to Fusion core,
+# --compute-ms burns the specified time for every feature recompute.
+
+import argparse, gc, json, statistics, sys, time, tracemalloc
+
+from addin import load_addin, start_addin
+import adsk.core, adsk.fusion
+
+BOARD_LENGTH = 30
+BOARD_THICKNESS = 1.8
+
+MODES = {
+    "pattern": "Rectangular pattern",
+    "single": "Single extrude",
+    "fast": "Fast solid (non-parametric)",
+}
+
+
+def new_design(edge_length, compute_latency):
+    # board with the dovetails edge of the given length (in mm) - the right end of the top face
+    design = adsk.fusion.Design("Bench {} mm".format(edge_length))
+    design.computeLatency = compute_latency
+    board = adsk.fusion.new_board(design.rootComponent, BOARD_LENGTH, edge_length / 10, BOARD_THICKNESS)
+    face = board.faces.item(1)
+    edge = [e for e in face.edges if e.startVertex.geometry.x == BOARD_LENGTH and e.endVertex.geometry.x == BOARD_LENGTH][0]
+    return design, face, edge
+
+
+def new_pins_board(design, edge_length):
+    # pins board standing on its end - the top face is its end face and the edge along x is its inner side
+    board = adsk.fusion.new_board(design.rootComponent, edge_length / 10, BOARD_THICKNESS, BOARD_LENGTH, "Pins")
+    face = board.faces.item(1)
+    edge = [e for e in face.edges if e.startVertex.geometry.y == 0 and e.endVertex.geometry.y == 0][0]
+    return face, edge
+
+
+def select(dropdown, name):
+    for item in dropdown.listItems:
+        if item.name == name:
+            item.isSelected = True
+            return
+    raise ValueError("No item {} in {}".format(name, dropdown.id))
+
+
+def run_once(start_type, mode, edge_length, latency, compute_latency, trace_memory=False, pins=False):
+    design, face, edge = new_design(edge_length, compute_latency)
+    addin, app = start_addin(design)
+    command = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID).execute()
+    inputs = command.commandInputs
+    inputs.itemById("face").addSelection(face)
+    inputs.itemById("edge").addSelection(edge)
+    if pins:
+        (pins_face, pins_edge) = new_pins_board(design, edge_length)
+        inputs.itemById("pins_face").addSelection(pins_face)
+        inputs.itemById("pins_edge").addSelection(pins_edge)
+    inputs.itemById("edge_length").expression = "{} mm".format(edge_length)
+    select(inputs.itemById("start_type"), start_type)
+    select(inputs.itemById("generation_mode"), mode)
+
+    recorder = adsk.core.recorder
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    recorder.reset()
+    recorder.start(latency)
+    start = time.perf_counter()
+    command.doExecute(False)
+    elapsed = time.perf_counter() - start
+    recorder.stop()
+
+    result = {
+        "start_type": start_type,
+        "mode": mode,
+        "edge_length": edge_length,
+        "time": elapsed,
+        "api_calls": recorder.calls,
+        "features": design.timeline.count,
+        "calls_by_name": dict(recorder.by_name),
+    }
+    if trace_memory:
+        after = tracemalloc.take_snapshot()
+        result["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        result["blocks"] = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+        tracemalloc.stop()
+
+    command.terminate()
+    if app.userInterface.messages:
+        raise RuntimeError("Execution failed for {} / {} / {} mm:\n{}".format(start_type, mode, edge_length, app.userInterface.messages[0]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the command execution against the recording adsk stand-in")
+    parser.add_argument("--edge-lengths", default="100,200,400,800", help="comma separated edge lengths in mm")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated generation modes: " + ", ".join(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-us", type=float, default=0)
+    parser.add_argument("--compute-ms", type=float, default=0)
+    parser.add_argument("--pins", action="store_true", help="cut the pin sockets into a pins board in the same run")
+    parser.add_argument("--top-calls", type=int, default=0, help="list N most frequent API calls of every run")
+    parser.add_argument("--output", help="append the results as JSON lines to this file")
+    args = parser.parse_args()
+
+    edge_lengths = [float(x) for x in args.edge_lengths.split(",")]
+    modes = [MODES[x] for x in args.modes.split(",")]
+    latency = args.latency_us / 1000000
+    compute_latency = args.compute_ms / 1000
+    start_types = [st.value for st in load_addin().DovetailStartType]
+
+    print("{:<10} {:<28} {:>8} {:>9} {:>10} {:>10} {:>10} {:>9}".format(
+        "Start", "Mode", "Edge, mm", "Features", "Time, ms", "API calls", "Blocks", "Peak, KB"))
+    results = []
+    for start_type in start_types:
+        for mode in modes:
+            for edge_length in edge_lengths:
+                times = [run_once(start_type, mode, edge_length, latency, compute_latency, pins=args.pins)["time"] for i in range(args.repeat)]
+                # allocations are measured on a separate run since tracemalloc slows everything down
+                result = run_once(start_type, mode, edge_length, latency, compute_latency, trace_memory=True, pins=args.pins)
+                result["time"] = statistics.median(times)
+                results.append(result)
+                print("{:<10} {:<28} {:>8g} {:>9} {:>10.2f} {:>10} {:>10} {:>9.1f}".format(
+                    start_type, mode, edge_length, result["features"], result["time"] * 1000,
+                    result["api_calls"], result["blocks"], result["peak_kb"]))
+                for (name, calls) in sorted(result["calls_by_name"].items(), key=lambda x: -x[1])[:args.top_calls]:
+                    print("    {:<60} {:>8}".format(name, calls))
+
+    if args.output:
+        with open(args.output, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
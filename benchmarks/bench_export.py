@@ -0,0 +1,55 @@
+#Description-Benchmarks the 2D outline export against building the tails through B-Rep.
+
+# Usage: python benchmarks/bench_export.py [--edge-lengths 100,200,400,800] [--boards 1000] [--repeat 3] [--latency-us 20]
+#
+# For every start type and edge length reports the time per board of:
+# - solving the layout and writing DXF and SVG outlines of --boards such boards nested into one file (in memory)
+# - creating the fast solid dovetails of one such board through the add-in against the recording adsk stand-in.
+#   The stand-in doesn't run any real modelling so this is the lower bound of going through B-Rep in Fusion,
+#   --latency-us adds the simulated cost of every API call.
+
+import argparse, io, math, statistics, sys, time
+
+from addin import ADDIN_DIR, load_addin
+from bench_execute import MODES, run_once
+
+sys.path.insert(1, ADDIN_DIR)
+from dovetail_layout import DovetailStartType, solve_layout
+from dovetail_export import WRITERS, place_boards
+
+ANGLE = math.radians(7)
+HEIGHT = 10
+
+
+def export_time(start_type, edge_length, boards, format):
+    start = time.perf_counter()
+    layouts = [solve_layout(start_type, edge_length, 11, 2, ANGLE, HEIGHT) for i in range(boards)]
+    placed, size = place_boards(layouts, ["board{}".format(i) for i in range(boards)])
+    stream = io.StringIO()
+    WRITERS[format](stream, placed, size)
+    return (time.perf_counter() - start) / boards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the 2D outline export against building the tails through B-Rep")
+    parser.add_argument("--edge-lengths", default="100,200,400,800", help="comma separated edge lengths in mm")
+    parser.add_argument("--boards", type=int, default=1000, help="boards nested into one exported file")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-us", type=float, default=0)
+    args = parser.parse_args()
+
+    load_addin()
+    print("{:<10} {:>8} {:>12} {:>12} {:>14} {:>10}".format("Start", "Edge, mm", "DXF, us", "SVG, us", "B-Rep, us", "Speedup"))
+    for start_type in DovetailStartType:
+        for edge_length in [float(x) for x in args.edge_lengths.split(",")]:
+            dxf = min(export_time(start_type, edge_length, args.boards, "dxf") for i in range(args.repeat))
+            svg = min(export_time(start_type, edge_length, args.boards, "svg") for i in range(args.repeat))
+            brep = statistics.median(run_once(start_type.value, MODES["fast"], edge_length, args.latency_us / 1000000, 0)["time"]
+                                     for i in range(args.repeat))
+            print("{:<10} {:>8g} {:>12.1f} {:>12.1f} {:>14.1f} {:>9.0f}x".format(
+                start_type.value, edge_length, dxf * 1000000, svg * 1000000, brep * 1000000, brep / max(dxf, svg)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
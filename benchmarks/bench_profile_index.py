@@ -0,0 +1,149 @@
+#Description-Compares the batched find_profiles with the per curve profiles scan on a fake sketch with many profiles.
+
+# Usage: python benchmarks/bench_profile_index.py [--profiles 500] [--lookups 3] [--latency-us 20]
+#
+# Every property access on the fake sketch objects counts as one Fusion API call and
+# optionally burns the specified latency to simulate the COM round-trip.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_index import find_profiles, scan_profile_for_curve
+
+
+class ApiCounter:
+    def __init__(self, latency):
+        self.calls = 0
+        self.latency = latency
+
+    def call(self):
+        self.calls += 1
+        if self.latency:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+
+class FakeCollection:
+    def __init__(self, api, items):
+        self._api = api
+        self._items = items
+
+    @property
+    def count(self):
+        self._api.call()
+        return len(self._items)
+
+    def __iter__(self):
+        for item in self._items:
+            self._api.call()
+            yield item
+
+
+class FakeCurve:
+    def __init__(self, api, sketch, token):
+        self._api = api
+        self._sketch = sketch
+        self._token = token
+
+    @property
+    def parentSketch(self):
+        self._api.call()
+        return self._sketch
+
+    @property
+    def entityToken(self):
+        self._api.call()
+        return self._token
+
+    def __eq__(self, other):
+        self._api.call()
+        return isinstance(other, FakeCurve) and other._token == self._token
+
+    __hash__ = object.__hash__
+
+
+class FakeProfileCurve:
+    def __init__(self, api, curve):
+        self._api = api
+        self._curve = curve
+
+    @property
+    def sketchEntity(self):
+        self._api.call()
+        return self._curve
+
+
+class FakeProfileLoop:
+    def __init__(self, api, curves):
+        self._api = api
+        self._curves = FakeCollection(api, [FakeProfileCurve(api, c) for c in curves])
+
+    @property
+    def profileCurves(self):
+        self._api.call()
+        return self._curves
+
+
+class FakeProfile:
+    def __init__(self, api, curves):
+        self._api = api
+        self._loops = FakeCollection(api, [FakeProfileLoop(api, curves)])
+
+    @property
+    def profileLoops(self):
+        self._api.call()
+        return self._loops
+
+
+class FakeSketch:
+    def __init__(self, api, profiles_count, curves_per_profile=4):
+        self._api = api
+        self.curves = []
+        profiles = []
+        for i in range(profiles_count):
+            curves = [FakeCurve(api, self, "curve-{}-{}".format(i, j)) for j in range(curves_per_profile)]
+            self.curves.extend(curves)
+            profiles.append(FakeProfile(api, curves))
+        self._profiles = FakeCollection(api, profiles)
+
+    @property
+    def profiles(self):
+        self._api.call()
+        return self._profiles
+
+
+def measure(name, api, lookup, curves):
+    # lookup returns the profiles of all the curves
+    api.calls = 0
+    start = time.perf_counter()
+    if None in lookup(curves):
+        raise RuntimeError("Profile not found")
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>10.2f} ms {:>12} API calls".format(name, elapsed * 1000, api.calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the batched find_profiles with the per curve profiles scan")
+    parser.add_argument("--profiles", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=3)
+    parser.add_argument("--latency-us", type=float, default=0)
+    args = parser.parse_args()
+
+    api = ApiCounter(args.latency_us / 1000000)
+    sketch = FakeSketch(api, args.profiles)
+
+    # same access pattern as the HalfTail mode - lookups of curves from the last drawn profiles
+    curves = [sketch.curves[-1 - i * 4] for i in range(args.lookups)]
+
+    print("{} profiles, {} lookups".format(args.profiles, args.lookups))
+    measure("scan_profile_for_curve", api, lambda curves: [scan_profile_for_curve(curve) for curve in curves], curves)
+    measure("find_profiles", api, lambda curves: find_profiles(sketch, curves), curves)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#Description-Benchmarks the add-in load and the dialog open against the recording adsk stand-in.
+
+# Usage: python benchmarks/bench_startup.py [--repeat 10] [--invocations 20] [--latency-us 20]
+#
+# Every repeat runs in a fresh interpreter so the imports are cold as on Fusion launch and reports:
+# - load: importing the add-in package and run() registering the command, the API calls of run()
+#   and the number of modules the add-in imported (whether numpy is one of them)
+# - first dialog: the command definition execute() firing commandCreated for the first time after the load
+# - next dialogs: median of the following --invocations dialog opens (each closed right away)
+# with the number of the created dialog inputs and the subscribed event handlers of one dialog.
+# The stand-in doesn't load the dialog images so their cost in Fusion is only seen through the API calls.
+# --latency-us burns the specified time on every API call to simulate the round-trip to Fusion core.
+
+import argparse, json, os, statistics, subprocess, sys, time
+
+
+def count_inputs(inputs):
+    count = 0
+    for command_input in inputs:
+        count += 1
+        children = getattr(command_input, "children", None)
+        if children is not None:
+            count += count_inputs(children)
+    return count
+
+
+def measure(invocations, latency):
+    # runs in the child interpreter, returns the timings of one add-in load and its dialog opens
+    before = set(sys.modules)
+    from addin import load_addin, start_addin
+    import adsk.core, adsk.fusion
+    stand_in = set(sys.modules) - before
+
+    recorder = adsk.core.recorder
+    adsk.core.Application.reset()
+    app = adsk.core.Application.get()
+    app.activeProduct = adsk.fusion.Design()
+
+    start = time.perf_counter()
+    addin = load_addin()
+    import_time = time.perf_counter() - start
+    modules = set(sys.modules) - before - stand_in
+
+    recorder.reset()
+    recorder.start(latency)
+    start = time.perf_counter()
+    addin.run(None)
+    run_time = time.perf_counter() - start
+    recorder.stop()
+    run_calls = recorder.calls
+
+    definition = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID)
+    dialogs = []
+    for i in range(invocations + 1):
+        recorder.reset()
+        recorder.start(latency)
+        start = time.perf_counter()
+        command = definition.execute()
+        elapsed = time.perf_counter() - start
+        recorder.stop()
+        dialogs.append((elapsed, recorder.calls))
+        if i == 0:
+            inputs = count_inputs(command.commandInputs)
+            handlers = sum(len(registry.subscriptions) for registry in addin.command_handlers)
+        command.terminate()
+
+    if app.userInterface.messages:
+        raise RuntimeError(app.userInterface.messages[0])
+    return {
+        "import": import_time,
+        "run": run_time,
+        "run_calls": run_calls,
+        "modules": len(modules),
+        "numpy": "numpy" in modules,
+        "first_dialog": dialogs[0][0],
+        "first_dialog_calls": dialogs[0][1],
+        "next_dialog": statistics.median(t for (t, calls) in dialogs[1:]) if invocations else 0,
+        "next_dialog_calls": dialogs[-1][1],
+        "inputs": inputs,
+        "handlers": handlers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the add-in load and the dialog open against the recording adsk stand-in")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters to load the add-in in")
+    parser.add_argument("--invocations", type=int, default=20, help="dialog opens after the first one in every interpreter")
+    parser.add_argument("--latency-us", type=float, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.invocations, args.latency_us / 1000000)))
+        return 0
+
+    runs = []
+    for i in range(args.repeat):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--invocations", str(args.invocations),
+                                 "--latency-us", str(args.latency_us)], check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        runs.append(json.loads(output))
+
+    def median(name):
+        return statistics.median(run[name] for run in runs) * 1000
+
+    last = runs[-1]
+    print("Add-in load:   import {:.2f} ms, run() {:.2f} ms / {} API calls, {} modules imported{}".format(
+        median("import"), median("run"), last["run_calls"], last["modules"], " (with numpy)" if last["numpy"] else ""))
+    print("First dialog:  {:.2f} ms / {} API calls".format(median("first_dialog"), last["first_dialog_calls"]))
+    print("Next dialogs:  {:.2f} ms / {} API calls".format(median("next_dialog"), last["next_dialog_calls"]))
+    print("One dialog:    {} inputs, {} event handlers".format(last["inputs"], last["handlers"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+#Description-Checks the edge frames on a corpus of tricky face shapes against the adsk stand-in.
+
+# Usage: python benchmarks/check_geometry.py [--repeat 20] [--latency-us 0] [--no-execute]
+#
+# Builds parts with L-shaped, notched, comb, T-shaped, holed, concave and tilted faces and for every edge
+# of every face checks the resolved outward direction: a point just outside the edge midpoint along the frame Y
+# must be outside the face polygon and a point just inside it must be inside, for the model space frames,
+# the inward (pin sockets) frames and the frames of the sketches created on the faces. Curved faces and
+# edges of other faces must be rejected. Then the command is executed in every generation mode on the longer
+# edges of the top faces and the tails sketch points must be outside the face.
+#
+# Reports how many edges the previous face centroid based orientation got wrong and the time and the number
+# of API calls of resolving every edge with a cold cache and again with the cached geometry.
+
+import argparse, importlib, json, math, sys, time
+
+from addin import load_addin, start_addin
+from bench_execute import MODES, select
+import adsk.core, adsk.fusion
+
+THICKNESS = 1.8
+# offset of the probe points from the edge, in cm
+PROBE = 1e-3
+# edges shorter than this (in cm) are not used for the command execution
+MIN_EXECUTE_EDGE = 3
+
+
+def tilted():
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setToRotation(math.radians(37), adsk.core.Vector3D.create(1, 2, 3), adsk.core.Point3D.create(4, -5, 6))
+    for (i, offset) in enumerate((12.5, -3.25, 40)):
+        matrix.setCell(i, 3, matrix.getCell(i, 3) + offset)
+    return matrix
+
+
+# (name, outline, holes, transform, curved side faces)
+CASES = [
+    ("rectangle", [(0, 0), (30, 0), (30, 10), (0, 10)], [], None, ()),
+    ("L-shape", [(0, 0), (30, 0), (30, 4), (6, 4), (6, 20), (0, 20)], [], None, ()),
+    ("deep notch", [(0, 0), (30, 0), (30, 10), (17, 10), (17, 2), (13, 2), (13, 10), (0, 10)], [], None, ()),
+    ("comb", [(0, 0), (40, 0), (40, 12), (34, 12), (34, 3), (28, 3), (28, 12), (20, 12), (20, 3), (14, 3), (14, 12),
+              (6, 12), (6, 3), (0, 3)], [], None, ()),
+    ("T-shape", [(0, 16), (0, 12), (12, 12), (12, 0), (18, 0), (18, 12), (30, 12), (30, 16)], [], None, ()),
+    ("holed", [(0, 0), (30, 0), (30, 20), (0, 20)], [[(5, 5), (25, 5), (25, 15), (5, 15)]], None, ()),
+    ("concave arrow", [(0, 0), (20, 8), (0, 16), (6, 8)], [], None, ()),
+    ("clockwise outline", [(0, 0), (0, 10), (30, 10), (30, 0)], [], None, ()),
+    ("tilted L-shape", [(0, 0), (30, 0), (30, 4), (6, 4), (6, 20), (0, 20)], [], tilted(), ()),
+    ("tilted holed", [(0, 0), (30, 0), (30, 20), (0, 20)], [[(4, 4), (12, 4), (8, 14)]], tilted(), ()),
+    ("curved side", [(0, 0), (30, 0), (30, 10), (0, 10)], [], None, (1,)),
+]
+
+
+def _xyz(p):
+    return (p.x, p.y, p.z)
+
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _normalize(a):
+    length = math.sqrt(_dot(a, a))
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def face_polygons(face):
+    # loops of the face as 2D polygons in the face plane and the function projecting model points into it
+    loops = [[_xyz(coedge.edge.endVertex.geometry if coedge.isOpposedToEdge else coedge.edge.startVertex.geometry)
+              for coedge in loop.coEdges] for loop in face.loops]
+    origin = loops[0][0]
+    normal = _normalize(_xyz(face.evaluator.getNormalAtPoint(face.pointOnFace)[1]))
+    u = _normalize(_sub(loops[0][1], origin))
+    v = _cross(normal, u)
+
+    def project(p):
+        d = _sub(p, origin)
+        return (_dot(d, u), _dot(d, v))
+
+    return [[project(p) for p in loop] for loop in loops], project
+
+
+def inside(polygons, point):
+    # even-odd rule over all the loops
+    (x, y) = point
+    result = False
+    for polygon in polygons:
+        for (a, b) in zip(polygon, polygon[1:] + polygon[:1]):
+            if (a[1] > y) != (b[1] > y) and x < a[0] + (y - a[1]) * (b[0] - a[0]) / (b[1] - a[1]):
+                result = not result
+    return result
+
+
+def centroid_outward(face, edge):
+    # orientation of the frames before the topology based resolver: away from the face centroid
+    start = _xyz(edge.startVertex.geometry)
+    x_axis = _normalize(_sub(_xyz(edge.endVertex.geometry), start))
+    (res, normal) = face.evaluator.getNormalAtPoint(face.centroid)
+    y_axis = _cross(x_axis, _normalize(_xyz(normal)))
+    if _dot(y_axis, _sub(_xyz(face.centroid), start)) > 0:
+        y_axis = (-y_axis[0], -y_axis[1], -y_axis[2])
+    return y_axis
+
+
+def probe_failure(polygons, project, frame_point, length, inward):
+    # the point PROBE along the frame Y from the edge midpoint must be outside the face, the point PROBE
+    # along -Y inside of it (the other way round for the inward frames)
+    outside = project(frame_point(length / 2, PROBE))
+    within = project(frame_point(length / 2, -PROBE))
+    if inward:
+        (outside, within) = (within, outside)
+    if inside(polygons, outside) or not inside(polygons, within):
+        return "frame Y points {}".format("outward" if inward else "inward")
+    return None
+
+
+def check_edges(frames, case):
+    (name, outline, holes, transform, curved) = case
+    design = adsk.fusion.Design(name)
+    body = adsk.fusion.new_part(design.rootComponent, outline, THICKNESS, holes, name, transform, curved)
+    resolver = frames.EdgeGeometryResolver()
+    failures = []
+    checked = 0
+    centroid_wrong = 0
+    for (face_index, face) in enumerate(body.faces):
+        is_curved = face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType
+        polygons, project = face_polygons(face)
+        for (edge_index, edge) in enumerate(face.edges):
+            where = "{} face {} edge {}".format(name, face_index, edge_index)
+            if is_curved:
+                try:
+                    frames.model_frame(face, edge, resolver=resolver)
+                    failures.append("{}: curved face accepted".format(where))
+                except ValueError:
+                    pass
+                continue
+
+            checked += 1
+            length = edge.length
+            for inward in (False, True):
+                frame = frames.model_frame(face, edge, inward, resolver)
+                error = probe_failure(polygons, project, lambda x, y: _xyz(frame.point(x, y)), length, inward)
+                if error:
+                    failures.append("{}{}: {}".format(where, " inward" if inward else "", error))
+
+            sketch = design.rootComponent.sketches.add(face)
+            projected_edge = sketch.project(edge)[0]
+            frame = frames.sketch_frame(sketch, face, edge, projected_edge, resolver=resolver)
+            error = probe_failure(polygons, project, lambda x, y: _xyz(sketch.sketchToModelSpace(frame.point(x, y))), length, False)
+            if error:
+                failures.append("{} sketch: {}".format(where, error))
+            sketch.deleteMe()
+
+            outward = frames.model_frame(face, edge, resolver=resolver).y_axis
+            if _dot(centroid_outward(face, edge), outward) < 0:
+                centroid_wrong += 1
+
+    # edges of other faces are rejected
+    top = body.faces.item(1)
+    foreign = [e for e in body.faces.item(0).edges if e not in top.edges][:1]
+    for edge in foreign:
+        try:
+            frames.model_frame(top, edge, resolver=resolver)
+            failures.append("{}: edge of another face accepted".format(name))
+        except ValueError:
+            pass
+    return failures, checked, centroid_wrong
+
+
+def check_execute(case):
+    # runs the command on the top face edges and checks the tails are drawn outside of the face
+    (name, outline, holes, transform, curved) = case
+    failures = []
+    runs = 0
+    for mode in MODES.values():
+        for edge_index in range(len(outline) + sum(len(h) for h in holes)):
+            design = adsk.fusion.Design(name)
+            body = adsk.fusion.new_part(design.rootComponent, outline, THICKNESS, holes, name, transform, curved)
+            face = body.faces.item(1)
+            edge = face.edges.item(edge_index)
+            if edge.length < MIN_EXECUTE_EDGE:
+                continue
+            polygons, project = face_polygons(face)
+
+            addin, app = start_addin(design)
+            command = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID).execute()
+            inputs = command.commandInputs
+            inputs.itemById("face").addSelection(face)
+            inputs.itemById("edge").addSelection(edge)
+            inputs.itemById("edge_length").expression = "{} mm".format(round(edge.length * 10, 6))
+            inputs.itemById("pin").expression = "6 mm"
+            inputs.itemById("height").expression = "5 mm"
+            select(inputs.itemById("generation_mode"), mode)
+            command.doExecute(False)
+            command.terminate()
+            runs += 1
+
+            where = "{} / {} / edge {}".format(name, mode, edge_index)
+            if app.userInterface.messages:
+                failures.append("{}: {}".format(where, app.userInterface.messages[0].splitlines()[-1]))
+                continue
+            # tails points off the edge line must be outside the face
+            start = _xyz(edge.startVertex.geometry)
+            direction = _normalize(_sub(_xyz(edge.endVertex.geometry), start))
+            for sketch in design.rootComponent.sketches:
+                for line in sketch.sketchCurves.sketchLines:
+                    for point in (line.startSketchPoint, line.endSketchPoint):
+                        p = _xyz(sketch.sketchToModelSpace(point.geometry))
+                        d = _sub(p, start)
+                        off = _sub(d, tuple(c * _dot(d, direction) for c in direction))
+                        if _dot(off, off) > PROBE * PROBE and inside(polygons, project(p)):
+                            failures.append("{}: tail point {} inside the face".format(where, p))
+                            break
+    return failures, runs
+
+
+def time_resolver(frames, repeat, latency):
+    # (cold, cached) time in us and API calls per edge over all the planar edges of the corpus
+    pairs = []
+    for (name, outline, holes, transform, curved) in CASES:
+        design = adsk.fusion.Design(name)
+        body = adsk.fusion.new_part(design.rootComponent, outline, THICKNESS, holes, name, transform, curved)
+        pairs += [(f, e) for f in body.faces if f.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType for e in f.edges]
+
+    recorder = adsk.core.recorder
+    results = []
+    for cached in (False, True):
+        resolver = frames.EdgeGeometryResolver(max_size=len(pairs))
+        if cached:
+            for (face, edge) in pairs:
+                resolver.resolve(face, edge)
+        times = []
+        for i in range(repeat):
+            if not cached:
+                resolver.clear()
+            recorder.reset()
+            recorder.start(latency)
+            start = time.perf_counter()
+            for (face, edge) in pairs:
+                frames.model_frame(face, edge, resolver=resolver)
+            times.append(time.perf_counter() - start)
+            recorder.stop()
+        results.append((min(times) / len(pairs) * 1000000, recorder.calls / len(pairs)))
+    return results, len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the edge frames on a corpus of tricky face shapes against the adsk stand-in")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency-us", type=float, default=0)
+    parser.add_argument("--no-execute", action="store_true", help="skip the command execution on the corpus")
+    args = parser.parse_args()
+
+    load_addin()
+    frames = importlib.import_module("Dovetails.dovetail_frame")
+
+    failures = []
+    print("{:<20} {:>7} {:>10} {:>15} {:>10}".format("Case", "Edges", "Failures", "Centroid wrong", "Runs"))
+    for case in CASES:
+        (errors, checked, centroid_wrong) = check_edges(frames, case)
+        runs = 0
+        if not args.no_execute:
+            (execute_errors, runs) = check_execute(case)
+            errors += execute_errors
+        failures += errors
+        print("{:<20} {:>7} {:>10} {:>15} {:>10}".format(case[0], checked, len(errors), centroid_wrong, runs))
+
+    ((cold_time, cold_calls), (cached_time, cached_calls)), edges = time_resolver(frames, args.repeat, args.latency_us / 1000000)
+    print("\nResolving {} edges: cold {:.1f} us / {:.1f} API calls per edge, cached {:.1f} us / {:.1f} API calls per edge".format(
+        edges, cold_time, cold_calls, cached_time, cached_calls))
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#Description-Checks that command invocations don't leak event handlers or memory.
+
+# Usage: python benchmarks/check_handler_lifecycle.py [--invocations 5000]
+#
+# Opens and closes the command dialog many times against the adsk stand-in and samples
+# the number of live handler objects and the traced memory. Exits with non-zero code
+# when either of them grows.
+
+import argparse, gc, sys, tracemalloc
+
+from addin import start_addin
+import adsk.core
+
+
+def live_handlers():
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, adsk.core.EventHandler))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that command invocations don't leak event handlers or memory")
+    parser.add_argument("--invocations", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--max-growth-kb", type=float, default=64)
+    args = parser.parse_args()
+
+    addin, app = start_addin()
+    definition = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID)
+
+    def invoke():
+        command = definition.execute()
+        command.terminate()
+
+    # warm up caches and lazy imports before taking the baseline
+    for i in range(100):
+        invoke()
+
+    gc.collect()
+    tracemalloc.start()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    baseline_handlers = live_handlers()
+
+    print("{:>12} {:>14} {:>16} {:>18}".format("Invocations", "Live handlers", "Live registries", "Memory growth, KB"))
+    step = max(1, args.invocations // args.samples)
+    for i in range(1, args.invocations + 1):
+        invoke()
+        if i % step == 0:
+            gc.collect()
+            growth = (tracemalloc.get_traced_memory()[0] - baseline_memory) / 1024
+            print("{:>12} {:>14} {:>16} {:>18.1f}".format(i, live_handlers(), len(addin.command_handlers), growth))
+
+    gc.collect()
+    growth = (tracemalloc.get_traced_memory()[0] - baseline_memory) / 1024
+    handlers = live_handlers()
+    failures = []
+    if app.userInterface.messages:
+        failures.append("add-in reported errors:\n{}".format(app.userInterface.messages[0]))
+    if handlers != baseline_handlers or addin.command_handlers:
+        failures.append("handlers leaked: {} live handlers, {} at the baseline".format(handlers, baseline_handlers))
+    if growth > args.max_growth_kb:
+        failures.append("memory grew by {:.1f} KB".format(growth))
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
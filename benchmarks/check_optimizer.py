@@ -0,0 +1,130 @@
+#Description-Checks the layout optimizer of the dialog end to end against the adsk stand-in.
+
+# Usage: python benchmarks/check_optimizer.py [--edge-lengths 100,250,600] [--timeout 10]
+#
+# For every start type and edge length opens the dialog on a board, presses "Find layouts", waits for
+# the worker thread to post the candidates back through the custom event, applies every listed candidate
+# and creates the dovetails with it. Fails when the created joint has a different number of tails or
+# tails width than the candidate, when any pin of the created layout (the end pins included) is narrower at
+# the top of the tails than the minimum pin width or the bit, or when the search fired its event after the inputs
+# were changed. The search runs with the default dialog inputs and with high tails and wide minimum pins.
+
+import argparse, json, sys
+
+from bench_execute import new_design, select
+from addin import load_addin, start_addin
+import adsk.core
+
+
+def change_input(command, input):
+    command.inputChanged.fire(adsk.core.InputChangedEventArgs(adsk.core.FiringEvent(command), input))
+
+
+# the dialog defaults and high tails leaning far over the pins with wide minimum pins
+INPUT_SETS = ({}, {"height": "18 mm", "min_pin": "8 mm"})
+
+
+def open_dialog(edge_length, expressions={}):
+    design, face, edge = new_design(edge_length, 0)
+    addin, app = start_addin(design)
+    command = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID).execute()
+    inputs = command.commandInputs
+    inputs.itemById("face").addSelection(face)
+    inputs.itemById("edge").addSelection(edge)
+    inputs.itemById("edge_length").expression = "{} mm".format(edge_length)
+    for (input_id, expression) in expressions.items():
+        inputs.itemById(input_id).expression = expression
+    return design, app, command, inputs
+
+
+def narrowest_pin(design):
+    # narrowest gap between the tops of the created tails and from the edge ends to them, in mm
+    layouts = sys.modules[load_addin().__name__ + ".dovetail_layout"]
+    value = lambda name: design.userParameters.itemByName("dovetails_" + name).value
+    record = json.loads(design.attributes.itemByName("Dovetails", "dovetails_joint").value)
+    layout = layouts.solve_layout(layouts.DovetailStartType(record["start_type"]), value("edge_length"), value("pin"),
+                                  value("ratio"), value("angle"), value("height"))
+    tops = sorted((min(x for (x, y) in tail[2:]), max(x for (x, y) in tail[2:])) for tail in layout.tails + layout.half_tails)
+    gaps = [tops[i + 1][0] - tops[i][1] for i in range(len(tops) - 1)]
+    # the half tails of "Half tail" reach the edge ends, the other start types have end pins there
+    gaps += [gap for gap in (tops[0][0], layout.edge_length - tops[-1][1]) if gap > 1e-9]
+    return min(gaps) * 10
+
+
+def find_layouts(app, command, inputs, timeout):
+    change_input(command, inputs.itemById("optimize"))
+    if not app.processCustomEvents(timeout):
+        raise RuntimeError("The optimizer didn't post the results in {} s".format(timeout))
+    return [item.name for item in inputs.itemById("optimizer_results").listItems]
+
+
+def check(start_type, edge_length, expressions, timeout):
+    failures = []
+    design, app, command, inputs = open_dialog(edge_length, expressions)
+    select(inputs.itemById("start_type"), start_type)
+    names = find_layouts(app, command, inputs, timeout)
+    command.terminate()
+    if not names:
+        return ["{} / {} mm: no layouts found".format(start_type, edge_length)], 0
+
+    for index in range(len(names)):
+        design, app, command, inputs = open_dialog(edge_length, expressions)
+        select(inputs.itemById("start_type"), start_type)
+        find_layouts(app, command, inputs, timeout)
+        min_pin = max(inputs.itemById("min_pin").value, inputs.itemById("bit_diameter").value) * 10
+        results = inputs.itemById("optimizer_results")
+        results.listItems[index].isSelected = True
+        change_input(command, results)
+        command.doExecute(False)
+        command.terminate()
+
+        record = json.loads(design.attributes.itemByName("Dovetails", "dovetails_joint").value)
+        tail = design.userParameters.itemByName("dovetails_tail").value * 10
+        # the list items start with "<count> tails <width> mm"
+        (count_text, tail_text) = names[index].split(" mm")[0].split(" tails ")
+        if app.userInterface.messages:
+            failures.append("{} / {} mm / {}: {}".format(start_type, edge_length, names[index], app.userInterface.messages[0]))
+        elif record["count"] != int(count_text) or "{:.2f}".format(tail) != tail_text:
+            failures.append("{} / {} mm / {}: created {} tails {:.2f} mm".format(start_type, edge_length, names[index], record["count"], tail))
+        elif narrowest_pin(design) < min_pin - 1e-6:
+            failures.append("{} / {} mm / {}: pin narrows to {:.2f} mm, minimum {:g} mm".format(
+                start_type, edge_length, names[index], narrowest_pin(design), min_pin))
+    return failures, len(names)
+
+
+def check_outdated(timeout):
+    # results of the search started before the inputs changed must not be shown
+    design, app, command, inputs = open_dialog(300)
+    change_input(command, inputs.itemById("optimize"))
+    change_input(command, inputs.itemById("height"))
+    # the outdated search doesn't fire the event at all
+    app.processCustomEvents(min(timeout, 1))
+    names = [item.name for item in inputs.itemById("optimizer_results").listItems]
+    command.terminate()
+    return ["outdated search results shown: {}".format(names)] if names else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the layout optimizer of the dialog end to end against the adsk stand-in")
+    parser.add_argument("--edge-lengths", default="100,250,600", help="comma separated edge lengths in mm")
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    failures = check_outdated(args.timeout)
+    for expressions in INPUT_SETS:
+        for start_type in [st.value for st in load_addin().DovetailStartType]:
+            for edge_length in [float(x) for x in args.edge_lengths.split(",")]:
+                (errors, checked) = check(start_type, edge_length, expressions, args.timeout)
+                print("{:<10} {:>8g} mm {:>3} layouts applied  {}".format(start_type, edge_length, checked,
+                                                                      ", ".join("{} {}".format(*x) for x in expressions.items()) or "defaults"))
+                failures.extend(errors)
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#Description-Checks that a failed command execution leaves the design as it was against the adsk stand-in.
+
+# Usage: python benchmarks/check_transaction.py
+#
+# Runs the command with one of the Fusion API calls made to fail half way through the creation and checks
+# the error shown is the original one and that no bodies, sketches, features, user parameters or joint
+# attributes are left behind, for the direct and the parametric designs and every generation mode.
+# Then adds the faces of another board to an existing joint with other inputs (also the ones the joint
+# follows through its user parameters), which has to be rejected
+# without touching the existing dovetails, and rebuilds existing dovetails with another start type - the old
+# features have to be restored if the rebuild fails and be gone when it succeeds. Finally makes the rollback
+# fail too and checks the error shown is still the original one and tells the cleanup is incomplete.
+
+import sys
+
+from bench_execute import MODES, new_design, new_pins_board, select
+from addin import start_addin
+import adsk.fusion
+
+FAILURE = "Simulated API failure"
+
+
+class failing:
+    # makes the method of the stand-in object raise while active
+    def __init__(self, owner, name, message=FAILURE):
+        self.owner = owner
+        self.name = name
+        self.message = message
+
+    def __enter__(self):
+        def fail(*args, **kwargs):
+            raise RuntimeError(self.message)
+        setattr(self.owner, self.name, fail)
+
+    def __exit__(self, *args):
+        delattr(self.owner, self.name)
+        return False
+
+
+def design_state(design):
+    component = design.rootComponent
+    return {
+        "bodies": component.bRepBodies.count,
+        "sketches": component.sketches.count,
+        "timeline": design.timeline.count,
+        "parameters": design.userParameters.count,
+        "attributes": len(design.attributes.itemsByGroup("Dovetails")),
+        "suppressed": len([item for item in design.timeline if item.isSuppressed]),
+    }
+
+
+def execute(design, face, edge, mode, inputs_setup=None):
+    addin, app = start_addin(design)
+    command = app.userInterface.commandDefinitions.itemById(addin.COMMAND_ID).execute()
+    inputs = command.commandInputs
+    if face is not None:
+        inputs.itemById("face").addSelection(face)
+        inputs.itemById("edge").addSelection(edge)
+    select(inputs.itemById("generation_mode"), mode)
+    if inputs_setup:
+        inputs_setup(inputs)
+    command.doExecute(False)
+    command.terminate()
+    return app.userInterface.messages
+
+
+def check_failure(mode, direct, failing_call):
+    design, face, edge = new_design(100, 0)
+    if direct:
+        design.designType = adsk.fusion.DesignTypes.DirectDesignType
+    before = design_state(design)
+    with failing(*failing_call(design)):
+        messages = execute(design, face, edge, mode)
+    errors = []
+    if not messages or FAILURE not in messages[0]:
+        errors.append("original error not shown: {}".format(messages[:1]))
+    after = design_state(design)
+    if after != before:
+        errors.append("design changed from {} to {}".format(before, after))
+    return errors
+
+
+def check_rejected_add(mode, other_mode, inputs_setup=None):
+    design, face, edge = new_design(100, 0)
+    # the dialog remembers the inputs of the previous run, the joint is created with the default pin
+    messages = execute(design, face, edge, MODES[mode], lambda inputs: setattr(inputs.itemById("pin"), "expression", "11 mm"))
+    if messages:
+        return ["joint not created: {}".format(messages[0])]
+    before = design_state(design)
+    (other_face, other_edge) = new_pins_board(design, 100)
+    before["bodies"] += 1
+    messages = execute(design, other_face, other_edge, MODES[other_mode], inputs_setup)
+    errors = []
+    if not messages or "already exist with other inputs" not in messages[0]:
+        errors.append("adding faces with other inputs not rejected: {}".format(messages[:1]))
+    after = design_state(design)
+    if after != before:
+        errors.append("design changed from {} to {}".format(before, after))
+    return errors
+
+
+def check_rebuild(mode, failing_call):
+    design, face, edge = new_design(100, 0)
+    messages = execute(design, face, edge, MODES[mode], lambda inputs: select(inputs.itemById("start_type"), "Half pin"))
+    if messages:
+        return ["joint not created: {}".format(messages[0])]
+    before = design_state(design)
+    old_entities = [item.entity for item in design.timeline]
+    rebuild = lambda inputs: select(inputs.itemById("start_type"), "Full pin")
+    errors = []
+    if failing_call:
+        with failing(*failing_call(design)):
+            messages = execute(design, None, None, MODES[mode], rebuild)
+        if not messages or FAILURE not in messages[0]:
+            errors.append("original error not shown: {}".format(messages[:1]))
+        after = design_state(design)
+        if after != before:
+            errors.append("design changed from {} to {}".format(before, after))
+    else:
+        messages = execute(design, None, None, MODES[mode], rebuild)
+        if messages:
+            errors.append("rebuild failed: {}".format(messages[0]))
+        after = design_state(design)
+        if after["suppressed"] or after["bodies"] != before["bodies"]:
+            errors.append("design changed from {} to {}".format(before, after))
+        if [entity for entity in old_entities if entity.isValid]:
+            errors.append("old geometry not deleted")
+    return errors
+
+
+def check_failed_rollback():
+    # the extrude fails and the timeline items added before it can't be fetched to be deleted
+    design, face, edge = new_design(100, 0)
+    with failing(design.rootComponent.features.extrudeFeatures, "addSimple"):
+        with failing(design.timeline, "item", "Simulated rollback failure"):
+            messages = execute(design, face, edge, MODES["single"])
+    errors = []
+    if not messages or FAILURE not in messages[0]:
+        errors.append("original error not shown: {}".format(messages[:1]))
+    elif "Rolling back the changes failed" not in messages[0] or "Simulated rollback failure" not in messages[0]:
+        errors.append("failed rollback not reported: {}".format(messages[0]))
+    return errors
+
+
+def main():
+    features = lambda design: design.rootComponent.features
+    cases = [
+        # the tails body is added to the design before the combine fails
+        ("fast", True, lambda design: (features(design).combineFeatures, "add")),
+        ("fast", False, lambda design: (features(design).combineFeatures, "add")),
+        ("single", False, lambda design: (features(design).extrudeFeatures, "addSimple")),
+        ("pattern", False, lambda design: (features(design).rectangularPatternFeatures, "add")),
+    ]
+
+    failures = []
+    for (mode, direct, failing_call) in cases:
+        errors = check_failure(MODES[mode], direct, failing_call)
+        print("{:<28} {:<11} {}".format(MODES[mode], "direct" if direct else "parametric", "FAILED" if errors else "OK"))
+        failures += ["{} / {}: {}".format(mode, "direct" if direct else "parametric", e) for e in errors]
+
+    for (mode, other_mode) in (("pattern", "single"), ("single", "fast"), ("fast", "pattern")):
+        errors = check_rejected_add(mode, other_mode)
+        print("{:<28} {:<11} {}".format("Add {} to {}".format(other_mode, mode), "parametric", "FAILED" if errors else "OK"))
+        failures += ["add {} to {}: {}".format(other_mode, mode, e) for e in errors]
+
+    # the pin width is followed by the user parameters of the parametric modes
+    other_pin = lambda inputs: setattr(inputs.itemById("pin"), "expression", "12 mm")
+    for mode in ("pattern", "single", "fast"):
+        errors = check_rejected_add(mode, mode, other_pin)
+        print("{:<28} {:<11} {}".format("Add {} with other pin".format(mode), "parametric", "FAILED" if errors else "OK"))
+        failures += ["add {} with other pin: {}".format(mode, e) for e in errors]
+
+    for (mode, failing_call) in (("pattern", None), ("single", None),
+                                 ("pattern", lambda design: (features(design).rectangularPatternFeatures, "add")),
+                                 ("single", lambda design: (features(design).extrudeFeatures, "addSimple"))):
+        errors = check_rebuild(mode, failing_call)
+        print("{:<28} {:<11} {}".format("Rebuild {}{}".format(mode, " failing" if failing_call else ""), "parametric", "FAILED" if errors else "OK"))
+        failures += ["rebuild {}{}: {}".format(mode, " failing" if failing_call else "", e) for e in errors]
+
+    errors = check_failed_rollback()
+    print("{:<28} {:<11} {}".format("Failed rollback", "parametric", "FAILED" if errors else "OK"))
+    failures += ["failed rollback: {}".format(e) for e in errors]
+
+    for failure in failures:
+        print("FAILED: " + failure)
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#Description-Direct B-Rep construction of the dovetails solids with the temporary B-Rep manager.
+
+import adsk.core, adsk.fusion, math
+
+
+def _signed_area(vertices):
+    area = 0
+    for i in range(len(vertices)):
+        x1, y1 = vertices[i]
+        x2, y2 = vertices[(i + 1) % len(vertices)]
+        area += x1 * y2 - x2 * y1
+    return area / 2
+
+
+def create_prism(tbm, frame, vertices, thickness):
+    # Creates temporary body of the convex polygon (in the frame XY plane) extruded by the thickness
+    # into the face (negative Z). Starts from the bounding box and cuts away everything outside
+    # of the slanted polygon sides with big boxes.
+    if _signed_area(vertices) < 0:
+        vertices = list(reversed(vertices))
+
+    xs = [v[0] for v in vertices]
+    ys = [v[1] for v in vertices]
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+    size = math.hypot(max_x - min_x, max_y - min_y)
+
+    box = adsk.core.OrientedBoundingBox3D.create(frame.point((min_x + max_x) / 2, (min_y + max_y) / 2, -thickness / 2),
+                                                 frame.vector(1, 0), frame.vector(0, 1),
+                                                 max_x - min_x, max_y - min_y, thickness)
+    body = tbm.createBox(box)
+
+    for i in range(len(vertices)):
+        (x1, y1), (x2, y2) = vertices[i], vertices[(i + 1) % len(vertices)]
+        if x1 == x2 or y1 == y2:
+            # sides parallel to the frame axes lay on the bounding box already
+            continue
+
+        length = math.hypot(x2 - x1, y2 - y1)
+        dx, dy = (x2 - x1) / length, (y2 - y1) / length
+        # polygon is counterclockwise so the outside is on the right of the side
+        nx, ny = dy, -dx
+        center_x = (x1 + x2) / 2 + nx * size / 2
+        center_y = (y1 + y2) / 2 + ny * size / 2
+        cutter = tbm.createBox(adsk.core.OrientedBoundingBox3D.create(frame.point(center_x, center_y, -thickness / 2),
+                                                                      frame.vector(dx, dy), frame.vector(nx, ny),
+                                                                      length + 2 * size, size, thickness * 2))
+        tbm.booleanOperation(body, cutter, adsk.fusion.BooleanTypes.DifferenceBooleanType)
+
+    return body
+
+
+def create_tails_body(frame, layout, thickness):
+    # Creates single temporary body with all the tails (and half tails) of the layout
+    tbm = adsk.fusion.TemporaryBRepManager.get()
+    body = None
+    for vertices in layout.half_tails + layout.tails:
+        tail = create_prism(tbm, frame, vertices, thickness)
+        if body is None:
+            body = tail
+        else:
+            tbm.booleanOperation(body, tail, adsk.fusion.BooleanTypes.UnionBooleanType)
+    return body
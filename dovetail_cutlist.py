@@ -0,0 +1,246 @@
+#Description-Solves dovetail layouts of cut lists without Fusion, streaming boards from CSV/JSONL to JSONL.
+
+# Usage: python dovetail_cutlist.py [cut list|-] [--format csv|jsonl] [--output layouts.jsonl] [--jobs N]
+#                                   [--start-type "Full pin"] [--pin 11] [--ratio 2] [--angle 7] [--height 10] [--digits 6]
+#
+# Every board of the cut list (a CSV row with a header or a JSON object per line) has the columns:
+#   id          - optional, copied to the output
+#   start_type  - "Full pin", "Half pin" or "Half tail" (or FullPin, half_tail...)
+#   edge_length - length of the edge the dovetails are placed on
+#   pin, ratio, height - same as in the dialog, all lengths in the same units
+#   angle       - in degrees
+# Missing or empty columns are taken from the command line options.
+#
+# For every board one JSON line is written in the cut list order:
+#   {"row": 1, "id": ..., "start_type": "Full pin", "edge_length": ..., "pin": ..., "ratio": ..., "angle": ..., "height": ...,
+#    "count": 4, "tail": 17.25, "tails": [[[x, y] x 4] per tail], "half_tails": [...], "errors": []}
+# Tails are described by their 4 vertices in the edge frame as in dovetail_layout. Boards which can't have dovetails
+# with the given parameters have count 0, no tails and the reasons in "errors". Infinite and NaN inputs are written
+# as the strings "inf", "-inf" and "nan" so every line is strict JSON. Tail widths and coordinates are
+# rounded to --digits decimal places which keeps the output short and its formatting fast.
+#
+# Boards are read lazily, solved in chunks by a pool of processes (numpy vectorized when available) and written
+# as soon as their chunk is done - only a few chunks per process are kept in memory at any time.
+
+import argparse, collections, csv, itertools, json, math, multiprocessing, os, sys, time
+from dovetail_layout import DovetailStartType, DovetailLayout, solve_layouts
+
+CHUNK_SIZE = 2000
+DIGITS = 6
+
+# columns of the cut list with their command line defaults
+BOARD_COLUMNS = ("start_type", "edge_length", "pin", "ratio", "angle", "height")
+
+
+def parse_start_type(value):
+    if isinstance(value, DovetailStartType):
+        return value
+    key = str(value).replace(" ", "").replace("_", "").lower()
+    for st in DovetailStartType:
+        if key == st.name.lower():
+            return st
+    raise ValueError("Unknown start type \"{}\"".format(value))
+
+
+def parse_board(row, defaults):
+    # (start type, edge length, pin, ratio, angle in radians, height) of the cut list row
+    values = {}
+    for name in BOARD_COLUMNS:
+        value = row.get(name)
+        if value is None or value == "":
+            value = defaults.get(name)
+        if value is None:
+            raise ValueError("No {} specified".format(name))
+        if name == "start_type":
+            values[name] = parse_start_type(value)
+        else:
+            try:
+                values[name] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid {} \"{}\"".format(name, value))
+    return (values["start_type"], values["edge_length"], values["pin"], values["ratio"], math.radians(values["angle"]), values["height"])
+
+
+def _json_number(value):
+    # JSON has no infinity and NaN, they are written as the strings float() parses back
+    return value if math.isfinite(value) else str(value)
+
+
+def _board_record(number, row, board):
+    record = {"row": number}
+    if isinstance(row, dict) and row.get("id") not in (None, ""):
+        record["id"] = _json_number(row["id"]) if isinstance(row["id"], float) else row["id"]
+    if board:
+        (start_type, edge_length, pin, ratio, angle, height) = board
+        record.update({"start_type": start_type.value, "edge_length": _json_number(edge_length), "pin": _json_number(pin),
+                       "ratio": _json_number(ratio), "angle": _json_number(math.degrees(angle)), "height": _json_number(height)})
+    return record
+
+
+def _split(values, sizes):
+    # splits the flat list of values into the consecutive lists of the given sizes
+    result = []
+    start = 0
+    for size in sizes:
+        result.append(values[start:start + size])
+        start += size
+    return result
+
+
+def _rounded_list(vertices, digits):
+    if hasattr(vertices, "round"):
+        return vertices.round(digits).tolist()
+    return [[[round(x, digits), round(y, digits)] for (x, y) in tail] for tail in vertices]
+
+
+def _no_layout(errors):
+    return {"count": 0, "tail": 0.0, "tails": [], "half_tails": [], "errors": errors}
+
+
+def _solve_board(board, digits):
+    # layout fields of one board solved on its own, whatever goes wrong ends up in its errors
+    try:
+        layout = DovetailLayout(*board)
+        if not layout.is_valid:
+            return _no_layout(layout.errors)
+        return {"count": layout.count, "tail": round(layout.tail, digits), "tails": _rounded_list(layout.tails, digits),
+                "half_tails": _rounded_list(layout.half_tails, digits), "errors": []}
+    except Exception as e:
+        return _no_layout(["Unable to solve the layout: {}".format(e)])
+
+
+def solve_rows(rows, defaults, digits=DIGITS):
+    # Solves one chunk of (row number, row) pairs and returns their JSON lines as one text with the number
+    # of the boards and of the infeasible ones among them. Rows are CSV dicts or raw JSON lines, so the parsing
+    # happens in the worker process too.
+    # A bad row never aborts the chunk - it gets its own line with the errors.
+    records = []
+    boards = []
+    for (number, row) in rows:
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+                if not isinstance(row, dict):
+                    raise ValueError("Board must be a JSON object")
+            board = parse_board(row, defaults)
+        except Exception as e:
+            record = _board_record(number, row, None)
+            record.update(_no_layout([str(e)]))
+            records.append(record)
+            continue
+        records.append((_board_record(number, row, board), len(boards)))
+        boards.append(board)
+
+    solved = False
+    if boards:
+        try:
+            batch = solve_layouts(*[list(column) for column in zip(*boards)])
+            valid = [bool(v) for v in batch.valid]
+            tails = _split(_rounded_list(batch.tail_vertices()[1], digits), [int(c) if v else 0 for c, v in zip(batch.counts, valid)])
+            half_tails = _split(_rounded_list(batch.half_tail_vertices()[1], digits),
+                                [2 if v and b[0] == DovetailStartType.HalfTail else 0 for b, v in zip(boards, valid)])
+            counts = [int(c) for c in batch.counts]
+            tail_widths = [round(float(t), digits) for t in batch.tails]
+            solved = True
+        except Exception:
+            # the boards of the chunk are solved one by one below so only the bad ones get errors
+            pass
+
+    lines = []
+    infeasible = 0
+    for record in records:
+        if isinstance(record, tuple):
+            (record, i) = record
+            if solved and valid[i]:
+                record.update({"count": counts[i], "tail": tail_widths[i], "tails": tails[i], "half_tails": half_tails[i], "errors": []})
+            else:
+                # the errors of the invalid boards come from their own layouts
+                record.update(_solve_board(boards[i], digits))
+        if record["errors"]:
+            infeasible += 1
+        lines.append(json.dumps(record, separators=(",", ":"), allow_nan=False))
+    return "\n".join(lines) + "\n", len(lines), infeasible
+
+
+def read_rows(stream, format):
+    # CSV rows as dicts, JSON lines as raw text parsed by the workers
+    if format == "csv":
+        for row in csv.DictReader(stream):
+            yield row
+    else:
+        for line in stream:
+            if line.strip():
+                yield line
+
+
+def _chunks(rows, size):
+    numbered = enumerate(rows, 1)
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_cutlist(rows, defaults, jobs=None, chunk_size=CHUNK_SIZE, digits=DIGITS):
+    # Yields the results of solve_rows() chunk by chunk in the cut list order. At most 2 chunks
+    # per process are submitted ahead of the written ones so memory use doesn't grow with the cut list size.
+    jobs = jobs or os.cpu_count() or 1
+    chunks = _chunks(rows, chunk_size)
+    if jobs == 1:
+        for chunk in chunks:
+            yield solve_rows(chunk, defaults, digits)
+        return
+
+    with multiprocessing.Pool(jobs) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(solve_rows, (chunk, defaults, digits)))
+            if len(pending) >= jobs * 2:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Solves dovetail layouts of cut lists streaming them from CSV/JSONL to JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="cut list file, - for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="cut list format, by default from the file extension (csv for the standard input)")
+    parser.add_argument("--output", default="-", help="layouts JSONL file, - for standard output")
+    parser.add_argument("--jobs", type=int, default=0, help="number of worker processes, by default one per CPU")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="boards solved by a worker at once")
+    parser.add_argument("--start-type", default=DovetailStartType.FullPin.value)
+    parser.add_argument("--edge-length", type=float)
+    parser.add_argument("--pin", type=float, default=11)
+    parser.add_argument("--ratio", type=float, default=2)
+    parser.add_argument("--angle", type=float, default=7, help="in degrees")
+    parser.add_argument("--height", type=float, default=10)
+    parser.add_argument("--digits", type=int, default=DIGITS, help="decimal places of the tail widths and coordinates")
+    args = parser.parse_args(argv)
+
+    defaults = {"start_type": parse_start_type(args.start_type), "edge_length": args.edge_length, "pin": args.pin,
+                "ratio": args.ratio, "angle": args.angle, "height": args.height}
+    format = args.format or ("jsonl" if args.input.lower().endswith((".jsonl", ".json")) else "csv")
+
+    input = sys.stdin if args.input == "-" else open(args.input, newline="")
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    start = time.perf_counter()
+    boards = 0
+    infeasible = 0
+    try:
+        for (text, chunk_boards, chunk_infeasible) in solve_cutlist(read_rows(input, format), defaults, args.jobs, args.chunk_size, args.digits):
+            output.write(text)
+            boards += chunk_boards
+            infeasible += chunk_infeasible
+    finally:
+        if input is not sys.stdin:
+            input.close()
+        if output is not sys.stdout:
+            output.close()
+
+    sys.stderr.write("{} boards ({} infeasible) in {:.2f} s\n".format(boards, infeasible, time.perf_counter() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,246 @@
+#Description-Writes 2D outlines of the tails and pin sockets to DXF and SVG straight from the layouts, without Fusion.
+
+# Usage: python dovetail_export.py output.dxf|output.svg [--cutlist boards.csv|boards.jsonl|-]
+#                                  [--start-type "Full pin"] [--edge-length 100] [--pin 11] [--ratio 2] [--angle 7] [--height 10]
+#                                  [--sheet-width 1200] [--gap 5] [--label-height 6]
+#
+# Without --cutlist one board with the given parameters is exported. With --cutlist every board of the cut list
+# (same columns as in dovetail_cutlist.py, missing ones are taken from the options) is nested into the one file.
+#
+# Outlines are drawn in the edge frame of every board: X runs along the edge, Y outward from it, lengths are written
+# as they are given (millimeters). Every tail (and half tail) is a closed polygon on the TAILS layer, the pin sockets -
+# the gaps between the tails and the edge ends which are cut away from the tails board and receive the pins -
+# are closed polygons on the PIN_SOCKETS layer, so together they tile the edge_length x height rectangle.
+# Boards are placed into shelves of the sheet width with the labels (cut list id or row number) under them.
+
+import json, sys
+from dovetail_layout import DovetailStartType, solve_layout
+
+SHEET_WIDTH = 1200
+GAP = 5
+LABEL_HEIGHT = 6
+# decimal places of the written coordinates
+DIGITS = 4
+
+TAILS_LAYER = "TAILS"
+PIN_SOCKETS_LAYER = "PIN_SOCKETS"
+LABELS_LAYER = "LABELS"
+
+# gaps narrower than this don't produce pin sockets
+_EPSILON = 1e-9
+
+
+def layout_outlines(layout):
+    # (tails, pin sockets) polygons of the valid layout, every polygon is a list of (x, y) vertices
+    tails = [list(t) for t in layout.half_tails + layout.tails]
+
+    # (left side, right side) of every tail, each side is (base vertex, top vertex)
+    sides = []
+    for v in tails:
+        first = (v[0], v[3])
+        second = (v[1], v[2])
+        sides.append((first, second) if v[0][0] <= v[1][0] else (second, first))
+    sides.sort(key=lambda s: s[0][0][0])
+
+    height = layout.height
+    end = layout.edge_length
+    sockets = []
+    right = ((0.0, 0.0), (0.0, height))
+    for (left, next_right) in sides + [(((end, 0.0), (end, height)), None)]:
+        if left[0][0] - right[0][0] > _EPSILON:
+            sockets.append([right[0], left[0], left[1], right[1]])
+        right = next_right
+    return tails, sockets
+
+
+class BoardOutline:
+    # outlines of one board placed on the sheet - the edge start is at (x, y + label height)
+    __slots__ = ("label", "layout", "tails", "sockets", "x", "y")
+
+    def __init__(self, label, layout):
+        self.label = label
+        self.layout = layout
+        (self.tails, self.sockets) = layout_outlines(layout)
+        self.x = 0.0
+        self.y = 0.0
+
+
+def nest(sizes, sheet_width, gap):
+    # First fit decreasing height shelf packing: the tallest boards go first, every board is put on the first
+    # shelf it fits on or starts a new one (boards wider than the sheet get a shelf of their own).
+    # Shelves which can't fit even the narrowest board are not checked anymore.
+    # Returns the (x, y) position of every board in the sizes order and the (width, height) of the nested boards.
+    positions = [None] * len(sizes)
+    narrowest = min([width for (width, height) in sizes] or [0])
+    shelves = []
+    top = 0.0
+    used_width = 0.0
+    for i in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        (width, height) = sizes[i]
+        for shelf in shelves:
+            if shelf[1] + width <= sheet_width:
+                break
+        else:
+            shelf = [top, 0.0]
+            shelves.append(shelf)
+            top += height + gap
+        positions[i] = (shelf[1], shelf[0])
+        used_width = max(used_width, shelf[1] + width)
+        shelf[1] += width + gap
+        if shelf[1] + narrowest > sheet_width:
+            shelves.remove(shelf)
+    return positions, (used_width, max(0.0, top - gap))
+
+
+def place_boards(layouts, labels=None, sheet_width=SHEET_WIDTH, gap=GAP, label_height=LABEL_HEIGHT):
+    # Outlines of the valid layouts nested on the sheet. Returns the outlines and the (width, height) of the sheet.
+    boards = [BoardOutline(labels[i] if labels else None, layout) for i, layout in enumerate(layouts)]
+    if not labels:
+        label_height = 0
+    positions, size = nest([(b.layout.edge_length, b.layout.height + label_height) for b in boards], sheet_width, gap)
+    for board, (x, y) in zip(boards, positions):
+        board.x = x
+        board.y = y + label_height
+    return boards, size
+
+
+# Formatting the numbers is most of the export time so every vertex is formatted with a single % operation.
+_NUMBER = "%.{}f".format(DIGITS)
+
+
+def _number(value):
+    return _NUMBER % value
+
+
+def write_dxf(stream, boards, size, label_height=LABEL_HEIGHT):
+    # AutoCAD R12 ASCII DXF: only POLYLINE and TEXT entities, read by any CAD/CAM program
+    header = ["0", "SECTION", "2", "HEADER", "9", "$INSUNITS", "70", "4",
+              "9", "$EXTMIN", "10", "0", "20", "0", "9", "$EXTMAX", "10", _number(size[0]), "20", _number(size[1]),
+              "0", "ENDSEC", "0", "SECTION", "2", "ENTITIES"]
+    lines = ["\n".join(header)]
+    text = "0\nTEXT\n8\n{}\n10\n{}\n20\n{}\n30\n0\n40\n{}\n1\n{{}}".format(LABELS_LAYER, _NUMBER, _NUMBER, _number(label_height * 0.6))
+    for board in boards:
+        for (layer, polygons) in ((TAILS_LAYER, board.tails), (PIN_SOCKETS_LAYER, board.sockets)):
+            polyline = "0\nPOLYLINE\n8\n{0}\n66\n1\n10\n0\n20\n0\n30\n0\n70\n1".format(layer)
+            vertex = "0\nVERTEX\n8\n{}\n10\n{}\n20\n{}\n30\n0".format(layer, _NUMBER, _NUMBER)
+            seqend = "0\nSEQEND\n8\n{}".format(layer)
+            (x0, y0) = (board.x, board.y)
+            for polygon in polygons:
+                lines.append(polyline)
+                lines.extend([vertex % (x0 + x, y0 + y) for (x, y) in polygon])
+                lines.append(seqend)
+        if board.label is not None:
+            lines.append((text % (board.x, board.y - label_height * 0.8)).format(board.label))
+    lines.append("0\nENDSEC\n0\nEOF")
+    stream.write("\n".join(lines) + "\n")
+
+
+def _escape(text):
+    return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def write_svg(stream, boards, size, label_height=LABEL_HEIGHT):
+    # SVG Y axis points down so the Y coordinates are flipped to keep the tails pointing up
+    (width, height) = size
+
+    point = "{},{}".format(_NUMBER, _NUMBER)
+
+    def points(board, polygon):
+        (x0, y0) = (board.x, height - board.y)
+        return " ".join([point % (x0 + x, y0 - y) for (x, y) in polygon])
+
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" width="{0}mm" height="{1}mm" viewBox="0 0 {0} {1}">'.format(
+        _number(width), _number(height))]
+    for (layer, attribute, color) in ((TAILS_LAYER, "tails", "black"), (PIN_SOCKETS_LAYER, "sockets", "red")):
+        parts.append('<g id="{}" fill="none" stroke="{}" stroke-width="0.2">'.format(layer, color))
+        for board in boards:
+            for polygon in getattr(board, attribute):
+                parts.append('<polygon points="{}"/>'.format(points(board, polygon)))
+        parts.append("</g>")
+    parts.append('<g id="{}" font-family="sans-serif" font-size="{}">'.format(LABELS_LAYER, _number(label_height * 0.6)))
+    for board in boards:
+        if board.label is not None:
+            parts.append('<text x="{}" y="{}">{}</text>'.format(
+                _number(board.x), _number(height - board.y + label_height * 0.8), _escape(board.label)))
+    parts.append("</g>")
+    parts.append("</svg>")
+    stream.write("\n".join(parts) + "\n")
+
+
+WRITERS = {
+    "dxf": write_dxf,
+    "svg": write_svg,
+}
+
+
+def export_outlines(path, layouts, labels=None, sheet_width=SHEET_WIDTH, gap=GAP, label_height=LABEL_HEIGHT):
+    # writes the valid layouts nested into one DXF or SVG file (by the path extension)
+    format = path.rsplit(".", 1)[-1].lower()
+    if format not in WRITERS:
+        raise ValueError("Not supported export format \"{}\" - use .dxf or .svg".format(format))
+    boards, size = place_boards(layouts, labels, sheet_width, gap, label_height)
+    with open(path, "w") as f:
+        WRITERS[format](f, boards, size, label_height)
+    return boards
+
+
+def main(argv):
+    import argparse
+    from dovetail_cutlist import parse_board, parse_start_type, read_rows
+
+    parser = argparse.ArgumentParser(description="Writes 2D outlines of the tails and pin sockets to DXF or SVG")
+    parser.add_argument("output", help="output .dxf or .svg file")
+    parser.add_argument("--cutlist", help="nest all the boards of this CSV/JSONL cut list, - for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="cut list format, by default from the file extension")
+    parser.add_argument("--start-type", default=DovetailStartType.FullPin.value)
+    parser.add_argument("--edge-length", type=float)
+    parser.add_argument("--pin", type=float, default=11)
+    parser.add_argument("--ratio", type=float, default=2)
+    parser.add_argument("--angle", type=float, default=7, help="in degrees")
+    parser.add_argument("--height", type=float, default=10)
+    parser.add_argument("--sheet-width", type=float, default=SHEET_WIDTH)
+    parser.add_argument("--gap", type=float, default=GAP)
+    parser.add_argument("--label-height", type=float, default=LABEL_HEIGHT)
+    args = parser.parse_args(argv)
+
+    defaults = {"start_type": parse_start_type(args.start_type), "edge_length": args.edge_length, "pin": args.pin,
+                "ratio": args.ratio, "angle": args.angle, "height": args.height}
+    if args.cutlist:
+        format = args.format or ("jsonl" if args.cutlist.lower().endswith((".jsonl", ".json")) else "csv")
+        input = sys.stdin if args.cutlist == "-" else open(args.cutlist, newline="")
+        try:
+            rows = list(read_rows(input, format))
+        finally:
+            if input is not sys.stdin:
+                input.close()
+    else:
+        rows = [{}]
+
+    layouts = []
+    labels = []
+    for (number, row) in enumerate(rows, 1):
+        # JSON lines are parsed one by one so a bad row is only skipped like an infeasible one
+        label = "row {}".format(number)
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+                if not isinstance(row, dict):
+                    raise ValueError("Board must be a JSON object")
+            label = row.get("id") or label
+            layout = solve_layout(*parse_board(row, defaults))
+        except ValueError as e:
+            sys.stderr.write("{}: {}\n".format(label, e))
+            continue
+        if not layout.is_valid:
+            sys.stderr.write("{}: {}\n".format(label, "; ".join(layout.errors)))
+            continue
+        layouts.append(layout)
+        labels.append(label)
+
+    boards = export_outlines(args.output, layouts, labels if args.cutlist else None, args.sheet_width, args.gap, args.label_height)
+    sys.stderr.write("{} boards exported, {} skipped\n".format(len(boards), len(rows) - len(boards)))
+    return 0 if boards or not rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
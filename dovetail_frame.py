@@ -0,0 +1,161 @@
+#Description-Edge frames the dovetails are laid out in, resolved from the B-Rep topology with plain float vector math.
+
+import adsk.core, math
+
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _length(a):
+    return math.sqrt(_dot(a, a))
+
+
+def _normalize(a):
+    length = _length(a)
+    if length == 0:
+        raise ValueError("Unable to normalize zero length vector")
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def _xyz(p):
+    return (p.x, p.y, p.z)
+
+
+class EdgeFrame:
+    # Edge frame: X runs along the edge from its start point, Y runs outward from the face in the face plane
+    # (inward for the pin sockets which are cut into the face) and Z is the face normal. Origin and normalized
+    # axes are kept as plain float tuples so the layout coordinates are converted with one Point3D/Vector3D
+    # creation per point and no temporary API objects.
+    __slots__ = ("origin", "x_axis", "y_axis", "z_axis", "length")
+
+    def __init__(self, origin, x_axis, y_axis, z_axis, length):
+        self.origin = origin
+        self.x_axis = x_axis
+        self.y_axis = y_axis
+        self.z_axis = z_axis
+        self.length = length
+
+    def coordinates(self, x, y, z=0):
+        o, ax, ay, az = self.origin, self.x_axis, self.y_axis, self.z_axis
+        return (o[0] + ax[0] * x + ay[0] * y + az[0] * z,
+                o[1] + ax[1] * x + ay[1] * y + az[1] * z,
+                o[2] + ax[2] * x + ay[2] * y + az[2] * z)
+
+    def point(self, x, y, z=0):
+        return adsk.core.Point3D.create(*self.coordinates(x, y, z))
+
+    def vector(self, x, y, z=0):
+        ax, ay, az = self.x_axis, self.y_axis, self.z_axis
+        return adsk.core.Vector3D.create(ax[0] * x + ay[0] * y + az[0] * z,
+                                         ax[1] * x + ay[1] * y + az[1] * z,
+                                         ax[2] * x + ay[2] * y + az[2] * z)
+
+
+def _edge_frame(start, end, normal, outward, inward):
+    # Y is perpendicular to the edge in the face plane on the outward side (or the opposite one for inward)
+    edge = _sub(end, start)
+    x_axis = _normalize(edge)
+    z_axis = _normalize(normal)
+    y_axis = _cross(x_axis, z_axis)
+    if (_dot(y_axis, outward) < 0) != inward:
+        y_axis = (-y_axis[0], -y_axis[1], -y_axis[2])
+    return EdgeFrame(start, x_axis, y_axis, z_axis, _length(edge))
+
+
+# edges whose geometry is kept by the resolver between the command runs
+MAX_CACHED_EDGES = 256
+
+
+class EdgeGeometry:
+    # Model space geometry of the edge on the face as float tuples: the edge end points, the face normal
+    # and the direction perpendicular to the edge in the face plane pointing away from the face.
+    __slots__ = ("start", "end", "normal", "outward")
+
+    def __init__(self, start, end, normal, outward):
+        self.start = start
+        self.end = end
+        self.normal = normal
+        self.outward = outward
+
+
+def resolve_edge_geometry(face, edge, start, end):
+    # The outward direction comes from the topology rather than from the face center which can be on either side
+    # of the edge (or outside of the face) for L-shaped, notched or holed faces: the loops of the face run
+    # counterclockwise around its normal (the inner ones clockwise) so the face is on the left of its coedges.
+    if face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+        raise ValueError("Dovetails can be placed only on planar faces")
+    for coedge in edge.coEdges:
+        if coedge.loop.face == face:
+            break
+    else:
+        raise ValueError("The edge doesn't belong to the face")
+    (res, normal) = face.evaluator.getNormalAtPoint(edge.startVertex.geometry)
+    if not res:
+        raise ValueError("Unable to get face normal")
+    normal = _normalize(_xyz(normal))
+    direction = _normalize(_sub(start, end) if coedge.isOpposedToEdge else _sub(end, start))
+    return EdgeGeometry(start, end, normal, _cross(direction, normal))
+
+
+class EdgeGeometryResolver:
+    # Caches the resolved edge geometry by the face and edge entity tokens within the command and between
+    # the command runs. The entry is reused only while the edge end points are the same, so the edges changed
+    # by the design edits are resolved again. The oldest entries are dropped above max_size.
+    def __init__(self, max_size=MAX_CACHED_EDGES):
+        self.max_size = max_size
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, face, edge):
+        key = (face.entityToken, edge.entityToken)
+        start = _xyz(edge.startVertex.geometry)
+        end = _xyz(edge.endVertex.geometry)
+        geometry = self.entries.get(key)
+        if geometry is not None and geometry.start == start and geometry.end == end:
+            self.hits += 1
+            return geometry
+
+        self.misses += 1
+        geometry = resolve_edge_geometry(face, edge, start, end)
+        self.entries.pop(key, None)
+        if len(self.entries) >= self.max_size:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = geometry
+        return geometry
+
+    def clear(self):
+        self.entries = {}
+
+
+# resolver shared by all the command runs while the add-in is loaded
+RESOLVER = EdgeGeometryResolver()
+
+
+def model_frame(face, edge, inward=False, resolver=RESOLVER):
+    # frame of the edge in the model space
+    geometry = resolver.resolve(face, edge)
+    return _edge_frame(geometry.start, geometry.end, geometry.normal, geometry.outward, inward)
+
+
+def sketch_frame(sketch, face, edge, projected_edge, inward=False, resolver=RESOLVER):
+    # frame of the projected edge in the space of the sketch created on the face - the face normal is
+    # the sketch Z axis and the outward direction is rotated into the sketch space by the sketch transform
+    # (its upper left 3x3 part rotates from the sketch to the model space, so its transpose rotates back)
+    geometry = resolver.resolve(face, edge)
+    m = sketch.transform.asArray()
+    o = geometry.outward
+    outward = (m[0] * o[0] + m[4] * o[1] + m[8] * o[2],
+               m[1] * o[0] + m[5] * o[1] + m[9] * o[2],
+               m[2] * o[0] + m[6] * o[1] + m[10] * o[2])
+    return _edge_frame(_xyz(projected_edge.startSketchPoint.geometry), _xyz(projected_edge.endSketchPoint.geometry),
+                       (0, 0, 1), outward, inward)
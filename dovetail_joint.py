@@ -0,0 +1,170 @@
+#Description-Dovetails joints stored in the design attributes so an existing joint can be reopened and updated in place.
+
+# Every joint is identified by its parameters prefix. The design keeps the joint record (the inputs it was created with
+# and the tokens of the faces, edges and created entities) in the "<prefix>joint" attribute and every created sketch
+# and feature has the "joint" attribute with the prefix, so the joint can be found from any of them.
+# The tails and the pin sockets cut with the same layout are kept as separate lists of face/edge pairs.
+
+import json
+from .dovetail_parameters import DOVETAILS_PARAMETERS, dovetails_parameters_expressions
+
+JOINT_ATTRIBUTE = "joint"
+
+# inputs which can be changed by updating the user parameters only
+PARAMETER_INPUTS = ("angle", "height", "thickness", "edge_length", "pin", "ratio")
+
+# lists of the face/edge pairs in the joint record: tails and pin sockets
+TAILS = "pairs"
+PINS = "pins"
+
+
+def joint_record(params_prefix, start_type, generation_mode, count, angle, height, thickness, edge_length, pin, ratio):
+    # describes the joint inputs and the user parameters they result in, the created entities are added as pairs
+    expressions = dovetails_parameters_expressions(params_prefix, start_type, angle, height, thickness, edge_length, pin, ratio)
+    return {
+        "prefix": params_prefix,
+        "start_type": start_type.value,
+        "generation_mode": generation_mode.value,
+        "count": count,
+        "parameters": dict((params_prefix + name, {"expression": expressions[name], "units": units})
+                           for (name, units, comment) in DOVETAILS_PARAMETERS),
+        TAILS: [],
+        PINS: [],
+    }
+
+
+class DovetailsJoint:
+    def __init__(self, group, record):
+        self.group = group
+        self.record = record
+
+    @property
+    def prefix(self):
+        return self.record["prefix"]
+
+    @property
+    def start_type(self):
+        return self.record["start_type"]
+
+    @property
+    def generation_mode(self):
+        return self.record["generation_mode"]
+
+    def expression(self, name):
+        return self.record["parameters"][self.prefix + name]["expression"]
+
+    @staticmethod
+    def load(design, group, prefix):
+        attribute = design.attributes.itemByName(group, prefix + JOINT_ATTRIBUTE)
+        if not attribute:
+            return None
+        record = json.loads(attribute.value)
+        # joints created before the pin sockets support
+        record.setdefault(PINS, [])
+        return DovetailsJoint(group, record)
+
+    @staticmethod
+    def from_selections(design, group, selections):
+        # joint of the first selected sketch or feature which belongs to one
+        for i in range(selections.count):
+            attributes = getattr(selections.item(i).entity, "attributes", None)
+            attribute = attributes.itemByName(group, JOINT_ATTRIBUTE) if attributes is not None else None
+            if attribute:
+                return DovetailsJoint.load(design, group, attribute.value)
+        return None
+
+    def add_pair(self, face_token, edge_token, entities, kind=TAILS):
+        # entities created for one face/edge pair in the creation order
+        for entity in entities:
+            entity.attributes.add(self.group, JOINT_ATTRIBUTE, self.prefix)
+        self.record[kind].append({"face": face_token, "edge": edge_token, "entities": [e.entityToken for e in entities]})
+        
+    def keep_pairs(self, other):
+        # takes over the tails and pin sockets of the other record of the same joint
+        self.record[TAILS] = other.record[TAILS]
+        self.record[PINS] = other.record[PINS]
+
+    def save(self, design, transaction=None):
+        # the previous record of the joint is restored (or the new one is deleted) when the transaction is rolled back
+        name = self.prefix + JOINT_ATTRIBUTE
+        existing = design.attributes.itemByName(self.group, name)
+        if existing and transaction:
+            transaction.on_rollback(_restore_value(existing, existing.value))
+        attribute = design.attributes.add(self.group, name, json.dumps(self.record))
+        if not existing and transaction:
+            transaction.track(attribute)
+        return attribute
+
+    def changes(self, other):
+        # names of the inputs which differ from the other joint record
+        result = [name for name in PARAMETER_INPUTS if self.expression(name) != other.expression(name)]
+        for name in ("start_type", "generation_mode", "count"):
+            if self.record[name] != other.record[name]:
+                result.append(name)
+        return result
+
+    def needs_rebuild(self, other, follows_parameters, follows_count):
+        # Whenever the geometry has to be created again to apply the other record. Start type and generation mode
+        # change the sketch and features, other inputs are followed through the user parameters by the parametric
+        # modes (the number of tails - only by the rectangular pattern).
+        changes = self.changes(other)
+        if "start_type" in changes or "generation_mode" in changes:
+            return True
+        if "count" in changes and not follows_count:
+            return True
+        return bool(changes) and not follows_parameters
+
+    def entities(self, design, pair):
+        result = []
+        for token in pair["entities"]:
+            found = design.findEntityByToken(token)
+            if found:
+                result.append(found[0])
+        return result
+
+    def replace_geometry(self, design, transaction):
+        # Hands the sketches and features of the joint over to the transaction to be replaced and returns the original
+        # tails and pin sockets (face, edge) pairs refetched by their tokens. Compute must not be deferred yet so
+        # the faces and edges are restored by the recompute after the features are suppressed. The old geometry
+        # is deleted only when the transaction is committed, if anything fails it's restored as it was.
+        for kind in (PINS, TAILS):
+            for pair in reversed(self.record[kind]):
+                for entity in reversed(self.entities(design, pair)):
+                    transaction.replace(entity)
+
+        result = []
+        for kind in (TAILS, PINS):
+            pairs = []
+            for pair in self.record[kind]:
+                faces = design.findEntityByToken(pair["face"])
+                edges = design.findEntityByToken(pair["edge"])
+                if not faces or not edges:
+                    transaction.rollback()
+                    raise ValueError("Face or edge of the dovetails joint \"{}\" doesn't exist anymore".format(self.prefix))
+                pairs.append((faces[0], edges[0]))
+            result.append(pairs)
+        return result
+
+
+def update_joint_parameters(registry, expressions, transaction):
+    # Sets the changed expressions of the existing joint parameters, the old expressions are restored on rollback.
+    # Parameters are updated in the dependency order so count and tail are recalculated from the new values.
+    for (name, units, comment) in DOVETAILS_PARAMETERS:
+        param = registry.params.get(name)
+        if param is None or name not in expressions or param.expression == expressions[name]:
+            continue
+        transaction.on_rollback(_restore_expression(param, param.expression))
+        param.expression = expressions[name]
+
+
+def _restore_expression(param, expression):
+    def restore():
+        if param.isValid:
+            param.expression = expression
+    return restore
+
+
+def _restore_value(attribute, value):
+    def restore():
+        attribute.value = value
+    return restore
@@ -0,0 +1,378 @@
+#Description-Pure-Python dovetail layout engine. Has no Fusion dependency so layouts can be solved and checked outside of Fusion.
+
+# All lengths are in the same (arbitrary) units, angles are in radians.
+# Layout coordinates are given in the edge frame: X runs along the edge from its start point,
+# Y runs outward from the edge. Every tail is described by its 4 vertices:
+# (base start, base end, top end, top start).
+
+import math
+from enum import Enum
+
+# numpy takes longer to import than the rest of the add-in so it's imported by the first batch solve
+# instead of on the add-in load - single layouts of the dialog never need it
+numpy = None
+_numpy_loaded = False
+
+
+def _load_numpy():
+    global numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_loaded = True
+    return numpy
+
+
+# more tails than anyone cuts on a board - larger counts come only from huge edges or tiny pins
+MAX_COUNT = 10000
+
+
+class DovetailStartType(Enum):
+    FullPin = "Full pin"
+    HalfPin = "Half pin"
+    HalfTail = "Half tail"
+
+
+def count_expression(start_type, edge_length, pin, ratio):
+    if start_type == DovetailStartType.FullPin:
+        return "round (({} - {}) / ({} * (1 + {})))".format(edge_length, pin, pin, ratio)
+    elif start_type == DovetailStartType.HalfPin:
+        return "round ({} / ({} * (1 + {})))".format(edge_length, pin, ratio)
+    elif start_type == DovetailStartType.HalfTail:
+        return "round ({} / ({} * (1 + {})) - 1)".format(edge_length, pin, ratio)
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+def tail_expression(start_type, edge_length, pin, count):
+    if start_type == DovetailStartType.FullPin:
+        return "({} - {} * ({} + 1)) / {}".format(edge_length, pin, count, count)
+    elif start_type == DovetailStartType.HalfPin:
+        return "({} - {} * {}) / {}".format(edge_length, pin, count, count)
+    elif start_type == DovetailStartType.HalfTail:
+        return "{} / ({} + 1) - {}".format(edge_length, count, pin)
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+# Same formulas as the expressions above. They only use arithmetic and the passed floor function
+# so they work both for plain floats and for numpy arrays.
+
+def _count(start_type, edge_length, pin, ratio, floor):
+    # Fusion's round() rounds halves up, unlike Python's round()
+    if start_type == DovetailStartType.FullPin:
+        return floor((edge_length - pin) / (pin * (1 + ratio)) + 0.5)
+    elif start_type == DovetailStartType.HalfPin:
+        return floor(edge_length / (pin * (1 + ratio)) + 0.5)
+    elif start_type == DovetailStartType.HalfTail:
+        return floor(edge_length / (pin * (1 + ratio)) - 1 + 0.5)
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+def _tail(start_type, edge_length, pin, count):
+    if start_type == DovetailStartType.FullPin:
+        return (edge_length - pin * (count + 1)) / count
+    elif start_type == DovetailStartType.HalfPin:
+        return (edge_length - pin * count) / count
+    elif start_type == DovetailStartType.HalfTail:
+        return edge_length / (count + 1) - pin
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+def first_tail_offset_expression(start_type, tail, pin):
+    # distance from the edge start to the base of the first full tail
+    if start_type == DovetailStartType.FullPin:
+        return pin
+    elif start_type == DovetailStartType.HalfPin:
+        return "{} / 2".format(pin)
+    elif start_type == DovetailStartType.HalfTail:
+        return "{} / 2 + {}".format(tail, pin)
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+def first_tail_offset(start_type, tail, pin):
+    if start_type == DovetailStartType.FullPin:
+        return pin
+    elif start_type == DovetailStartType.HalfPin:
+        return pin / 2
+    elif start_type == DovetailStartType.HalfTail:
+        return tail / 2 + pin
+    else:
+        raise ValueError("Not supported start type: {}".format(start_type))
+
+
+def _input_errors(edge_length, pin, ratio, angle, height):
+    errors = []
+    # infinity and NaN pass the range checks below but can't be laid out
+    for (name, value) in (("Edge length", edge_length), ("Pin width", pin), ("Tails to pin ratio", ratio), ("Angle", angle), ("Height", height)):
+        if not math.isfinite(value):
+            errors.append("{} must be a finite number, got {}".format(name, value))
+    if errors:
+        return errors
+    if not edge_length > 0:
+        errors.append("Edge length must be positive, got {}".format(edge_length))
+    if not pin > 0:
+        errors.append("Pin width must be positive, got {}".format(pin))
+    if not ratio > 0:
+        errors.append("Tails to pin ratio must be positive, got {}".format(ratio))
+    if not 0 <= angle < math.pi / 2:
+        errors.append("Angle must be in [0, 90) degrees range, got {} deg".format(math.degrees(angle)))
+    if not height > 0:
+        errors.append("Height must be positive, got {}".format(height))
+    return errors
+
+
+def dovetails_count(start_type, edge_length, pin, ratio):
+    return int(_count(start_type, edge_length, pin, ratio, math.floor))
+
+
+def tail_width(start_type, edge_length, pin, count):
+    return _tail(start_type, edge_length, pin, count)
+
+
+class DovetailLayout:
+    def __init__(self, start_type, edge_length, pin, ratio, angle, height):
+        self.start_type = start_type
+        self.edge_length = edge_length
+        self.pin = pin
+        self.ratio = ratio
+        self.angle = angle
+        self.height = height
+        self.count = 0
+        self.tail = 0.0
+        self.errors = _input_errors(edge_length, pin, ratio, angle, height)
+
+        if self.errors:
+            return
+
+        # the count is checked before it's made an integer - huge edge lengths or tiny pins overflow it
+        count = _count(start_type, edge_length, pin, ratio, lambda value: value)
+        if not math.isfinite(count) or math.floor(count) > MAX_COUNT:
+            self.errors.append("Not applicable parameters specified - dovetails count expression resulted in {} tails, at most {} are supported".format(
+                math.floor(count) if math.isfinite(count) else count, MAX_COUNT))
+            return
+        self.count = math.floor(count)
+        if self.count <= 0:
+            self.errors.append("Not applicable parameters specified - dovetails count expression resulted in invalid number {}".format(self.count))
+            return
+
+        self.tail = tail_width(start_type, edge_length, pin, self.count)
+        if self.tail <= 0:
+            self.errors.append("Not applicable parameters specified - tails width resulted in invalid number {}".format(self.tail))
+            return
+
+        # pins get narrower towards the top by the spread of the tail on both sides
+        spread = self.spread
+        if (self.count > 1 or start_type == DovetailStartType.HalfTail) and pin - 2 * spread <= 0:
+            self.errors.append("Tails overlap at the top - increase pin width or decrease angle or height")
+        if start_type == DovetailStartType.FullPin and pin - spread <= 0:
+            self.errors.append("Outer tails extend past the edge - increase pin width or decrease angle or height")
+        if start_type == DovetailStartType.HalfPin and pin / 2 - spread <= 0:
+            self.errors.append("Outer tails extend past the edge - increase pin width or decrease angle or height")
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    @property
+    def spread(self):
+        # how much each side of a tail leans outward at the full height
+        return self.height * math.tan(self.angle)
+
+    @property
+    def first_tail_offset(self):
+        return first_tail_offset(self.start_type, self.tail, self.pin)
+
+    @property
+    def tails(self):
+        if not self.is_valid:
+            return []
+
+        spread = self.spread
+        step = self.tail + self.pin
+        x = self.first_tail_offset
+        result = []
+        for i in range(self.count):
+            result.append(((x, 0.0), (x + self.tail, 0.0), (x + self.tail + spread, self.height), (x - spread, self.height)))
+            x += step
+        return result
+
+    @property
+    def half_tails(self):
+        if not self.is_valid or self.start_type != DovetailStartType.HalfTail:
+            return []
+
+        spread = self.spread
+        half = self.tail / 2
+        end = self.edge_length
+        return [
+            ((0.0, 0.0), (half, 0.0), (half + spread, self.height), (0.0, self.height)),
+            ((end, 0.0), (end - half, 0.0), (end - half - spread, self.height), (end, self.height)),
+        ]
+
+    def __repr__(self):
+        return "DovetailLayout(start_type={}, edge_length={}, count={}, tail={}, pin={})".format(
+            self.start_type.name, self.edge_length, self.count, self.tail, self.pin)
+
+
+def solve_layout(start_type, edge_length, pin, ratio, angle, height):
+    return DovetailLayout(start_type, edge_length, pin, ratio, angle, height)
+
+
+def _is_scalar(value):
+    return isinstance(value, (int, float, str, DovetailStartType)) or not hasattr(value, "__len__")
+
+
+def _broadcast(values, size):
+    if _is_scalar(values):
+        return [values] * size
+    if len(values) != size:
+        raise ValueError("All board arrays must have the same length, got {} and {}".format(len(values), size))
+    return values
+
+
+class DovetailLayoutBatch:
+    # Layouts of many boards solved at once. Uses numpy arrays when numpy is available,
+    # plain lists otherwise. Indexing returns a regular DovetailLayout for the board.
+
+    def __init__(self, start_types, edge_lengths, pins, ratios, angles, heights):
+        self.start_types = start_types
+        self.edge_lengths = edge_lengths
+        self.pins = pins
+        self.ratios = ratios
+        self.angles = angles
+        self.heights = heights
+        if _load_numpy() is not None:
+            self._solve_numpy()
+        else:
+            self._solve_python()
+
+    def __len__(self):
+        return len(self.start_types)
+
+    def __getitem__(self, index):
+        return DovetailLayout(self.start_types[index], float(self.edge_lengths[index]), float(self.pins[index]),
+                              float(self.ratios[index]), float(self.angles[index]), float(self.heights[index]))
+
+    def _solve_python(self):
+        layouts = [DovetailLayout(*args) for args in zip(self.start_types, self.edge_lengths, self.pins,
+                                                         self.ratios, self.angles, self.heights)]
+        self.counts = [l.count for l in layouts]
+        self.tails = [l.tail for l in layouts]
+        self.valid = [l.is_valid for l in layouts]
+        self._layouts = layouts
+
+    def _solve_numpy(self):
+        edge_lengths = numpy.asarray(self.edge_lengths, dtype=float)
+        pins = numpy.asarray(self.pins, dtype=float)
+        ratios = numpy.asarray(self.ratios, dtype=float)
+        angles = numpy.asarray(self.angles, dtype=float)
+        heights = numpy.asarray(self.heights, dtype=float)
+        kinds = numpy.array([list(DovetailStartType).index(st) for st in self.start_types], dtype=int)
+
+        counts = numpy.zeros(len(kinds))
+        tails = numpy.zeros(len(kinds))
+        offsets = numpy.zeros(len(kinds))
+        with numpy.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            spreads = heights * numpy.tan(angles)
+            inputs_valid = (edge_lengths > 0) & (pins > 0) & (ratios > 0) & (angles >= 0) & (angles < math.pi / 2) & (heights > 0)
+            inputs_valid &= numpy.isfinite(edge_lengths) & numpy.isfinite(pins) & numpy.isfinite(ratios) & numpy.isfinite(heights)
+
+
+            for kind, start_type in enumerate(DovetailStartType):
+                mask = kinds == kind
+                if not mask.any():
+                    continue
+                counts[mask] = _count(start_type, edge_lengths[mask], pins[mask], ratios[mask], numpy.floor)
+                tails[mask] = _tail(start_type, edge_lengths[mask], pins[mask], counts[mask])
+                offsets[mask] = first_tail_offset(start_type, tails[mask], pins[mask])
+
+            valid = inputs_valid & numpy.isfinite(counts) & (counts > 0) & (counts <= MAX_COUNT) & numpy.isfinite(tails) & (tails > 0)
+            half_tail = kinds == list(DovetailStartType).index(DovetailStartType.HalfTail)
+            valid &= ~(((counts > 1) | half_tail) & (pins - 2 * spreads <= 0))
+            valid &= ~((kinds == list(DovetailStartType).index(DovetailStartType.FullPin)) & (pins - spreads <= 0))
+            valid &= ~((kinds == list(DovetailStartType).index(DovetailStartType.HalfPin)) & (pins / 2 - spreads <= 0))
+
+        self.counts = numpy.where(valid, counts, 0).astype(int)
+        self.tails = numpy.where(valid, tails, 0.0)
+        self.valid = valid
+        self._offsets = numpy.where(valid, offsets, 0.0)
+        self._spreads = spreads
+        self._heights = heights
+        self._edge_lengths = edge_lengths
+        self._half_tail = half_tail & valid
+        self._pins = pins
+
+    def tail_vertices(self):
+        # Returns (board indexes, vertices) for every full tail of every board.
+        # With numpy vertices is an array of (tails count, 4, 2) shape.
+        if numpy is None:
+            boards = []
+            vertices = []
+            for i, layout in enumerate(self._layouts):
+                tails = layout.tails
+                boards.extend([i] * len(tails))
+                vertices.extend(tails)
+            return boards, vertices
+
+        boards = numpy.repeat(numpy.arange(len(self.counts)), self.counts)
+        starts = numpy.cumsum(self.counts) - self.counts
+        index = numpy.arange(len(boards)) - numpy.repeat(starts, self.counts)
+
+        x0 = self._offsets[boards] + index * (self.tails[boards] + self._pins[boards])
+        x1 = x0 + self.tails[boards]
+        s = self._spreads[boards]
+        h = self._heights[boards]
+        zero = numpy.zeros(len(boards))
+
+        vertices = numpy.stack([
+            numpy.stack([x0, zero], axis=-1),
+            numpy.stack([x1, zero], axis=-1),
+            numpy.stack([x1 + s, h], axis=-1),
+            numpy.stack([x0 - s, h], axis=-1),
+        ], axis=1)
+        return boards, vertices
+
+    def half_tail_vertices(self):
+        # Returns (board indexes, vertices) for the starting and ending half tails of the "Half tail" boards.
+        if numpy is None:
+            boards = []
+            vertices = []
+            for i, layout in enumerate(self._layouts):
+                half_tails = layout.half_tails
+                boards.extend([i] * len(half_tails))
+                vertices.extend(half_tails)
+            return boards, vertices
+
+        boards = numpy.repeat(numpy.flatnonzero(self._half_tail), 2)
+        starting = numpy.arange(len(boards)) % 2 == 0
+        end = self._edge_lengths[boards]
+        half = self.tails[boards] / 2
+        s = self._spreads[boards]
+        h = self._heights[boards]
+        zero = numpy.zeros(len(boards))
+
+        base_start = numpy.where(starting, 0.0, end)
+        base_end = numpy.where(starting, half, end - half)
+        top_end = numpy.where(starting, half + s, end - half - s)
+
+        vertices = numpy.stack([
+            numpy.stack([base_start, zero], axis=-1),
+            numpy.stack([base_end, zero], axis=-1),
+            numpy.stack([top_end, h], axis=-1),
+            numpy.stack([base_start, h], axis=-1),
+        ], axis=1)
+        return boards, vertices
+
+
+def solve_layouts(start_types, edge_lengths, pins, ratios, angles, heights):
+    # Solves layouts of many boards in one call. Every argument can be either a single value shared
+    # by all boards or a sequence (list, numpy array) with a value per board.
+    args = (start_types, edge_lengths, pins, ratios, angles, heights)
+    size = max([len(arg) for arg in args if not _is_scalar(arg)] or [1])
+    return DovetailLayoutBatch(*[_broadcast(arg, size) for arg in args])
@@ -0,0 +1,167 @@
+#Description-Searches tails count and pin width combinations for the layouts fitting the router bit and the target ratio.
+
+# Doesn't use Fusion API (only the layout engine) so the search can run on a worker thread.
+# All lengths are in the same units as the layout engine, angles are in radians.
+
+import math, threading
+from .dovetail_layout import DovetailStartType, solve_layouts, dovetails_count, tail_width
+
+# the largest number of tails tried on one edge
+MAX_COUNT = 40
+# number of candidates shown in the dialog
+TOP_CANDIDATES = 8
+# digits the ratio of the applied candidate is rounded to
+RATIO_DIGITS = 3
+
+
+class LayoutCandidate:
+    # Layout found by the search. Pin and ratio are the values to put into the dialog - with them the count
+    # formula of the start type results in the same number of tails and the tails get the candidate width.
+    __slots__ = ("count", "pin", "tail", "ratio", "narrow_pin", "score")
+
+    def __init__(self, count, pin, tail, ratio, narrow_pin, score):
+        self.count = count
+        self.pin = pin
+        self.tail = tail
+        self.ratio = ratio
+        self.narrow_pin = narrow_pin
+        self.score = score
+
+    def __repr__(self):
+        return "LayoutCandidate(count={}, pin={}, tail={}, ratio={}, score={})".format(
+            self.count, self.pin, self.tail, self.ratio, self.score)
+
+
+def _pin_widths(minimum, maximum, step):
+    # widths on the step grid so the pins can be cut with the usual bit and fence settings
+    first = math.ceil(minimum / step - 1e-9)
+    last = math.floor(maximum / step + 1e-9)
+    return [round(i * step, 9) for i in range(max(first, 1), last + 1)]
+
+
+def narrowest_pin(start_type, count, pin, spread):
+    # Width of the narrowest pin at the top of the tails. The pins between two tails lose the spread on both sides,
+    # the end pins of "Full pin" lose it on one side and the end half pins of "Half pin" are half as wide to start with.
+    # "Half tail" layouts have tails on both sides of every pin.
+    between = pin - 2 * spread
+    if start_type == DovetailStartType.FullPin:
+        return min(between, pin - spread) if count > 1 else pin - spread
+    elif start_type == DovetailStartType.HalfPin:
+        return min(between, pin / 2 - spread) if count > 1 else pin / 2 - spread
+    else:
+        return between
+
+
+def find_layouts(start_type, edge_length, angle, height, target_ratio, bit_diameter, min_pin, pin_step,
+                 max_count=MAX_COUNT, top=TOP_CANDIDATES):
+    # Scores every (count, pin) combination on the pin step grid and returns the best candidate of every
+    # tails count, the best first. Candidates must satisfy:
+    # - the narrowest part of every pin (at the top of the tails), the end pins included, isn't narrower
+    #   than min_pin and lets the bit in to clear the waste between the tails
+    # - the tails are not narrower than the bit so their sockets can be cut in the pins board
+    # - the layout engine accepts the layout and solves it to the same number of tails
+    # Score is the distance of the tails to pin ratio from the target ratio on the log scale,
+    # so 1:2 and 2:1 off the target count the same.
+    if not edge_length > 0 or not target_ratio > 0 or not pin_step > 0:
+        raise ValueError("Edge length, target ratio and pin step must be positive")
+
+    spread = height * math.tan(angle)
+    min_narrow_pin = max(min_pin, bit_diameter)
+    # the grid starts at the widest pins of any layout which narrow to the minimum - the single tail "Full pin"
+    # layouts with only the end pins, the rest is checked per count below
+    pins = _pin_widths(min_narrow_pin + spread, edge_length, pin_step)
+
+    counts = []
+    pin_values = []
+    ratios = []
+    for count in range(1, max_count + 1):
+        for pin in pins:
+            if narrowest_pin(start_type, count, pin, spread) < min_narrow_pin - 1e-9:
+                continue
+            tail = tail_width(start_type, edge_length, pin, count)
+            if tail < bit_diameter or tail <= 0:
+                continue
+            counts.append(count)
+            pin_values.append(pin)
+            ratios.append(tail / pin)
+
+    if not counts:
+        return []
+
+    batch = solve_layouts(start_type, edge_length, pin_values, ratios, angle, height)
+    best = {}
+    for i in range(len(counts)):
+        count = counts[i]
+        if not batch.valid[i] or batch.counts[i] != count:
+            continue
+        score = abs(math.log(ratios[i] / target_ratio))
+        if count not in best or score < best[count][0]:
+            best[count] = (score, i)
+
+    candidates = []
+    for count, (score, i) in best.items():
+        pin = pin_values[i]
+        ratio = round(ratios[i], RATIO_DIGITS)
+        # the rounded ratio must still result in the same number of tails
+        if dovetails_count(start_type, edge_length, pin, ratio) != count:
+            continue
+        candidates.append(LayoutCandidate(count, pin, float(batch.tails[i]), ratio, narrowest_pin(start_type, count, pin, spread), score))
+
+    candidates.sort(key=lambda c: (c.score, -c.narrow_pin))
+    return candidates[:top]
+
+
+class LayoutOptimizer:
+    # Runs the search on a worker thread so the dialog stays responsive. The worker can't use Fusion API -
+    # it keeps the result and fires the custom event with the job number, the event handler takes the result
+    # on the main thread. Results of the jobs started before the last one (or before cancel) are dropped.
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.lock = threading.Lock()
+        self.job = 0
+        self.result = None
+        self.candidates = []
+        # whenever the last started search hasn't been taken or cancelled yet
+        self.is_running = False
+
+    def start(self, app, *search_args):
+        with self.lock:
+            self.job += 1
+            self.result = None
+            job = self.job
+        self.candidates = []
+        self.is_running = True
+        thread = threading.Thread(target=self._run, args=(app, job, search_args))
+        thread.daemon = True
+        thread.start()
+        return job
+
+    def _run(self, app, job, search_args):
+        try:
+            result = (find_layouts(*search_args), None)
+        except Exception as e:
+            result = ([], str(e))
+        with self.lock:
+            if job != self.job:
+                return
+            self.result = (job, result)
+        app.fireCustomEvent(self.event_id, str(job))
+
+    def take(self, job):
+        # (candidates, error) of the finished job or None if it's outdated
+        with self.lock:
+            if self.result is None or self.result[0] != job:
+                return None
+            result = self.result[1]
+            self.result = None
+        self.candidates = result[0]
+        self.is_running = False
+        return result
+
+    def cancel(self):
+        with self.lock:
+            self.job += 1
+            self.result = None
+        self.candidates = []
+        self.is_running = False
@@ -0,0 +1,160 @@
+#Description-User parameters of the dovetails.
+
+import adsk.core
+from .dovetail_layout import count_expression, tail_expression, solve_layout
+
+# Parameters of one dovetails joint in the dependency order: (name, units, comment).
+# count depends on edge_length, pin and ratio, tail depends on count.
+DOVETAILS_PARAMETERS = [
+    ("angle", "deg", "Dovetails angle"),
+    ("height", "mm", "Dovetails height"),
+    ("thickness", "mm", "Dovetails thickness"),
+    ("edge_length", "mm", "Dovetails edge length"),
+    ("pin", "mm", "Dovetails maximum pin width"),
+    ("ratio", "", "Dovetails tails to pin approximate ratio"),
+    ("count", "", "Number of the dovetails"),
+    ("tail", "mm", "Dovetails tails minimal width"),
+]
+
+# parameters whose expressions are generated by the add-in rather than entered by the user
+CALCULATED_PARAMETERS = ("count", "tail")
+
+
+class ParameterCollisionError(ValueError):
+    pass
+
+
+def dovetails_parameters_expressions(params_prefix, start_type, angle, height, thickness, edge_length, pin, ratio):
+    # expressions of all the joint parameters by their short names (without prefix)
+    return {
+        "angle": angle,
+        "height": height,
+        "thickness": thickness,
+        "edge_length": edge_length,
+        "pin": pin,
+        "ratio": ratio,
+        "count": count_expression(start_type, params_prefix + "edge_length", params_prefix + "pin", params_prefix + "ratio"),
+        "tail": tail_expression(start_type, params_prefix + "edge_length", params_prefix + "pin", params_prefix + "count"),
+    }
+
+
+def _normalize_expression(expression):
+    return "".join(expression.split())
+
+
+class ParameterRegistry:
+    # User parameters of one joint (the DOVETAILS_PARAMETERS named with the prefix).
+    # Existing parameters are looked up by their names so the cost doesn't depend on the number
+    # of the design user parameters, missing ones are created in the dependency order.
+    # One registry is shared by everything reading or changing the joint parameters in one execution.
+
+    def __init__(self, design, prefix, created=None):
+        self.design = design
+        self.prefix = prefix
+        self.params = {}
+        # parameters created by the registry are appended to this list (if passed) so they can be rolled back
+        self.created = created if created is not None else []
+
+        user_parameters = design.userParameters
+        for (name, units, comment) in DOVETAILS_PARAMETERS:
+            param = user_parameters.itemByName(prefix + name)
+            if param:
+                self.params[name] = param
+
+    def is_empty(self):
+        return not self.params
+
+    def collisions(self, expressions):
+        # Returns descriptions of the existing parameters which don't match the expressions.
+        # Reusing such parameters would silently build the joint from stale values
+        # of another joint which used the same prefix.
+        units_manager = self.design.unitsManager
+        result = []
+        for (name, units, comment) in DOVETAILS_PARAMETERS:
+            param = self.params.get(name)
+            if not param or name not in expressions:
+                continue
+
+            expression = expressions[name]
+            if _normalize_expression(param.expression) == _normalize_expression(expression):
+                continue
+            if name not in CALCULATED_PARAMETERS and units_manager.isValidExpression(expression, units) and \
+                    abs(units_manager.evaluateExpression(expression, units) - param.value) < 1e-9:
+                continue
+
+            result.append("{} = {} (expected {})".format(param.name, param.expression, expression))
+        return result
+
+    def check_collisions(self, expressions):
+        collisions = self.collisions(expressions)
+        if collisions:
+            raise ParameterCollisionError(
+                "Parameters prefix \"{}\" is already used by another dovetails joint with different parameters:\n{}\n"
+                "Use another prefix or change the existing parameters.".format(self.prefix, "\n".join(collisions)))
+
+    def add_missing(self, expressions, names=None):
+        # creates missing parameters (all or only the specified ones) in the dependency order
+        for (name, units, comment) in DOVETAILS_PARAMETERS:
+            if name in self.params or name not in expressions or (names is not None and name not in names):
+                continue
+            param = self.design.userParameters.add(self.prefix + name, adsk.core.ValueInput.createByString(expressions[name]), units, comment)
+            if not param:
+                raise ValueError("Unable to create user parameter: {}".format(self.prefix + name))
+            self.params[name] = param
+            self.created.append(param)
+        return self.params
+
+
+class DovetailsParameters:
+    # User parameters shared by all the dovetails created in one command execution
+    def __init__(self, angle, height, thickness, edge_length, pin, ratio, count, tail):
+        self.angle = angle
+        self.height = height
+        self.thickness = thickness
+        self.edge_length = edge_length
+        self.pin = pin
+        self.ratio = ratio
+        self.count = count
+        self.tail = tail
+
+
+def validate_dovetails_expressions(design, start_type, angle, height, thickness, edge_length, pin, ratio):
+    # Checks the entered expressions and the layout they result in before anything is created in the design.
+    # Returns the layout solved from the evaluated values (in internal units).
+    units_manager = design.unitsManager
+    expressions = {"angle": angle, "height": height, "thickness": thickness, "edge_length": edge_length, "pin": pin, "ratio": ratio}
+    values = {}
+    invalid = []
+    for (name, units, comment) in DOVETAILS_PARAMETERS:
+        if name not in expressions:
+            continue
+        if units_manager.isValidExpression(expressions[name], units):
+            values[name] = units_manager.evaluateExpression(expressions[name], units)
+        else:
+            invalid.append("{}: {}".format(comment, expressions[name]))
+    if invalid:
+        raise ValueError("Invalid expressions:\n{}".format("\n".join(invalid)))
+
+    layout = solve_layout(start_type, values["edge_length"], values["pin"], values["ratio"], values["angle"], values["height"])
+    if not layout.is_valid:
+        raise ValueError("\n".join(layout.errors))
+    if values["thickness"] <= 0:
+        raise ValueError("Thickness must be positive, got {}".format(values["thickness"]))
+    return layout
+
+
+def add_dovetails_parameters(design, params_prefix, start_type, angle, height, thickness, edge_length, pin, ratio, created=None, registry=None):
+    # creates user parameters of the dovetails from the specified expressions (or reuses existing matching ones),
+    # the created parameters are appended to the created list (or to the one of the passed registry)
+    expressions = dovetails_parameters_expressions(params_prefix, start_type, angle, height, thickness, edge_length, pin, ratio)
+    if registry is None:
+        registry = ParameterRegistry(design, params_prefix, created)
+    registry.check_collisions(expressions)
+
+    params = registry.add_missing(expressions, [name for (name, units, comment) in DOVETAILS_PARAMETERS if name != "tail"])
+    if params["count"].value <= 0:
+        raise ValueError("Not applicable parameters specified - dovetails count expression resulted in invalid number {}".format(params["count"].value))
+
+    # calculate resulted tails width after number of tails has been calculated
+    params = registry.add_missing(expressions)
+    return DovetailsParameters(**params)
@@ -0,0 +1,107 @@
+#Description-Live preview of the dovetails with custom graphics and cached geometry.
+
+import threading, time
+from .dovetail_layout import solve_layout
+from .dovetail_frame import model_frame
+from .dovetail_brep import create_tails_body
+
+# input changes coming faster than this are coalesced into one preview rebuild
+PREVIEW_DEBOUNCE = 0.3
+
+
+class DovetailsPreview:
+    # Keeps everything the preview has computed during one command invocation:
+    # edge frames per selected face/edge pair, the last solved layout and the tails bodies and custom graphics per pair.
+    # Pairs of the pins boards are kept separately from the tails pairs since their frames point inward.
+    # Only the parts affected by the changed inputs are rebuilt:
+    # - selection changes compute frames and graphics only for the new pairs
+    # - layout inputs changes solve the layout again and rebuild the graphics
+    # - thickness changes rebuild the graphics but reuse the layout
+    # - other inputs (parameters prefix, generation mode) don't rebuild anything
+
+    def __init__(self, event_id):
+        self.event_id = event_id
+        self.frames = {}
+        self.layout_key = None
+        self.layout = None
+        self.graphics = {}
+        self.last_input_change = 0
+        self.timer = None
+
+    def input_changed(self):
+        self.last_input_change = time.perf_counter()
+
+    def is_settling(self):
+        return time.perf_counter() - self.last_input_change < PREVIEW_DEBOUNCE
+
+    def schedule(self, app):
+        # asks for the preview again once the inputs stop changing - the timer thread can't use Fusion API
+        # so it fires the custom event which is handled on the main thread
+        if self.timer and self.timer.is_alive():
+            self.timer.cancel()
+        delay = max(0, PREVIEW_DEBOUNCE - (time.perf_counter() - self.last_input_change))
+        self.timer = threading.Timer(delay, app.fireCustomEvent, [self.event_id])
+        self.timer.daemon = True
+        self.timer.start()
+
+    def frame(self, face, edge, inward=False):
+        key = (face.entityToken, edge.entityToken, inward)
+        frame = self.frames.get(key)
+        if frame is None:
+            frame = model_frame(face, edge, inward)
+            self.frames[key] = frame
+        return key, frame
+
+    def solve(self, start_type, edge_length, pin, ratio, angle, height):
+        key = (start_type, edge_length, pin, ratio, angle, height)
+        if key != self.layout_key:
+            self.layout = solve_layout(start_type, edge_length, pin, ratio, angle, height)
+            self.layout_key = key
+        return self.layout
+
+    def is_up_to_date(self, pair_keys, layout_key, thickness):
+        geometry_key = (layout_key, thickness)
+        return set(pair_keys) == set(self.graphics) and \
+            all(key == geometry_key and group.isValid for key, body, group in self.graphics.values())
+
+    def update(self, design, pairs, thickness):
+        graphics_groups = design.rootComponent.customGraphicsGroups
+        geometry_key = (self.layout_key, thickness)
+        live = set()
+
+        for face, edge, inward in pairs:
+            pair_key, frame = self.frame(face, edge, inward)
+            live.add(pair_key)
+
+            body = None
+            current = self.graphics.get(pair_key)
+            if current:
+                key, body, group = current
+                if key == geometry_key and group.isValid:
+                    continue
+                if group.isValid:
+                    group.deleteMe()
+                if key != geometry_key:
+                    body = None
+
+            if body is None and self.layout.is_valid:
+                body = create_tails_body(frame, self.layout, thickness)
+
+            group = graphics_groups.add()
+            if body:
+                group.addBRepBody(body)
+            self.graphics[pair_key] = (geometry_key, body, group)
+
+        for pair_key in [k for k in self.graphics if k not in live]:
+            group = self.graphics.pop(pair_key)[2]
+            if group.isValid:
+                group.deleteMe()
+
+    def clear(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        for key, body, group in self.graphics.values():
+            if group.isValid:
+                group.deleteMe()
+        self.graphics = {}
@@ -0,0 +1,199 @@
+#Description-Opt-in per-stage timing and Fusion API calls counting with structured JSON log.
+
+# Every traced run appends one JSON record to the log file (one record per line).
+# Run this module as a script to see the summary of the recorded runs:
+#
+#   python dovetail_trace.py [log file] [--last N]
+
+import json, os, sys, time, datetime
+
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "trace.jsonl")
+
+
+def _is_api_module(frame):
+    return frame is not None and frame.f_globals.get("__name__", "").startswith("adsk.")
+
+
+class NullTrace:
+    # used when tracing is off so the traced code doesn't need to check for it
+    def stage(self, name):
+        pass
+
+    def end_stage(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+NULL_TRACE = NullTrace()
+
+
+class Trace:
+    # Times the stages of one run and optionally counts the Fusion API calls made in each of them.
+    # Stages are sequential - starting a stage ends the current one.
+    # API calls are counted with the profiler hook as the calls into adsk.* modules made
+    # from outside of them. The hook runs on every Python call so it inflates the timings several times -
+    # it's only set while the trace is active and the record of such run is marked as profiled.
+
+    def __init__(self, command, log_path=DEFAULT_LOG_PATH, count_api_calls=False, **info):
+        self.command = command
+        self.log_path = log_path
+        self.count_api_calls = count_api_calls
+        self.info = info
+        self.stages = []
+        self.api_calls = 0
+        self.error = None
+        self.current = None
+
+    def stage(self, name):
+        self.end_stage()
+        self.current = (name, time.perf_counter(), self.api_calls)
+
+    def end_stage(self):
+        if self.current is None:
+            return
+        (name, start, api_calls) = self.current
+        self.stages.append({
+            "name": name,
+            "duration": time.perf_counter() - start,
+            "api_calls": self.api_calls - api_calls if self.count_api_calls else None,
+        })
+        self.current = None
+
+    def _profile(self, frame, event, arg):
+        if event == "call":
+            if _is_api_module(frame) and not _is_api_module(frame.f_back):
+                self.api_calls += 1
+        elif event == "c_call":
+            module = getattr(arg, "__module__", None) or ""
+            if ("adsk" in module or module.startswith("_core") or module.startswith("_fusion")) and not _is_api_module(frame):
+                self.api_calls += 1
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.count_api_calls:
+            self.previous_profile = sys.getprofile()
+            sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.end_stage()
+        if self.count_api_calls:
+            sys.setprofile(self.previous_profile)
+        duration = time.perf_counter() - self.start
+        if exc_value is not None:
+            self.error = "{}: {}".format(exc_type.__name__, exc_value)
+        self.write(duration)
+        return False
+
+    def record(self, duration):
+        record = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "command": self.command,
+            "duration": duration,
+            "api_calls": self.api_calls if self.count_api_calls else None,
+            "profiled": self.count_api_calls,
+            "stages": self.stages,
+            "error": self.error,
+        }
+        record.update(self.info)
+        return record
+
+    def write(self, duration):
+        directory = os.path.dirname(self.log_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(self.record(duration)) + "\n")
+
+
+def read_records(log_path):
+    with open(log_path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def _is_profiled(record):
+    # the runs recorded before the API calls counting was optional were all profiled
+    return record.get("profiled", record["api_calls"] is not None)
+
+
+def summarize(records):
+    # Per stage: runs count, median, 90th percentile and maximum duration, median API calls (None if not counted)
+    # and whether the durations are inflated. Durations come from the runs without the API calls counting
+    # and only fall back to the profiled runs when there are no others, API calls come from the profiled runs.
+    stages = {}
+    order = []
+    for record in records:
+        profiled = _is_profiled(record)
+        for stage in record["stages"] + [{"name": "total", "duration": record["duration"], "api_calls": record["api_calls"]}]:
+            if stage["name"] not in stages:
+                stages[stage["name"]] = []
+                order.append(stage["name"])
+            stages[stage["name"]].append((stage, profiled))
+
+    if "total" in order:
+        order.remove("total")
+        order.append("total")
+
+    summary = []
+    for name in order:
+        inflated = all(profiled for (s, profiled) in stages[name])
+        durations = [s["duration"] for (s, profiled) in stages[name] if inflated or not profiled]
+        api_calls = [s["api_calls"] for (s, profiled) in stages[name] if profiled and s["api_calls"] is not None]
+        summary.append((name, len(durations), _percentile(durations, 0.5), _percentile(durations, 0.9), max(durations),
+                        _percentile(api_calls, 0.5) if api_calls else None, inflated))
+    return summary
+
+
+def main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Summary of the dovetails trace log")
+    parser.add_argument("log", nargs="?", default=DEFAULT_LOG_PATH)
+    parser.add_argument("--last", type=int, default=0, help="only summarize the last N runs")
+    parser.add_argument("--slowest", type=int, default=5, help="list N slowest runs")
+    args = parser.parse_args(argv)
+
+    records = list(read_records(args.log))
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print("No runs recorded in {}".format(args.log))
+        return 0
+
+    profiled = sum(1 for r in records if _is_profiled(r))
+    print("{} runs, {} failed, {} with API calls counted".format(len(records), sum(1 for r in records if r.get("error")), profiled))
+    print()
+    print("{:<24} {:>6} {:>12} {:>12} {:>12} {:>10}".format("Stage", "Runs", "Median, ms", "P90, ms", "Max, ms", "API calls"))
+    summary = summarize(records)
+    for (name, runs, median, p90, maximum, api_calls, inflated) in summary:
+        print("{:<24} {:>6} {:>12.1f} {:>12.1f} {:>12.1f} {:>10}{}".format(name, runs, median * 1000, p90 * 1000, maximum * 1000,
+                                                                          "-" if api_calls is None else api_calls, "  *" if inflated else ""))
+    if any(inflated for (name, runs, median, p90, maximum, api_calls, inflated) in summary):
+        print("* only runs with API calls counted - the profiler inflates their timings several times")
+
+    print()
+    print("Slowest runs:")
+    for record in sorted(records, key=lambda r: r["duration"], reverse=True)[:args.slowest]:
+        slowest_stage = max(record["stages"], key=lambda s: s["duration"]) if record["stages"] else None
+        print("  {} {:>10.1f} ms{}  {}  slowest stage: {}{}".format(
+            record["time"], record["duration"] * 1000, " (profiled)" if _is_profiled(record) else "",
+            ", ".join("{}={}".format(k, record[k]) for k in ("generation_mode", "start_type", "pairs", "design") if k in record),
+            slowest_stage["name"] if slowest_stage else "-",
+            "  FAILED: " + record["error"] if record.get("error") else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
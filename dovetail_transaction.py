@@ -0,0 +1,114 @@
+#Description-All or nothing creation of the dovetails: deferred compute, one timeline group and rollback on error.
+
+import adsk.fusion
+
+
+class DesignTransaction:
+    # Wraps one command execution. While it's active the design compute is deferred so the timeline is
+    # recomputed once at the end. On success everything added to the timeline is put into one timeline group,
+    # on error all the added timeline objects and the tracked entities (user parameters, attributes, bodies of
+    # direct designs - everything which isn't in the timeline) are deleted in the reverse order of creation
+    # and the registered changes of the existing entities are reverted before the compute is resumed,
+    # so no half-built joint is left behind. Existing entities being replaced are deleted only on commit.
+
+    def __init__(self, design, group_name):
+        self.design = design
+        self.group_name = group_name
+        self.timeline = design.timeline if design.designType == adsk.fusion.DesignTypes.ParametricDesignType else None
+        self.created = []
+        self.undo = []
+        self.replaced = []
+        self.marker = None
+        self.was_compute_deferred = None
+
+    def track(self, entity):
+        # entity which isn't in the timeline and has to be deleted on rollback
+        self.created.append(entity)
+        return entity
+
+    def on_rollback(self, undo):
+        # function reverting a change of an existing entity
+        self.undo.append(undo)
+
+    def replace(self, entity):
+        # Existing timeline entity the transaction creates a replacement for. Features are suppressed right away
+        # so the geometry they changed is restored, they are unsuppressed on rollback and deleted only on commit.
+        # Sketches can't be suppressed and don't change the bodies, they are kept as they are until the commit.
+        # Can be used before the transaction is entered - with the compute not deferred yet.
+        feature = adsk.fusion.Feature.cast(entity)
+        if feature and not feature.timelineObject.isSuppressed:
+            timeline_object = feature.timelineObject
+            timeline_object.isSuppressed = True
+            self.on_rollback(lambda: setattr(timeline_object, "isSuppressed", False))
+        self.replaced.append(entity)
+
+    def __enter__(self):
+        if self.timeline is not None:
+            self.marker = self.timeline.markerPosition
+        self.was_compute_deferred = self.design.isComputeDeferred
+        self.design.isComputeDeferred = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if exc_value is None:
+                self.commit()
+            else:
+                try:
+                    self.rollback()
+                except Exception as e:
+                    # the original error is re-raised - it's the one explaining what went wrong,
+                    # the failed cleanup is noted on it so the user knows to check the design
+                    _add_note(exc_value, "Rolling back the changes failed, some of the created entities may be left in the design: "
+                                         "{}: {}".format(type(e).__name__, e))
+        finally:
+            self.design.isComputeDeferred = self.was_compute_deferred
+        return False
+
+    def added_count(self):
+        return self.timeline.markerPosition - self.marker if self.timeline is not None else 0
+
+    def commit(self):
+        count = self.added_count()
+        if count > 1:
+            group = self.timeline.timelineGroups.add(self.marker, self.marker + count - 1)
+            group.name = self.group_name
+        for entity in reversed(self.replaced):
+            _delete(entity)
+        self.replaced = []
+
+    def rollback(self):
+        # Every step is tried even if some of them fail, the first failure is raised at the end.
+        # Timeline objects are inserted at the marker so the ones added by the transaction are right before it,
+        # direct designs have no timeline and everything created is tracked.
+        steps = []
+        if self.timeline is not None and self.marker is not None:
+            for i in reversed(range(self.marker, self.marker + self.added_count())):
+                steps.append(lambda i=i: _delete(self.timeline.item(i).entity))
+        steps += [lambda entity=entity: _delete(entity) for entity in reversed(self.created)]
+        steps += list(reversed(self.undo))
+        self.created = []
+        self.undo = []
+        self.replaced = []
+
+        error = None
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                error = error or e
+        if error:
+            raise error
+
+
+def _add_note(error, note):
+    # shown after the error message by traceback.format_exc(), older Pythons get it in the exception arguments
+    if hasattr(error, "add_note"):
+        error.add_note(note)
+    else:
+        error.args = error.args + (note,)
+
+
+def _delete(entity):
+    if entity and entity.isValid:
+        entity.deleteMe()
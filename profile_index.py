@@ -0,0 +1,35 @@
+#Description-Lookup of the sketch profiles by the sketch curves they are bounded by.
+
+# Has no direct Fusion API dependency - it works with any sketch-like object exposing
+# profiles -> profileLoops -> profileCurves -> sketchEntity, so it can be benchmarked without Fusion.
+# Curves are compared as entities - entity tokens of the same entity aren't guaranteed to be equal strings.
+
+
+def scan_profile_for_curve(curve):
+    # Walks every profile, loop and curve of the sketch - O(profiles * curves) API calls per lookup
+    for profile in curve.parentSketch.profiles:
+        for profile_loop in profile.profileLoops:
+            for profile_loop_curve in profile_loop.profileCurves:
+                if profile_loop_curve.sketchEntity == curve:
+                    return profile
+    return None
+
+
+def find_profiles(sketch, curves):
+    # Finds the profiles of all the curves in one walk over the sketch profiles, which stops as soon as every
+    # curve is found - the cost of a single scan for all the lookups of one sketch. Returns the profiles in the
+    # order of the curves (None for a curve bounding no profile), the first profile wins same as in the scan.
+    result = [None] * len(curves)
+    pending = list(range(len(curves)))
+    for profile in sketch.profiles:
+        for profile_loop in profile.profileLoops:
+            for profile_loop_curve in profile_loop.profileCurves:
+                entity = profile_loop_curve.sketchEntity
+                for i in pending:
+                    if entity == curves[i]:
+                        result[i] = profile
+                        pending.remove(i)
+                        break
+                if not pending:
+                    return result
+    return result